@@ -0,0 +1,271 @@
+"""
+Aggregates the repeated runs of every system: mean, standard deviation, min/max and
+bootstrap confidence interval of the WER/CER/cpWER/DER, per system and per condition
+(processed/unprocessed), from the structured results written by run_experiments.py
+"""
+
+import argparse
+import os
+import statistics
+import sys
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from results_sink import ResultsWriter, read_jsonl
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+DEFAULT_OUTPUT = "output/aggregate_results.txt"
+DEFAULT_RESULTS = "output/aggregate_results.jsonl"
+DEFAULT_RESAMPLES = 10000
+# Upper bound on the resampled values drawn at once, to bound memory with many groups
+BOOTSTRAP_CHUNK = 10_000_000
+
+
+def metric_value(row: Dict[str, Any]) -> Optional[float]:
+    """
+    Error rate of a result row (WER, CER, cpWER or DER).
+
+    Returns:
+        The error rate, None for rows of the --max-wer screening that exceeded the
+        cutoff, which only record that the run was rejected (see
+        compute_wer.wer_cutoff_row)
+    """
+    if row.get("exceeds_cutoff"):
+        return None
+    for key in ("WER", "CER", "cpWER"):
+        if key in row:
+            return row[key]
+    return row["DER"]
+
+
+def group_rows(
+    rows: List[Dict[str, Any]], by: str
+) -> Tuple[Dict[Tuple[str, str], List[float]], Dict[Tuple[str, str], int]]:
+    """
+    Group the error rates of result rows by metric and by a row field.
+
+    Args:
+        rows: Result rows, e.g. from read_jsonl
+        by: Row field to group by, e.g. "system" or "condition"; rows without it are skipped
+
+    Returns:
+        Tuple of (metric, group) to the list of error rates, in order of first
+        appearance, and (metric, group) to the number of rows rejected by the
+        --max-wer screening, which are left out of the error rates
+    """
+    groups: Dict[Tuple[str, str], List[float]] = {}
+    rejected: Dict[Tuple[str, str], int] = {}
+    for row in rows:
+        if row.get(by) is None:
+            continue
+        key = (row["metric"], row[by])
+        values = groups.setdefault(key, [])
+        value = metric_value(row)
+        if value is None:
+            rejected[key] = rejected.get(key, 0) + 1
+        else:
+            values.append(value)
+    return groups, rejected
+
+
+def bootstrap_ci(
+    samples: Sequence[Sequence[float]],
+    resamples: int = DEFAULT_RESAMPLES,
+    confidence: float = 0.95,
+    seed: Optional[int] = 0,
+) -> List[Tuple[float, float]]:
+    """
+    Percentile bootstrap confidence interval of the mean of every sample.
+
+    Samples of the same size are resampled together: one (groups, resamples, size)
+    index draw and a single mean over the last axis, so the cost does not grow with
+    the number of Python-level loops.
+
+    Args:
+        samples: One list of values per group
+        resamples: Bootstrap resamples per group
+        confidence: Confidence level of the interval
+        seed: Random seed, for reproducible intervals
+
+    Returns:
+        (low, high) for every sample, in the same order
+    """
+    if np is None:
+        raise ImportError("Bootstrap confidence intervals require NumPy")
+    rng = np.random.default_rng(seed)
+    alpha = (1 - confidence) / 2
+    intervals: List[Tuple[float, float]] = [(0.0, 0.0)] * len(samples)
+
+    by_size: Dict[int, List[int]] = {}
+    for index, sample in enumerate(samples):
+        by_size.setdefault(len(sample), []).append(index)
+
+    for size, indices in by_size.items():
+        values = np.array([samples[index] for index in indices], dtype=float)
+        groups_per_chunk = max(1, BOOTSTRAP_CHUNK // (resamples * size))
+        for start in range(0, len(indices), groups_per_chunk):
+            chunk = values[start:start + groups_per_chunk]
+            draws = rng.integers(0, size, size=(len(chunk), resamples, size))
+            means = np.take_along_axis(chunk[:, None, :], draws, axis=2).mean(axis=2)
+            lows, highs = np.quantile(means, [alpha, 1 - alpha], axis=1)
+            for offset, (low, high) in enumerate(zip(lows, highs)):
+                intervals[indices[start + offset]] = (float(low), float(high))
+    return intervals
+
+
+def aggregate(
+    rows: List[Dict[str, Any]],
+    by: str,
+    resamples: int = DEFAULT_RESAMPLES,
+    confidence: float = 0.95,
+    seed: Optional[int] = 0,
+) -> List[Dict[str, Any]]:
+    """
+    Summarize the error rates of result rows per group.
+
+    Args:
+        rows: Result rows
+        by: Row field to group by ("system" or "condition")
+        resamples: Bootstrap resamples, 0 to skip the confidence intervals
+        confidence: Confidence level of the intervals
+        seed: Random seed of the bootstrap
+
+    Returns:
+        One row per (metric, group) with n, mean, std (sample), min, max and, unless
+        resamples is 0, ci_low/ci_high; groups with runs rejected by the --max-wer
+        screening also have "rejected", their count (the statistics are None when
+        every run was rejected)
+    """
+    groups, rejected = group_rows(rows, by)
+    scored = [key for key, values in groups.items() if values]
+    intervals = (
+        dict(zip(scored, bootstrap_ci([groups[key] for key in scored], resamples, confidence, seed)))
+        if resamples
+        else None
+    )
+
+    summary = []
+    for (metric, group), values in groups.items():
+        row = {
+            "metric": metric,
+            "group_by": by,
+            "group": group,
+            "n": len(values),
+            "mean": statistics.fmean(values) if values else None,
+            "std": (statistics.stdev(values) if len(values) > 1 else 0.0) if values else None,
+            "min": min(values, default=None),
+            "max": max(values, default=None),
+        }
+        if intervals is not None:
+            row["ci_low"], row["ci_high"] = intervals.get((metric, group), (None, None))
+            row["confidence"] = confidence
+        if (metric, group) in rejected:
+            row["rejected"] = rejected[metric, group]
+        summary.append(row)
+    return summary
+
+
+def format_table(summary: List[Dict[str, Any]]) -> str:
+    """
+    Format aggregated rows as a fixed-width table, one block per metric. Blocks with
+    runs rejected by the --max-wer screening get a "rejected" column.
+    """
+    lines = []
+    metric = None
+    width = max((len(str(row["group"])) for row in summary), default=0)
+
+    def number(value: Optional[float]) -> str:
+        return f"{value:>7.4f}" if value is not None else f"{'-':>7}"
+
+    for row in summary:
+        if row["metric"] != metric:
+            metric = row["metric"]
+            with_rejected = any("rejected" in other for other in summary if other["metric"] == metric)
+            rejected = "  rejected" if with_rejected else ""
+            ci = f"{row['confidence']*100:.0f}% CI" if "ci_low" in row else ""
+            lines.append("")
+            lines.append(f"### {metric}")
+            lines.append(
+                f"{'':<{width}}  {'n':>3}{rejected}  {'mean':>7}  {'std':>7}  {'min':>7}  {'max':>7}  {ci}".rstrip()
+            )
+        line = f"{row['group']:<{width}}  {row['n']:>3}"
+        if with_rejected:
+            line += f"  {row.get('rejected', 0):>8}"
+        line += f"  {number(row['mean'])}  {number(row['std'])}  {number(row['min'])}  {number(row['max'])}"
+        if row.get("ci_low") is not None:
+            line += f"  [{row['ci_low']:.4f}, {row['ci_high']:.4f}]"
+        lines.append(line)
+    return "\n".join(lines) + "\n"
+
+
+def write_aggregate(
+    results_files: List[str],
+    output_file: str = DEFAULT_OUTPUT,
+    results_file: str = DEFAULT_RESULTS,
+    resamples: int = DEFAULT_RESAMPLES,
+    confidence: float = 0.95,
+    seed: Optional[int] = 0,
+):
+    """
+    Aggregate the rows of JSON Lines results files into a text report and a JSON
+    Lines file.
+    """
+    rows = [row for path in results_files for row in read_jsonl(path)]
+    with ResultsWriter(results_file) as results, open(output_file, "w") as f:
+        f.write("Aggregate Results\n")
+        f.write("===================\n")
+        for by, title in (("system", "Per system"), ("condition", "Per condition")):
+            summary = aggregate(rows, by, resamples, confidence, seed)
+            for row in summary:
+                results.add(row)
+            f.write(f"\n## {title}\n")
+            f.write(format_table(summary))
+
+
+def main():
+    # Imported here, run_experiments imports this module for its --aggregate stage
+    from run_experiments import DEFAULT_MANIFEST, load_manifest
+
+    parser = argparse.ArgumentParser(
+        description="Aggregate the repeated runs of every system (mean, std, min/max, bootstrap CI)"
+    )
+    parser.add_argument(
+        "results",
+        nargs="*",
+        help="JSON Lines results files (default: those of every report in experiments.toml)",
+    )
+    parser.add_argument("-o", "--output", help=f"Text report (default: {DEFAULT_OUTPUT})")
+    parser.add_argument("--results-file", help=f"JSON Lines output (default: {DEFAULT_RESULTS})")
+    parser.add_argument(
+        "--resamples",
+        type=int,
+        default=DEFAULT_RESAMPLES,
+        help=f"Bootstrap resamples per group, 0 to skip the intervals (default: {DEFAULT_RESAMPLES})",
+    )
+    parser.add_argument(
+        "--confidence", type=float, default=0.95, help="Confidence level (default: 0.95)"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Bootstrap random seed (default: 0)")
+    args = parser.parse_args()
+
+    # Paths given on the command line are relative to the current directory, the
+    # defaults to the results directory
+    results_files = [os.path.abspath(path) for path in args.results]
+    output = os.path.abspath(args.output) if args.output else DEFAULT_OUTPUT
+    results_file = os.path.abspath(args.results_file) if args.results_file else DEFAULT_RESULTS
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    if not results_files:
+        results_files = [report["results"] for report in load_manifest(DEFAULT_MANIFEST)]
+
+    try:
+        write_aggregate(results_files, output, results_file, args.resamples, args.confidence, args.seed)
+    except (ImportError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Optimal one-to-one assignment (Hungarian algorithm), used to map speaker labels
+"""
+
+from typing import List, Sequence, Tuple
+
+
+def linear_sum_assignment(cost: Sequence[Sequence[float]]) -> List[Tuple[int, int]]:
+    """
+    Solve the rectangular linear assignment problem in O(n^2 * m).
+
+    Every row is matched to a distinct column (or every column to a distinct row if
+    there are fewer columns) so that the total cost is minimal.
+
+    Args:
+        cost: Cost matrix as a list of rows
+
+    Returns:
+        List of (row, column) pairs sorted by row
+    """
+    n = len(cost)
+    m = len(cost[0]) if n else 0
+    if n == 0 or m == 0:
+        return []
+    if n > m:
+        transposed = [[cost[i][j] for i in range(n)] for j in range(m)]
+        return sorted((i, j) for j, i in linear_sum_assignment(transposed))
+
+    # Potentials for rows (u) and columns (v); p[j] is the row assigned to column j,
+    # all 1-based with column 0 used as the virtual start of each augmenting path
+    inf = float("inf")
+    u = [0.0] * (n + 1)
+    v = [0.0] * (m + 1)
+    p = [0] * (m + 1)
+    way = [0] * (m + 1)
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        min_v = [inf] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            delta = inf
+            j1 = 0
+            row = cost[i0 - 1]
+            for j in range(1, m + 1):
+                if not used[j]:
+                    cur = row[j - 1] - u[i0] - v[j]
+                    if cur < min_v[j]:
+                        min_v[j] = cur
+                        way[j] = j0
+                    if min_v[j] < delta:
+                        delta = min_v[j]
+                        j1 = j
+            for j in range(m + 1):
+                if used[j]:
+                    u[p[j]] += delta
+                    v[j] -= delta
+                else:
+                    min_v[j] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        # Flip the augmenting path
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+
+    return sorted((p[j] - 1, j - 1) for j in range(1, m + 1) if p[j])
@@ -0,0 +1,447 @@
+"""
+Benchmarks for the metric scripts
+
+By default, times the WER alignment kernels of compute_wer.py on the recorded
+session. With --suite, runs every metric path (WER aligners, streaming WER, bounded
+WER screening, CER, whisperx timing profile, cpWER, segment, time-weighted and
+event-stream DER, Gemini DER) on synthetic transcripts and diarizations of
+increasing size (see synthetic.py), measuring time and peak memory, and appends the
+results to a JSON Lines history file so regressions and scaling curves are visible
+across commits.
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import compute_der_gemini
+import compute_wer
+import cpwer
+import der
+import synthetic
+import whisperx_wer
+from results_sink import read_jsonl
+from run_experiments import DEFAULT_MANIFEST, expand_jobs, load_manifest
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+DEFAULT_ERROR_RATE = 0.1
+DEFAULT_HISTORY = "output/benchmark_history.jsonl"
+# WER thresholds of the bounded screening cases: above and well below the error rate
+SCREENING_PASS = 0.15
+SCREENING_REJECT = 0.02
+
+
+def load_pairs() -> Tuple[str, List[Tuple[str, str]]]:
+    """
+    Load and normalize the ground truth and every hypothesis of the WER report in
+    experiments.toml.
+
+    Returns:
+        Tuple of (normalized reference, list of (file path, normalized hypothesis))
+    """
+    report = next(report for report in load_manifest(DEFAULT_MANIFEST) if report["metric"] == "wer")
+    jobs = expand_jobs(report)
+    with open(jobs[0].ground_truth, encoding="utf-8") as f:
+        ref = compute_wer.normalize_text(f.read())
+
+    hyps = []
+    for job in jobs:
+        with open(job.path, encoding="utf-8") as f:
+            hyps.append((job.path, compute_wer.normalize_text(f.read())))
+    return ref, hyps
+
+
+def time_best(func: Callable[[], object], repeat: int) -> float:
+    """Return the best wall-clock time over `repeat` runs of `func`."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_wer_kernels(repeat: int) -> dict:
+    """
+    Time the WER scoring of every hypothesis against the ground truth.
+
+    - legacy: stats and alignment computed separately with the pure-Python kernel
+      (two DP matrices per pair, as compute_from_files used to do)
+    - python: single-pass alignment with the pure-Python kernel
+    - numpy: single-pass alignment with the NumPy kernel
+
+    Also checks that both kernels return identical results.
+    """
+    ref, hyps = load_pairs()
+
+    for path, hyp in hyps:
+        expected = compute_wer.wer_align(ref, hyp, kernel="python")
+        if compute_wer.wer_align(ref, hyp, kernel="numpy") != expected:
+            raise AssertionError(f"NumPy kernel result differs for {path}")
+
+    def legacy():
+        for _, hyp in hyps:
+            compute_wer.wer_stats(ref, hyp, kernel="python")
+            compute_wer.align_texts(ref, hyp, kernel="python")
+
+    def single_pass(kernel):
+        return lambda: [compute_wer.wer_align(ref, hyp, kernel=kernel) for _, hyp in hyps]
+
+    return {
+        "pairs": len(hyps),
+        "ref_words": len(ref.split()),
+        "legacy": time_best(legacy, repeat),
+        "python": time_best(single_pass("python"), repeat),
+        "numpy": time_best(single_pass("numpy"), repeat),
+    }
+
+
+@dataclass
+class BenchCase:
+    """
+    A metric path of the suite.
+
+    Attributes:
+        name: Case name, e.g. "wer-anchored"
+        max_size: Largest size the case is run at (quadratic paths are capped)
+        run: Runs the metric on the inputs of a size, see SuiteInputs
+    """
+
+    name: str
+    max_size: int
+    run: Callable[["SuiteInputs"], Any]
+
+
+@dataclass
+class SuiteInputs:
+    """Synthetic inputs of one size: normalized texts in memory, the others as files."""
+
+    ref: str
+    hyp: str
+    diarization_gt: str
+    diarization_test: str
+    dialogue_gt: str
+    dialogue_test: str
+    whisperx: str
+
+
+def make_inputs(directory: str, size: int, error_rate: float, seed: int) -> SuiteInputs:
+    """
+    Generate the inputs of one size: `size` reference words for the WER paths and
+    `size` segments for the DER paths.
+    """
+    ref = synthetic.synthetic_reference(size, seed)
+    hyp, _ = synthetic.corrupt_words(ref, error_rate, seed)
+    gt_segments = synthetic.synthetic_diarization(size, seed=seed)
+    gt_dialogue, test_dialogue = synthetic.synthetic_dialogue(size, error_rate, seed)
+
+    inputs = SuiteInputs(
+        ref=" ".join(ref),
+        hyp=" ".join(hyp),
+        diarization_gt=os.path.join(directory, f"diarization_gt_{size}.json"),
+        diarization_test=os.path.join(directory, f"diarization_test_{size}.json"),
+        dialogue_gt=os.path.join(directory, f"dialogue_gt_{size}.txt"),
+        dialogue_test=os.path.join(directory, f"dialogue_test_{size}.txt"),
+        whisperx=os.path.join(directory, f"whisperx_{size}.json"),
+    )
+    synthetic.write_whisperx(inputs.whisperx, hyp, seed)
+    synthetic.write_diarization(inputs.diarization_gt, gt_segments)
+    synthetic.write_diarization(
+        inputs.diarization_test, synthetic.corrupt_diarization(gt_segments, error_rate, seed=seed)
+    )
+    synthetic.write_dialogue(inputs.dialogue_gt, [
+        compute_der_gemini.TranscriptSegment(segment.speaker, segment.text) for segment in gt_dialogue
+    ])
+    synthetic.write_dialogue(inputs.dialogue_test, test_dialogue)
+    return inputs
+
+
+def _streaming_wer(inputs: SuiteInputs, chunk: int = 50) -> Dict[str, Any]:
+    ref, hyp = inputs.ref.split(), inputs.hyp.split()
+    stream = compute_wer.StreamingWER()
+    # Hypothesis chunks end at the same relative position as the reference ones
+    for start in range(0, len(ref), chunk):
+        h0 = start * len(hyp) // len(ref)
+        h1 = min(start + chunk, len(ref)) * len(hyp) // len(ref)
+        stream.add(ref[start:start + chunk], hyp[h0:h1])
+    return stream.finish()
+
+
+def _time_weighted_der(inputs: SuiteInputs) -> Dict[str, float]:
+    labels: List[str] = []
+    reference = der.to_segment_arrays(der.load_diarization_file(inputs.diarization_gt), labels)
+    hypothesis = der.to_segment_arrays(der.load_diarization_file(inputs.diarization_test), labels)
+    mapping = der.optimal_speaker_mapping(reference, hypothesis)
+    return der.time_weighted_der(reference, hypothesis, mapping=mapping)
+
+
+def _event_der(inputs: SuiteInputs) -> Dict[str, float]:
+    ground_truth = der.load_diarization_file(inputs.diarization_gt)
+    test_data = der.load_diarization_file(inputs.diarization_test)
+    return der.event_der(ground_truth, test_data, mapping=der.event_speaker_mapping(ground_truth, test_data))
+
+
+def _gemini_der(inputs: SuiteInputs, alignment: str, **options) -> Tuple[float, int, int, List[dict]]:
+    return compute_der_gemini.compute_der_gt_based(
+        compute_der_gemini.parse_ground_truth_file(inputs.dialogue_gt),
+        compute_der_gemini.parse_test_file(inputs.dialogue_test),
+        alignment=alignment,
+        **options,
+    )
+
+
+def _timing_profile(inputs: SuiteInputs) -> Dict[str, Any]:
+    words = whisperx_wer.load_whisperx_words(inputs.whisperx)
+    return whisperx_wer.timing_profile(inputs.ref.split(), words)
+
+
+SUITE_CASES = [
+    BenchCase("wer", 10_000, lambda x: compute_wer.score_normalized(x.ref, x.hyp)),
+    BenchCase("wer-linear", 10_000, lambda x: compute_wer.score_normalized(x.ref, x.hyp, linear_threshold=0)),
+    BenchCase("wer-python", 1_000, lambda x: compute_wer.wer_align(x.ref, x.hyp, kernel="python")),
+    BenchCase("wer-anchored", 100_000, lambda x: compute_wer.score_normalized(x.ref, x.hyp, anchored=True)),
+    BenchCase("wer-streaming", 100_000, _streaming_wer),
+    BenchCase("wer-cutoff", 10_000, lambda x: compute_wer.wer_cutoff_row(x.ref, x.hyp, SCREENING_PASS)),
+    BenchCase(
+        "wer-cutoff-reject", 100_000, lambda x: compute_wer.wer_cutoff_row(x.ref, x.hyp, SCREENING_REJECT)
+    ),
+    BenchCase("cer", 10_000, lambda x: compute_wer.cer_row(x.ref, x.hyp)),
+    BenchCase("whisperx-timing", 10_000, _timing_profile),
+    BenchCase(
+        "der-segment", 100_000, lambda x: der.compute_der(x.diarization_gt, x.diarization_test, verbose=False)
+    ),
+    BenchCase("der-time", 100_000, _time_weighted_der),
+    BenchCase("der-events", 100_000, _event_der),
+    BenchCase("der-gemini", 1_000, lambda x: _gemini_der(x, "global")),
+    BenchCase("der-gemini-monotonic", 100_000, lambda x: _gemini_der(x, "monotonic")),
+    BenchCase("der-gemini-time-window", 100_000, lambda x: _gemini_der(x, "global", time_window=30.0)),
+    BenchCase("cpwer", 1_000, lambda x: cpwer.cpwer_row(x.dialogue_gt, x.dialogue_test)),
+]
+
+
+def peak_memory(func: Callable[[], object]) -> int:
+    """Peak memory in bytes traced by tracemalloc (Python and NumPy allocations) during `func`."""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def git_commit() -> Optional[str]:
+    """Current commit of the repository, None outside a git checkout."""
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def run_suite(
+    sizes: List[int],
+    cases: List[BenchCase],
+    error_rate: float = DEFAULT_ERROR_RATE,
+    repeat: int = 1,
+    seed: int = 0,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Run every case at every size up to its max_size.
+
+    The time is the best of `repeat` runs; the peak memory is measured in one more
+    run under tracemalloc, which would otherwise slow down the timed runs.
+
+    Returns:
+        One record per run case and size, with case, size, error_rate, seed, seconds
+        and peak_bytes
+    """
+    records = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            inputs = None
+            for case in cases:
+                if size > case.max_size:
+                    continue
+                if inputs is None:
+                    inputs = make_inputs(directory, size, error_rate, seed)
+                func = lambda: case.run(inputs)  # noqa: E731
+                record = {
+                    "case": case.name,
+                    "size": size,
+                    "error_rate": error_rate,
+                    "seed": seed,
+                    "seconds": time_best(func, repeat),
+                    "peak_bytes": peak_memory(func),
+                }
+                records.append(record)
+                if progress is not None:
+                    progress(record)
+    return records
+
+
+def append_history(path: str, records: List[Dict[str, Any]]):
+    """Append suite records to the JSON Lines history, with the commit and the environment."""
+    context = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "numpy": compute_wer.np.__version__ if compute_wer.np is not None else None,
+        "machine": platform.machine(),
+    }
+    with open(path, "a", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps({**context, **record}, ensure_ascii=False) + "\n")
+
+
+def format_suite(records: List[Dict[str, Any]], history: List[Dict[str, Any]]) -> str:
+    """
+    Format suite records as a table with the scaling exponent (slope of log time
+    over log size from the previous size of the same case) and the change from the
+    latest record of the history with the same case, size, error rate and seed.
+    """
+    previous = {}
+    for row in history:
+        previous[row["case"], row["size"], row.get("error_rate"), row.get("seed")] = row
+
+    lines = [
+        f"{'case':<22} {'size':>7} {'seconds':>9} {'peak MiB':>9} {'scaling':>8} {'vs last':>8}"
+    ]
+    last_of_case: Dict[str, Dict[str, Any]] = {}
+    for record in records:
+        scaling = ""
+        before = last_of_case.get(record["case"])
+        if before is not None and before["seconds"] > 0 and record["seconds"] > 0:
+            scaling = "n^{:.2f}".format(
+                math.log(record["seconds"] / before["seconds"]) / math.log(record["size"] / before["size"])
+            )
+        last_of_case[record["case"]] = record
+        change = ""
+        old = previous.get((record["case"], record["size"], record["error_rate"], record["seed"]))
+        if old is not None and old["seconds"] > 0:
+            change = f"{(record['seconds'] / old['seconds'] - 1) * 100:+.0f}%"
+        lines.append(
+            f"{record['case']:<22} {record['size']:>7} {record['seconds']:>9.3f} "
+            f"{record['peak_bytes'] / 2**20:>9.1f} {scaling:>8} {change:>8}"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def suite_main(args: argparse.Namespace):
+    names = args.cases.split(",") if args.cases else [case.name for case in SUITE_CASES]
+    unknown = sorted(set(names) - {case.name for case in SUITE_CASES})
+    if unknown:
+        print(f"Error: unknown cases {', '.join(unknown)}")
+        sys.exit(1)
+    cases = [case for case in SUITE_CASES if case.name in names]
+    sizes = [int(size) for size in args.sizes.split(",")]
+    if args.max_size is not None:
+        # Copies, so the shared SUITE_CASES keep their own limits
+        cases = [replace(case, max_size=max(case.max_size, args.max_size)) for case in cases]
+
+    history = read_jsonl(args.history) if os.path.exists(args.history) else []
+
+    def progress(record):
+        print(f"  {record['case']} @ {record['size']}: {record['seconds']:.3f}s", file=sys.stderr)
+
+    records = run_suite(sizes, cases, args.error_rate, args.repeat, args.seed, progress)
+    print("=" * 70)
+    print(f"METRIC BENCHMARK SUITE (error rate {args.error_rate:g}, seed {args.seed})")
+    print("=" * 70)
+    print(format_suite(records, history), end="")
+    print("=" * 70)
+    if not args.no_history:
+        append_history(args.history, records)
+        print(f"Appended {len(records)} records to {args.history}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the WER alignment kernels, or every metric on synthetic inputs (--suite)"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Runs per measurement, best is kept (default: 3)"
+    )
+    parser.add_argument(
+        "--min-speedup",
+        type=float,
+        default=20.0,
+        help="Fail if the NumPy kernel is not this much faster than the legacy scoring (default: 20)",
+    )
+    suite = parser.add_argument_group("synthetic suite")
+    suite.add_argument(
+        "--suite", action="store_true", help="Benchmark every metric path on synthetic inputs"
+    )
+    suite.add_argument(
+        "--sizes",
+        default=",".join(str(size) for size in DEFAULT_SIZES),
+        help="Comma-separated sizes, words for WER and segments for DER (default: 1000,10000,100000)",
+    )
+    suite.add_argument(
+        "--cases", help=f"Comma-separated cases (default: all of {', '.join(c.name for c in SUITE_CASES)})"
+    )
+    suite.add_argument(
+        "--max-size",
+        type=int,
+        default=None,
+        help="Also run the quadratic cases up to this size (default: 10000, 1000 for wer-python, der-gemini and cpwer)",
+    )
+    suite.add_argument(
+        "--error-rate",
+        type=float,
+        default=DEFAULT_ERROR_RATE,
+        help=f"Share of wrong words and speaker labels (default: {DEFAULT_ERROR_RATE})",
+    )
+    suite.add_argument("--seed", type=int, default=0, help="Seed of the synthetic inputs (default: 0)")
+    suite.add_argument(
+        "--history", default=DEFAULT_HISTORY, help=f"JSON Lines history file (default: {DEFAULT_HISTORY})"
+    )
+    suite.add_argument("--no-history", action="store_true", help="Do not append to the history file")
+    args = parser.parse_args()
+
+    if args.suite:
+        history = os.path.abspath(args.history) if args.history != DEFAULT_HISTORY else DEFAULT_HISTORY
+        os.chdir(os.path.dirname(os.path.abspath(__file__)))
+        args.history = history
+        suite_main(args)
+        return
+
+    if compute_wer.np is None:
+        print("Error: NumPy is required to benchmark the NumPy kernel.")
+        sys.exit(1)
+
+    # The file lists are relative to the results directory
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    res = bench_wer_kernels(args.repeat)
+    speedup = res["legacy"] / res["numpy"]
+
+    print("=" * 50)
+    print("WER KERNEL BENCHMARK")
+    print("=" * 50)
+    print(f"Pairs: {res['pairs']} (reference: {res['ref_words']} words)")
+    print(f"Legacy (two passes, Python): {res['legacy']:.3f}s")
+    print(f"Single pass, Python kernel:  {res['python']:.3f}s")
+    print(f"Single pass, NumPy kernel:   {res['numpy']:.3f}s")
+    print(f"Speedup NumPy vs legacy: {speedup:.1f}x")
+    print(f"Speedup NumPy vs Python kernel: {res['python'] / res['numpy']:.1f}x")
+    print("=" * 50)
+
+    if speedup < args.min_speedup:
+        print(f"Error: speedup below {args.min_speedup:.1f}x")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
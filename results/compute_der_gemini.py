@@ -3,12 +3,25 @@ Compute the DER for the Gemini models
 """
 
 import argparse
+import io
+import json
 import re
 import sys
-from typing import List, Tuple, Optional
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from typing import Any, Dict, List, Sequence, Tuple, Optional
 from difflib import SequenceMatcher
 from dataclasses import dataclass
 
+import text_normalization
+import vocabulary
+from result_cache import ResultCache, cached_row, code_version
+from results_sink import ResultsWriter
+from text_normalization import SIMILARITY_RULES, normalize
+from vocabulary import Vocabulary
+
+DEFAULT_SWEEP = "0.1:0.95:0.05"
+
 
 @dataclass
 class TranscriptSegment:
@@ -17,6 +30,11 @@ class TranscriptSegment:
     speaker: str
     text: str
     timestamp: Optional[str] = None
+    seconds: Optional[float] = None
+
+    def __post_init__(self):
+        if self.seconds is None and self.timestamp is not None:
+            self.seconds = parse_timestamp(self.timestamp)
 
     def __str__(self):
         if self.timestamp:
@@ -24,6 +42,23 @@ class TranscriptSegment:
         return f"{self.speaker}: {self.text}"
 
 
+def parse_timestamp(timestamp: str) -> Optional[float]:
+    """
+    Convert a "[mm:ss]" style timestamp ("ss", "mm:ss" or "hh:mm:ss", optionally
+    with fractional seconds) to seconds.
+
+    Returns:
+        The time in seconds, or None if the timestamp cannot be parsed
+    """
+    seconds = 0.0
+    try:
+        for part in timestamp.strip().split(":"):
+            seconds = seconds * 60 + float(part)
+    except ValueError:
+        return None
+    return seconds
+
+
 def normalize_speaker_name(speaker: str) -> str:
     """
     Maps name variations to standard speaker names.
@@ -47,7 +82,8 @@ def normalize_speaker_name(speaker: str) -> str:
 
 def parse_ground_truth_file(file_path: str) -> List[TranscriptSegment]:
     """
-    Parse ground truth transcription file (format: "Speaker: text").
+    Parse ground truth transcription file (format: "Speaker: text", optionally
+    "[timestamp] Speaker: text").
     """
     segments = []
 
@@ -70,14 +106,22 @@ def parse_ground_truth_file(file_path: str) -> List[TranscriptSegment]:
         if not line:
             continue
 
-        speaker_match = re.match(r"^([^:]+):\s*(.*)$", line)
+        timestamp = None
+        timed_match = re.match(r"^\[([^\]]+)\]\s*([^:]+):\s*(.*)$", line)
+        if timed_match:
+            timestamp = timed_match.group(1)
+            speaker_match = re.match(r"^([^:]+):\s*(.*)$", line[timed_match.start(2) :])
+        else:
+            speaker_match = re.match(r"^([^:]+):\s*(.*)$", line)
         if speaker_match:
             if current_segment:
                 segments.append(current_segment)
 
             speaker = normalize_speaker_name(speaker_match.group(1))
             text = speaker_match.group(2).strip()
-            current_segment = TranscriptSegment(speaker=speaker, text=text)
+            current_segment = TranscriptSegment(
+                speaker=speaker, text=text, timestamp=timestamp
+            )
         else:
             if current_segment:
                 current_segment.text += " " + line
@@ -123,44 +167,38 @@ def parse_test_file(file_path: str) -> List[TranscriptSegment]:
 
 def normalize_text(text: str) -> str:
     """
-    Normalize text for comparison by removing punctuation and standardizing spacing.
+    Normalize text for comparison by removing punctuation and standardizing spacing
+    (see text_normalization.SIMILARITY_RULES; results are memoized).
     """
-    text = text.lower()  # lowercase
-    text = re.sub(r'[.,;!?()"\[\]{}]', "", text)  # Remove punctuation
-    text = re.sub(r"\s+", " ", text).strip()  # Standardize whitespace
-    return text
+    return normalize(text, SIMILARITY_RULES)
 
 
-def text_similarity(text1: str, text2: str) -> float:
+def _shape_score(
+    norm_text1: str, words1: Sequence, norm_text2: str, words2: Sequence
+) -> Optional[float]:
     """
-    Calculate similarity between two text segments.
-    Prioritizes exact matches and penalizes excessive length differences.
+    Cheap part of text_similarity, based on containment and word matching.
+
+    The words can be strings or ids from a shared Vocabulary.
 
     Returns:
-        Similarity score between 0 and 1
+        None if the similarity is just the SequenceMatcher ratio, otherwise a score
+        such that the similarity is max(ratio, score)
     """
-    # Normalize both texts
-    norm_text1 = normalize_text(text1)
-    norm_text2 = normalize_text(text2)
-
-    # If either text is empty, no similarity
-    if not norm_text1 or not norm_text2:
-        return 0.0
-
-    # Use SequenceMatcher for basic similarity
-    matcher = SequenceMatcher(None, norm_text1, norm_text2)
-    basic_similarity = matcher.ratio()
-
     # Determine shorter and longer texts
-    shorter_text = norm_text1 if len(norm_text1) <= len(norm_text2) else norm_text2
-    longer_text = norm_text2 if len(norm_text1) <= len(norm_text2) else norm_text1
+    if len(norm_text1) <= len(norm_text2):
+        shorter_text, longer_text = norm_text1, norm_text2
+        shorter_words, longer_words = words1, words2
+    else:
+        shorter_text, longer_text = norm_text2, norm_text1
+        shorter_words, longer_words = words2, words1
 
     # Calculate length ratio (shorter/longer)
     length_ratio = len(shorter_text) / len(longer_text) if len(longer_text) > 0 else 0
 
     # If texts are very similar in length, prioritize basic similarity
     if length_ratio >= 0.8:
-        return basic_similarity
+        return None
 
     # Check for exact substring containment
     if shorter_text in longer_text:
@@ -172,27 +210,25 @@ def text_similarity(text1: str, text2: str) -> float:
             # Penalize cases where shorter text is much smaller than longer text
             containment_score = 0.6 + (0.25 * length_ratio)
 
-        return max(basic_similarity, containment_score)
+        return containment_score
 
     # Check for fuzzy word-based matching
-    words1 = shorter_text.split()
-    words2 = longer_text.split()
-
-    if len(words1) > 0:
+    if len(shorter_words) > 0:
         # Count consecutive matching words from the beginning
         consecutive_matches = 0
-        for i, word in enumerate(words1):
-            if i < len(words2) and word == words2[i]:
+        for i, word in enumerate(shorter_words):
+            if i < len(longer_words) and word == longer_words[i]:
                 consecutive_matches += 1
             else:
                 break
 
         # Count how many words from shorter text appear in longer text
-        matching_words = sum(1 for word in words1 if word in words2)
-        word_match_ratio = matching_words / len(words1)
+        longer_set = set(longer_words)
+        matching_words = sum(1 for word in shorter_words if word in longer_set)
+        word_match_ratio = matching_words / len(shorter_words)
 
         # Prioritize consecutive matches from the beginning
-        consecutive_ratio = consecutive_matches / len(words1)
+        consecutive_ratio = consecutive_matches / len(shorter_words)
 
         # If most words match and there's good consecutive matching
         if word_match_ratio >= 0.8 and consecutive_ratio >= 0.6:
@@ -201,20 +237,297 @@ def text_similarity(text1: str, text2: str) -> float:
             fuzzy_score = (
                 0.7 + (0.2 * word_match_ratio) + (0.1 * consecutive_ratio)
             ) - length_penalty
-            return max(basic_similarity, min(fuzzy_score, 0.95))
+            return min(fuzzy_score, 0.95)
         elif word_match_ratio >= 0.7:
             # Standard fuzzy matching with length penalty
             length_penalty = max(0, (1 - length_ratio) * 0.2)
             fuzzy_score = (0.6 + (0.3 * word_match_ratio)) - length_penalty
-            return max(basic_similarity, min(fuzzy_score, 0.85))
+            return min(fuzzy_score, 0.85)
+
+    return None
+
+
+def _normalized_similarity(norm_text1: str, norm_text2: str) -> float:
+    """text_similarity on already normalized texts."""
+    # If either text is empty, no similarity
+    if not norm_text1 or not norm_text2:
+        return 0.0
+
+    # Use SequenceMatcher for basic similarity
+    basic_similarity = SequenceMatcher(None, norm_text1, norm_text2).ratio()
+    score = _shape_score(norm_text1, norm_text1.split(), norm_text2, norm_text2.split())
+    return basic_similarity if score is None else max(basic_similarity, score)
+
+
+def text_similarity(text1: str, text2: str) -> float:
+    """
+    Calculate similarity between two text segments.
+    Prioritizes exact matches and penalizes excessive length differences.
+
+    Returns:
+        Similarity score between 0 and 1
+    """
+    return _normalized_similarity(normalize_text(text1), normalize_text(text2))
+
+
+class TestSegmentIndex:
+    """
+    Test segments normalized once, with a character trigram index.
+
+    The trigram posting lists restrict the exact (substring) pass to segments that
+    contain every trigram of the ground truth text. The similarity pass ranks the
+    candidates by an upper bound of text_similarity (character multiset overlap, as in
+    SequenceMatcher.quick_ratio, combined with the cheap containment/word score) and
+    only runs SequenceMatcher while a candidate can still beat the best score.
+    Segment words are interned in a Vocabulary, so word matching compares integers.
+    """
+
+    def __init__(self, segments: List[TranscriptSegment]):
+        self.texts = [normalize_text(segment.text) for segment in segments]
+        # Start times, only kept when every segment has one and they are in order
+        times = [segment.seconds for segment in segments]
+        if all(t is not None for t in times) and all(a <= b for a, b in zip(times, times[1:])):
+            self.times = times
+        else:
+            self.times = None
+        self.vocab = Vocabulary()
+        self.words = [self.vocab.encode_text(text) for text in self.texts]
+        self.char_counts = [Counter(text) for text in self.texts]
+        self.trigrams = {}
+        for i, text in enumerate(self.texts):
+            for gram in {text[k : k + 3] for k in range(len(text) - 2)}:
+                self.trigrams.setdefault(gram, []).append(i)
+
+    def __len__(self):
+        return len(self.texts)
+
+    def time_range(self, start: float, end: float) -> Tuple[int, int]:
+        """Index range [lo, hi) of the test segments starting within [start, end]."""
+        if self.times is None:
+            return 0, len(self.texts)
+        return bisect_left(self.times, start), bisect_right(self.times, end)
+
+    def seconds_per_word(self) -> Optional[float]:
+        """Average speaking rate of the test transcript, None without timestamps."""
+        if self.times is None or len(self.times) < 2:
+            return None
+        words = sum(len(words) for words in self.words[:-1])
+        return (self.times[-1] - self.times[0]) / words if words > 0 else None
+
+    def _exact_candidates(self, gt_normalized: str, lo: int, hi: int) -> Sequence[int]:
+        """Test segments in [lo, hi) containing every trigram of the ground truth text."""
+        if len(gt_normalized) < 3:
+            return range(lo, hi)
+        postings = []
+        for gram in {gt_normalized[k : k + 3] for k in range(len(gt_normalized) - 2)}:
+            if gram not in self.trigrams:
+                return ()
+            postings.append(self.trigrams[gram])
+        shortest = min(postings, key=len)
+        return shortest[bisect_left(shortest, lo) : bisect_left(shortest, hi)]
+
+    def exact_match(self, gt_normalized: str, lo: int = 0, hi: Optional[int] = None) -> Optional[int]:
+        """First test segment in [lo, hi) containing the normalized ground truth text."""
+        hi = len(self.texts) if hi is None else hi
+        for i in self._exact_candidates(gt_normalized, lo, hi):
+            if gt_normalized in self.texts[i]:
+                return i
+        return None
+
+    def exact_matches(self, gt_normalized: str, lo: int = 0, hi: Optional[int] = None) -> List[int]:
+        """All test segments in [lo, hi) containing the normalized ground truth text."""
+        hi = len(self.texts) if hi is None else hi
+        return [i for i in self._exact_candidates(gt_normalized, lo, hi) if gt_normalized in self.texts[i]]
+
+    def _candidates(
+        self, gt_normalized: str, similarity_threshold: float, lo: int, hi: int
+    ) -> List[Tuple[float, int, Optional[float]]]:
+        """
+        Test segments in [lo, hi) whose similarity upper bound reaches the threshold.
+
+        Returns:
+            (bound, index, shape score) tuples, in index order
+        """
+        # Words missing from the test segments get an id that matches none of theirs
+        gt_words = self.vocab.encode_text(gt_normalized, add=False)
+        gt_counts = Counter(gt_normalized)
+        gt_len = len(gt_normalized)
+
+        candidates = []
+        for i in range(lo, hi):
+            text = self.texts[i]
+            if not text:
+                continue
+            total = gt_len + len(text)
+            score = _shape_score(gt_normalized, gt_words, text, self.words[i])
+            floor = 0.0 if score is None else score
+            # Cheap bound first (length only), then the character multiset bound
+            bound = 2.0 * min(gt_len, len(text)) / total
+            if max(bound, floor) < similarity_threshold:
+                continue
+            counts = self.char_counts[i]
+            bound = 2.0 * sum(min(n, counts[c]) for c, n in gt_counts.items()) / total
+            bound = max(bound, floor)
+            if bound < similarity_threshold:
+                continue
+            candidates.append((bound, i, score))
+        return candidates
+
+    def _similarity(self, gt_normalized: str, i: int, score: Optional[float]) -> float:
+        similarity = SequenceMatcher(None, gt_normalized, self.texts[i]).ratio()
+        return similarity if score is None else max(similarity, score)
+
+    def best_match(
+        self, gt_normalized: str, similarity_threshold: float, lo: int = 0, hi: Optional[int] = None
+    ) -> Tuple[Optional[int], float]:
+        """
+        Test segment in [lo, hi) with the highest text_similarity (first one on ties),
+        as long as it reaches the threshold.
+        """
+        hi = len(self.texts) if hi is None else hi
+        if not gt_normalized:
+            return None, 0.0
+        ranked = sorted(
+            (-bound, i, score) for bound, i, score in self._candidates(gt_normalized, similarity_threshold, lo, hi)
+        )
 
-    return basic_similarity
+        best_match_idx = None
+        best_similarity = 0.0
+        for neg_bound, i, score in ranked:
+            if -neg_bound < best_similarity:
+                break
+            if -neg_bound == best_similarity and best_match_idx is not None and i > best_match_idx:
+                continue
+            similarity = self._similarity(gt_normalized, i, score)
+            if similarity >= similarity_threshold and (
+                similarity > best_similarity
+                or (similarity == best_similarity and best_match_idx is not None and i < best_match_idx)
+            ):
+                best_similarity = similarity
+                best_match_idx = i
+
+        return best_match_idx, best_similarity
+
+
+class SimilarityMatrix:
+    """
+    Sparse ground truth x test similarity matrix, for evaluating several similarity
+    thresholds with a single similarity computation.
+
+    For a given range of test segments, the best match of a GT segment does not
+    depend on the threshold: the threshold only decides whether it is accepted. Each
+    (GT segment, range) is therefore searched once, with the same bound-ordered
+    search as TestSegmentIndex.best_match at `min_threshold` (the lowest threshold of
+    interest), and its result is reused for every threshold. The similarities
+    computed by the searches are stored in `rows` (row i: test index -> similarity),
+    so overlapping ranges of the monotonic and time-window modes do not recompute
+    them. Exact (substring) matches are kept separately, since they take priority.
+    """
+
+    def __init__(
+        self,
+        ground_truth_segments: List[TranscriptSegment],
+        index: TestSegmentIndex,
+        min_threshold: float,
+    ):
+        self.index = index
+        self.min_threshold = min_threshold
+        self.gt_texts = [normalize_text(segment.text) for segment in ground_truth_segments]
+        self.rows: Dict[int, Dict[int, float]] = {}
+        self._candidates: Dict[int, Tuple[List[int], List[Tuple[float, int, Optional[float]]]]] = {}
+        self._covered: Dict[int, Tuple[int, int]] = {}
+        self._exact: Dict[int, List[int]] = {}
+        self._best: Dict[Tuple[int, int, int], Tuple[Optional[int], float]] = {}
+
+    @property
+    def nnz(self) -> int:
+        """Number of stored similarities."""
+        return sum(len(row) for row in self.rows.values())
+
+    def _candidates_in(self, i: int, lo: int, hi: int) -> List[Tuple[float, int, Optional[float]]]:
+        """Candidates of GT segment i in [lo, hi), see TestSegmentIndex._candidates."""
+        gt_normalized = self.gt_texts[i]
+        covered = self._covered.get(i)
+        if covered is None:
+            found = self.index._candidates(gt_normalized, self.min_threshold, lo, hi)
+            covered = (lo, hi)
+        else:
+            # Extend the covered range to the hull of both ranges
+            _, found = self._candidates[i]
+            if lo < covered[0]:
+                found = self.index._candidates(gt_normalized, self.min_threshold, lo, covered[0]) + found
+            if hi > covered[1]:
+                found = found + self.index._candidates(gt_normalized, self.min_threshold, covered[1], hi)
+            covered = (min(lo, covered[0]), max(hi, covered[1]))
+        positions = [j for _, j, _ in found]
+        self._candidates[i] = (positions, found)
+        self._covered[i] = covered
+        return found[bisect_left(positions, lo) : bisect_left(positions, hi)]
+
+    def _search(self, i: int, lo: int, hi: int) -> Tuple[Optional[int], float]:
+        """Best similarity match of GT segment i in [lo, hi) at min_threshold."""
+        key = (i, lo, hi)
+        if key in self._best:
+            return self._best[key]
+        gt_normalized = self.gt_texts[i]
+        row = self.rows.setdefault(i, {})
+        ranked = sorted((-bound, j, score) for bound, j, score in self._candidates_in(i, lo, hi))
+
+        best_match_idx = None
+        best_similarity = 0.0
+        for neg_bound, j, score in ranked:
+            if -neg_bound < best_similarity:
+                break
+            if -neg_bound == best_similarity and best_match_idx is not None and j > best_match_idx:
+                continue
+            similarity = row.get(j)
+            if similarity is None:
+                similarity = row[j] = self.index._similarity(gt_normalized, j, score)
+            if similarity >= self.min_threshold and (
+                similarity > best_similarity
+                or (similarity == best_similarity and best_match_idx is not None and j < best_match_idx)
+            ):
+                best_similarity = similarity
+                best_match_idx = j
+
+        self._best[key] = best_match_idx, best_similarity
+        return best_match_idx, best_similarity
+
+    def best_match(
+        self, i: int, similarity_threshold: float, lo: int = 0, hi: Optional[int] = None
+    ) -> Tuple[Optional[int], float]:
+        """
+        Same result as find_best_match_in_test for GT segment i over the test
+        segments [lo, hi), for any threshold not below `min_threshold`.
+        """
+        if similarity_threshold < self.min_threshold:
+            raise ValueError(
+                f"Threshold {similarity_threshold} is below the matrix minimum {self.min_threshold}"
+            )
+        hi = len(self.index) if hi is None else hi
+        gt_normalized = self.gt_texts[i]
+
+        exact = self._exact.get(i)
+        if exact is None:
+            exact = self._exact[i] = self.index.exact_matches(gt_normalized)
+        k = bisect_left(exact, lo)
+        if k < len(exact) and exact[k] < hi:
+            return exact[k], 1.0
+        if not gt_normalized:
+            return None, 0.0
+
+        best_match_idx, best_similarity = self._search(i, lo, hi)
+        if best_match_idx is None or best_similarity < similarity_threshold:
+            return None, 0.0
+        return best_match_idx, best_similarity
 
 
 def find_best_match_in_test(
     gt_segment: TranscriptSegment,
     test_candidates: List[TranscriptSegment],
     similarity_threshold: float = 0.5,
+    index: Optional[TestSegmentIndex] = None,
+    candidate_range: Optional[Tuple[int, int]] = None,
 ) -> Tuple[Optional[int], float]:
     """
     Find the best matching test segment for the given ground truth segment.
@@ -224,46 +537,72 @@ def find_best_match_in_test(
         gt_segment: Ground truth segment to find a match for
         test_candidates: List of test segments to search in
         similarity_threshold: Minimum similarity threshold
+        index: Prebuilt TestSegmentIndex over test_candidates, built on the fly if None
+        candidate_range: (lo, hi) to only search test_candidates[lo:hi], None for all
 
     Returns:
         Tuple of (best_match_index, similarity_score) or (None, 0.0)
     """
+    if index is None:
+        index = TestSegmentIndex(test_candidates)
+
+    lo, hi = candidate_range if candidate_range is not None else (0, len(index))
+
     # Normalize GT text for exact matching
     gt_normalized = normalize_text(gt_segment.text)
 
     # First pass: Look for exact matches
-    for i, test_candidate in enumerate(test_candidates):
-        test_normalized = normalize_text(test_candidate.text)
-        if gt_normalized in test_normalized:
-            return i, 1.0  # Perfect match
+    exact_idx = index.exact_match(gt_normalized, lo, hi)
+    if exact_idx is not None:
+        return exact_idx, 1.0  # Perfect match
 
     # Second pass: Use similarity matching if no exact match found
-    best_match_idx = None
-    best_similarity = 0.0
-
-    for i, test_candidate in enumerate(test_candidates):
-        similarity = text_similarity(gt_segment.text, test_candidate.text)
-
-        if similarity > best_similarity and similarity >= similarity_threshold:
-            best_similarity = similarity
-            best_match_idx = i
-
-    return best_match_idx, best_similarity
+    return index.best_match(gt_normalized, similarity_threshold, lo, hi)
 
 
 def compute_der_gt_based(
     ground_truth_segments: List[TranscriptSegment],
     test_segments: List[TranscriptSegment],
     verbose: bool = False,
+    alignment: str = "global",
+    window_behind: int = 5,
+    window_ahead: int = 20,
+    time_window: Optional[float] = None,
+    similarity_threshold: float = 0.5,
+    similarities: Optional[SimilarityMatrix] = None,
 ) -> Tuple[float, int, int, List[dict]]:
     """
     Compute Diarization Error Rate (DER) by matching GT segments to test segments.
     DER is calculated based on how many ground truth segments are correctly matched.
 
+    With alignment="global" every GT segment is searched in all test segments. With
+    alignment="monotonic" both transcripts are assumed to be in time order: a cursor
+    follows the last matched test segment and each GT segment is only searched from
+    `window_behind` segments before it to `window_ahead` segments after it, so a
+    repeated phrase cannot match a turn far away and the cost is near-linear.
+
+    With `time_window` set, the search is also restricted by the test [mm:ss]
+    timestamps: to within that many seconds of the GT segment's own timestamp when
+    it has one, otherwise to a look-ahead window from the time of the last matched
+    test segment to that many seconds after the expected time. The expected time
+    advances from the last match by the words of the GT segments read since then,
+    at the average speaking rate of the test transcript, since a GT turn often
+    spans several test segments; every GT segment left unmatched since the last
+    match widens the look-ahead by another `time_window`, so that a slower stretch
+    of speech cannot stop the search for good.
+
     Args:
         ground_truth_segments: List of ground truth segments
         test_segments: List of test segments
         verbose: Whether to print detailed matching information
+        alignment: "global" or "monotonic"
+        window_behind: Test segments searched before the cursor (monotonic only)
+        window_ahead: Test segments searched after the cursor (monotonic only)
+        time_window: Seconds around the GT timestamp, or after the expected time, to
+            search; None to disable
+        similarity_threshold: Minimum text similarity of a match without exact containment
+        similarities: SimilarityMatrix of these segments, to reuse the similarities
+            computed for other thresholds (see sweep_thresholds)
 
     Returns:
         Tuple of (DER, correct_count, total_gt_count, match_details)
@@ -284,9 +623,58 @@ def compute_der_gt_based(
             f"\nMatching {len(ground_truth_segments)} ground truth segments against {len(test_segments)} test segments..."
         )
 
+    if alignment not in ("global", "monotonic"):
+        raise ValueError(f"Unknown alignment mode: {alignment}")
+
+    # Normalize and index the test segments once for all ground truth segments
+    index = similarities.index if similarities is not None else TestSegmentIndex(test_segments)
+    cursor = 0
+    last_matched_time = None
+    # Words of the GT segments from the last matched one to the current one, and
+    # GT segments left unmatched since then
+    words_since_match = misses = 0
+    seconds_per_word = index.seconds_per_word() if time_window is not None else None
+
     for i, gt_segment in enumerate(ground_truth_segments):
-        # Find the best match from ALL test segments
-        best_match_idx, similarity = find_best_match_in_test(gt_segment, test_segments)
+        if alignment == "monotonic":
+            # Only search a window around the last matched test segment
+            candidate_range = (
+                max(0, cursor - window_behind),
+                min(len(test_segments), cursor + window_ahead + 1),
+            )
+        else:
+            # Find the best match from ALL test segments
+            candidate_range = None
+
+        time_range = None
+        if time_window is not None:
+            if gt_segment.seconds is not None:
+                time_range = (gt_segment.seconds - time_window, gt_segment.seconds + time_window)
+            elif last_matched_time is not None:
+                # Without a GT timestamp the turn can only come after the last match
+                expected_time = last_matched_time + words_since_match * (seconds_per_word or 0.0)
+                time_range = (last_matched_time, expected_time + time_window * (1 + misses))
+        if time_range is not None:
+            lo, hi = index.time_range(*time_range)
+            if candidate_range is not None:
+                lo, hi = max(lo, candidate_range[0]), min(hi, candidate_range[1])
+            candidate_range = (lo, max(lo, hi))
+
+        if similarities is not None:
+            lo, hi = candidate_range if candidate_range is not None else (0, len(index))
+            best_match_idx, similarity = similarities.best_match(i, similarity_threshold, lo, hi)
+        else:
+            best_match_idx, similarity = find_best_match_in_test(
+                gt_segment, test_segments, similarity_threshold, index, candidate_range
+            )
+        if best_match_idx is not None:
+            cursor = max(cursor, best_match_idx)
+            if test_segments[best_match_idx].seconds is not None:
+                last_matched_time = test_segments[best_match_idx].seconds
+                words_since_match = misses = 0
+        else:
+            misses += 1
+        words_since_match += len(gt_segment.text.split())
 
         match_info = {
             "gt_index": i,
@@ -338,50 +726,242 @@ def compute_der_gt_based(
     return der, correct_count, total_count, match_details
 
 
-def print_summary(
+def to_diarization_segments(
+    segments: List[TranscriptSegment], end_time: Optional[float] = None
+) -> List[dict]:
+    """
+    Convert timestamped segments to the diarization JSON format used by der.py.
+
+    Each segment ends where the next one starts; the last one ends at `end_time`,
+    or if not given after its words at the average speaking rate of the other
+    segments. Segments without a timestamp are skipped.
+
+    Returns:
+        List of {"start", "end", "speaker"} dicts
+    """
+    timed = [segment for segment in segments if segment.seconds is not None]
+    if end_time is None and timed:
+        words = sum(len(segment.text.split()) for segment in timed[:-1])
+        seconds_per_word = (timed[-1].seconds - timed[0].seconds) / words if words > 0 else 0.0
+        end_time = timed[-1].seconds + len(timed[-1].text.split()) * seconds_per_word
+    diarization = []
+    for segment, next_segment in zip(timed, timed[1:] + [None]):
+        if next_segment is not None:
+            end = next_segment.seconds
+        else:
+            end = end_time if end_time is not None else segment.seconds
+        diarization.append(
+            {"start": segment.seconds, "end": max(end, segment.seconds), "speaker": segment.speaker}
+        )
+    return diarization
+
+
+def summary_row(
     ground_truth_file: str,
     test_file: str,
     der: float,
     correct: int,
     total: int,
     match_details: List[dict],
-):
-    """Print summary of DER computation results."""
-    print("\n" + "=" * 70)
-    print("DIARIZATION ERROR RATE (DER) COMPUTATION RESULTS")
-    print("=" * 70)
-    print(f"Ground truth file: {ground_truth_file}")
-    print(f"Test file: {test_file}")
-    print(f"Total ground truth segments: {total}")
-    print(f"Correctly matched GT segments: {correct}")
-    print(f"Incorrectly matched GT segments: {total - correct}")
+) -> Dict[str, Any]:
+    """
+    Build the structured result row of a DER computation.
 
+    Returns:
+        Dict with the file paths, DER, correct and total GT segment counts, the number
+        of distinct test segments used and the per-speaker accuracy (based on ground
+        truth speakers, in order of first appearance)
+    """
     # Count unique test segments used
     used_test_segments = set()
     for match in match_details:
         if match["test_index"] is not None:
             used_test_segments.add(match["test_index"])
 
-    print(f"Test segments used in matching: {len(used_test_segments)}")
-    print(f"GT Accuracy: {correct/total*100:.2f}%" if total > 0 else "GT Accuracy: N/A")
-    print(f"DER: {der:.4f} ({der*100:.2f}%)")
-
     # Speaker-wise breakdown (based on ground truth speakers)
     speaker_stats = {}
     for match in match_details:
         gt_speaker = match["gt_segment"].speaker
         if gt_speaker not in speaker_stats:
-            speaker_stats[gt_speaker] = {"total": 0, "correct": 0}
+            speaker_stats[gt_speaker] = {"correct": 0, "total": 0}
         speaker_stats[gt_speaker]["total"] += 1
         if match["correct"]:
             speaker_stats[gt_speaker]["correct"] += 1
 
-    print("\nSpeaker-wise GT accuracy:")
-    for speaker, stats in speaker_stats.items():
+    return {
+        "metric": "der-gemini",
+        "ground_truth_file": ground_truth_file,
+        "test_file": test_file,
+        "DER": der,
+        "correct": correct,
+        "total": total,
+        "test_segments_used": len(used_test_segments),
+        "speaker_accuracy": speaker_stats,
+    }
+
+
+def render_summary(row: Dict[str, Any]) -> str:
+    """Format the summary of a row from summary_row."""
+    der, correct, total = row["DER"], row["correct"], row["total"]
+    out = io.StringIO()
+    print("\n" + "=" * 70, file=out)
+    print("DIARIZATION ERROR RATE (DER) COMPUTATION RESULTS", file=out)
+    print("=" * 70, file=out)
+    print(f"Ground truth file: {row['ground_truth_file']}", file=out)
+    print(f"Test file: {row['test_file']}", file=out)
+    print(f"Total ground truth segments: {total}", file=out)
+    print(f"Correctly matched GT segments: {correct}", file=out)
+    print(f"Incorrectly matched GT segments: {total - correct}", file=out)
+    print(f"Test segments used in matching: {row['test_segments_used']}", file=out)
+    print(f"GT Accuracy: {correct/total*100:.2f}%" if total > 0 else "GT Accuracy: N/A", file=out)
+    print(f"DER: {der:.4f} ({der*100:.2f}%)", file=out)
+
+    print("\nSpeaker-wise GT accuracy:", file=out)
+    for speaker, stats in row["speaker_accuracy"].items():
         accuracy = stats["correct"] / stats["total"] * 100 if stats["total"] > 0 else 0
-        print(f"  {speaker}: {stats['correct']}/{stats['total']} ({accuracy:.1f}%)")
+        print(f"  {speaker}: {stats['correct']}/{stats['total']} ({accuracy:.1f}%)", file=out)
+
+    print("=" * 70, file=out)
+    return out.getvalue()
+
+
+def print_summary(
+    ground_truth_file: str,
+    test_file: str,
+    der: float,
+    correct: int,
+    total: int,
+    match_details: List[dict],
+    file=None,
+):
+    """Print summary of DER computation results (to `file`, default stdout)."""
+    row = summary_row(ground_truth_file, test_file, der, correct, total, match_details)
+    print(render_summary(row), end="", file=file)
+
+
+def cache_version() -> str:
+    """
+    Code version of the cache keys: the source of this module and of the modules its
+    results depend on (text normalization and word interning).
+    """
+    return code_version(sys.modules[__name__], text_normalization, vocabulary)
+
+
+def der_row(ground_truth_file: str, test_file: str, cache: Optional[ResultCache] = None, **options) -> Dict[str, Any]:
+    """
+    Compute the DER of a file pair as a structured result row.
+
+    Args:
+        ground_truth_file: Path to ground truth transcription file
+        test_file: Path to test transcription file
+        cache: Result cache, reused when file contents, options and code are unchanged
+        **options: Matching options passed to compute_der_gt_based
+
+    Returns:
+        The row, see summary_row
+    """
+
+    def compute() -> Dict[str, Any]:
+        ground_truth_segments = parse_ground_truth_file(ground_truth_file)
+        test_segments = parse_test_file(test_file)
+
+        if not ground_truth_segments:
+            print("Error: No segments found in ground truth file")
+            sys.exit(1)
+
+        if not test_segments:
+            print("Error: No segments found in test file")
+            sys.exit(1)
+
+        der, correct, total, match_details = compute_der_gt_based(
+            ground_truth_segments, test_segments, **options
+        )
+        return summary_row(ground_truth_file, test_file, der, correct, total, match_details)
 
-    print("=" * 70)
+    files = {"ground_truth_file": ground_truth_file, "test_file": test_file}
+    return cached_row(cache, "der-gemini", options, cache_version, files, compute)
+
+
+def parse_thresholds(spec: str) -> List[float]:
+    """
+    Parse a threshold grid: comma-separated values ("0.3,0.5,0.7") or an inclusive
+    "start:stop:step" range ("0.1:0.9:0.05").
+    """
+    if ":" not in spec:
+        return sorted({float(value) for value in spec.split(",") if value.strip()})
+    start, stop, step = (float(value) for value in spec.split(":"))
+    if step <= 0:
+        raise ValueError("The threshold step must be positive")
+    count = int(round((stop - start) / step)) + 1
+    return [round(start + k * step, 10) for k in range(count) if start + k * step <= stop + 1e-9]
+
+
+def sweep_thresholds(
+    ground_truth_file: str, test_file: str, thresholds: List[float], **options
+) -> Tuple[List[Dict[str, Any]], SimilarityMatrix]:
+    """
+    Compute the DER of a file pair for a grid of similarity thresholds.
+
+    The similarities are computed once, at the lowest threshold, into a
+    SimilarityMatrix; every threshold then replays the matching from the matrix
+    without calling SequenceMatcher again.
+
+    Args:
+        ground_truth_file: Path to ground truth transcription file
+        test_file: Path to test transcription file
+        thresholds: Similarity thresholds
+        **options: Other matching options passed to compute_der_gt_based
+
+    Returns:
+        Tuple of (one row per threshold in increasing order, see summary_row, with
+        "similarity_threshold" and the number of "matched" GT segments; the matrix)
+    """
+    ground_truth_segments = parse_ground_truth_file(ground_truth_file)
+    test_segments = parse_test_file(test_file)
+    thresholds = sorted(thresholds)
+    matrix = SimilarityMatrix(ground_truth_segments, TestSegmentIndex(test_segments), thresholds[0])
+
+    rows = []
+    for threshold in thresholds:
+        der, correct, total, match_details = compute_der_gt_based(
+            ground_truth_segments,
+            test_segments,
+            similarity_threshold=threshold,
+            similarities=matrix,
+            **options,
+        )
+        row = summary_row(ground_truth_file, test_file, der, correct, total, match_details)
+        row["similarity_threshold"] = threshold
+        row["matched"] = sum(1 for match in match_details if match["test_index"] is not None)
+        rows.append(row)
+    return rows, matrix
+
+
+def format_sweep(rows: List[Dict[str, Any]]) -> str:
+    """Format the rows of sweep_thresholds as a table, one line per threshold."""
+    speakers = []
+    for row in rows:
+        for speaker in row["speaker_accuracy"]:
+            if speaker not in speakers:
+                speakers.append(speaker)
+    width = max([10, *(len(speaker) for speaker in speakers)])
+
+    header = f"{'Threshold':>9}  {'DER':>7}  {'Correct':>9}  {'Matched':>7}  {'Used':>5}"
+    header += "".join(f"  {speaker:>{width}}" for speaker in speakers)
+    lines = [header]
+    for row in rows:
+        line = (
+            f"{row['similarity_threshold']:>9.3f}  {row['DER']:>7.4f}  "
+            f"{row['correct']:>4}/{row['total']:<4}  {row['matched']:>7}  {row['test_segments_used']:>5}"
+        )
+        for speaker in speakers:
+            stats = row["speaker_accuracy"].get(speaker)
+            accuracy = (
+                f"{stats['correct'] / stats['total'] * 100:.1f}%" if stats and stats["total"] > 0 else "N/A"
+            )
+            line += f"  {accuracy:>{width}}"
+        lines.append(line)
+    return "\n".join(lines) + "\n"
 
 
 def main():
@@ -413,8 +993,62 @@ Examples:
     parser.add_argument(
         "--similarity-threshold",
         type=float,
-        default=0.3,
-        help="Minimum text similarity threshold for matching (default: 0.3)",
+        default=0.5,
+        help="Minimum text similarity threshold for matching (default: 0.5)",
+    )
+    parser.add_argument(
+        "--sweep",
+        nargs="?",
+        const=DEFAULT_SWEEP,
+        metavar="GRID",
+        help="Compute the DER for a grid of similarity thresholds instead, as "
+        "'start:stop:step' or comma-separated values (default grid: "
+        f"{DEFAULT_SWEEP}); the similarities are computed only once",
+    )
+    parser.add_argument(
+        "--sweep-output",
+        metavar="PATH",
+        help="Also write the sweep curve as JSON Lines, one row per threshold",
+    )
+
+    parser.add_argument(
+        "--alignment",
+        choices=["global", "monotonic"],
+        default="global",
+        help="'global' searches all test segments for every GT segment, 'monotonic' "
+        "moves a cursor forward through the test segments (default: global)",
+    )
+    parser.add_argument(
+        "--window-behind",
+        type=int,
+        default=5,
+        help="Test segments searched before the cursor in monotonic mode (default: 5)",
+    )
+    parser.add_argument(
+        "--window-ahead",
+        type=int,
+        default=20,
+        help="Test segments searched after the cursor in monotonic mode (default: 20)",
+    )
+
+    parser.add_argument(
+        "--time-window",
+        type=float,
+        default=None,
+        help="Only match test segments whose [mm:ss] timestamp is within this many "
+        "seconds of the expected position (default: disabled)",
+    )
+    parser.add_argument(
+        "--export-json",
+        metavar="PATH",
+        help="Also write the test segments as diarization JSON (start/end/speaker) for der.py",
+    )
+    parser.add_argument(
+        "--end-time",
+        type=float,
+        default=None,
+        help="End of the recording in seconds, where the last exported segment ends "
+        "(default: estimated from the speaking rate)",
     )
 
     args = parser.parse_args()
@@ -436,11 +1070,49 @@ Examples:
         print("Error: No segments found in test file")
         sys.exit(1)
 
+    matching = {
+        "alignment": args.alignment,
+        "window_behind": args.window_behind,
+        "window_ahead": args.window_ahead,
+        "time_window": args.time_window,
+    }
+
+    if args.sweep:
+        try:
+            thresholds = parse_thresholds(args.sweep)
+        except ValueError as e:
+            print(f"Error: invalid threshold grid '{args.sweep}': {e}")
+            sys.exit(1)
+        if not thresholds:
+            print("Error: empty threshold grid")
+            sys.exit(1)
+        rows, matrix = sweep_thresholds(args.ground_truth, args.test_file, thresholds, **matching)
+        print(f"Ground truth file: {args.ground_truth}")
+        print(f"Test file: {args.test_file}")
+        print(
+            f"Similarities stored: {matrix.nnz} of "
+            f"{len(ground_truth_segments)}x{len(test_segments)} GT x test pairs"
+        )
+        print(format_sweep(rows), end="")
+        if args.sweep_output:
+            with ResultsWriter(args.sweep_output) as results:
+                for row in rows:
+                    results.add(row)
+        return
+
     # Compute DER
     der, correct, total, match_details = compute_der_gt_based(
-        ground_truth_segments, test_segments, args.verbose
+        ground_truth_segments,
+        test_segments,
+        args.verbose,
+        similarity_threshold=args.similarity_threshold,
+        **matching,
     )
 
+    if args.export_json:
+        with open(args.export_json, "w") as f:
+            json.dump(to_diarization_segments(test_segments, args.end_time), f, indent=2)
+
     # Print summary
     print_summary(args.ground_truth, args.test_file, der, correct, total, match_details)
 
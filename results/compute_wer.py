@@ -1,161 +1,1221 @@
 # calcola_wer.py
-import re
+import io
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from math import floor, isqrt
 
+import text_normalization
+import vocabulary
+from result_cache import ResultCache, code_version
+from text_normalization import WER_RULES, normalize
+from vocabulary import Vocabulary, as_numpy
 
-def normalize_text(s):
-    s = s.lower()
-    s = re.sub(r"\[.*?\]", " ", s)  # rimuovi timestamp
-    s = re.sub(r".*\:", " ", s)  # rimuovi timestamp
-    s = re.sub(r"[^a-zàèéìòù0-9\'\s]", " ", s)  # lascia lettere, numeri, apostrofo
-    s = re.sub(r"\s+", " ", s).strip()
-    return s
+try:
+    import numpy as np
+except ImportError:  # senza NumPy si usa il kernel in puro Python
+    np = None
 
 
-def wer_stats(ref, hyp):
-    r = ref.split()
-    h = hyp.split()
-    n = len(r)
-    # matrice DP
-    D = [[0] * (len(h) + 1) for _ in range(len(r) + 1)]
-    for i in range(1, len(r) + 1):
-        D[i][0] = i
-    for j in range(1, len(h) + 1):
-        D[0][j] = j
-    for i in range(1, len(r) + 1):
-        for j in range(1, len(h) + 1):
-            if r[i - 1] == h[j - 1]:
-                D[i][j] = D[i - 1][j - 1]
-            else:
-                D[i][j] = min(D[i - 1][j] + 1, D[i][j - 1] + 1, D[i - 1][j - 1] + 1)
-    # backtrace
-    i, j = len(r), len(h)
-    subs = dels = ins = 0
-    while i > 0 or j > 0:
-        if i > 0 and j > 0 and r[i - 1] == h[j - 1]:
+def normalize_text(s, rules=WER_RULES):
+    """
+    Normalizza una trascrizione per il WER: minuscole, senza timestamp ed etichette
+    dei parlanti, solo lettere, numeri e apostrofi (vedi text_normalization.WER_RULES).
+    """
+    return normalize(s, rules)
+
+
+def wer_rules(normalization=None):
+    """
+    Regole di normalizzazione del WER, con le modifiche in `normalization`
+    (dizionario di campi di NormalizationRules, es. {"fold_accents": True}).
+    """
+    return WER_RULES.with_options(**normalization) if normalization else WER_RULES
+
+
+# Oltre questo numero di celle (|ref|+1)*(|hyp|+1) l'allineamento passa
+# automaticamente alla modalita' a memoria ridotta
+LINEAR_MEMORY_THRESHOLD = 4_000_000
+
+
+def _dp_row(prev, i, ri, h, ncols):
+    """
+    Calcola la riga i della matrice DP (colonne 0..ncols-1) a partire dalla riga i-1.
+    """
+    row = [i] * ncols
+    for j in range(1, ncols):
+        if ri == h[j - 1]:
+            row[j] = prev[j - 1]
+        else:
+            row[j] = min(prev[j] + 1, row[j - 1] + 1, prev[j - 1] + 1)
+    return row
+
+
+def _dp_block(first, i0, r, h, ncols):
+    """
+    Calcola le righe i0+1..i0+len(r) della matrice DP a partire dalla riga i0.
+
+    `r` contiene solo le parole di riferimento del blocco. Restituisce la lista
+    delle righe, inclusa `first`, limitate alle prime `ncols` colonne.
+    """
+    rows = [first[:ncols]]
+    for t, ri in enumerate(r, start=i0 + 1):
+        rows.append(_dp_row(rows[-1], t, ri, h, ncols))
+    return rows
+
+
+def _dp_block_np(first, i0, r_ids, h_ids, ncols):
+    """
+    Versione NumPy di _dp_block su token codificati come interi (int32).
+
+    Lavora sulla matrice traslata E[i][j] = D[i][j] - j, in cui la ricorrenza diventa
+    E[i][j] = min(E[i-1][j-1] - uguale, E[i-1][j] + 1, E[i][j-1]): sostituzione e
+    cancellazione sono vettoriali sulla riga, le inserzioni un minimo cumulativo.
+    Restituisce un array (len(r_ids)+1, ncols) in forma non traslata.
+    """
+    offsets = np.arange(ncols, dtype=np.int32)
+    E = np.empty((len(r_ids) + 1, ncols), dtype=np.int32)
+    np.subtract(first[:ncols], offsets, out=E[0])
+    E[1:, 0] = np.arange(i0 + 1, i0 + len(r_ids) + 1)
+    eq = (r_ids[:, None] == h_ids[None, : ncols - 1]).astype(np.int32)
+    tmp = np.empty(ncols - 1, dtype=np.int32)
+    # viste precalcolate: nel ciclo restano solo quattro ufunc per riga
+    rows, heads, tails = list(E), list(E[:, :-1]), list(E[:, 1:])
+    for t in range(1, len(r_ids) + 1):
+        tail = tails[t]
+        np.subtract(heads[t - 1], eq[t - 1], out=tail)
+        np.add(tails[t - 1], 1, out=tmp)
+        np.minimum(tail, tmp, out=tail)
+        np.minimum.accumulate(rows[t], out=rows[t])
+    E += offsets
+    return E
+
+
+def _backtrace(r, h, rows, base, i, j, ops):
+    """
+    Backtrace dalla cella (i, j) fino alla riga `base`.
+
+    rows[k] contiene la riga base+k della matrice DP (almeno fino alla colonna j).
+    Aggiunge le operazioni a `ops` in ordine inverso e restituisce la colonna raggiunta.
+    """
+    while i > base:
+        row, prev = rows[i - base], rows[i - 1 - base]
+        if j > 0 and r[i - 1] == h[j - 1]:
+            ops.append(("=", r[i - 1], h[j - 1]))
+            i -= 1
+            j -= 1
+        elif j > 0 and row[j] == prev[j - 1] + 1:
+            ops.append(("S", r[i - 1], h[j - 1]))
             i -= 1
             j -= 1
+        elif row[j] == prev[j] + 1:
+            ops.append(("D", r[i - 1], None))
+            i -= 1
+        elif j > 0 and row[j] == row[j - 1] + 1:
+            ops.append(("I", None, h[j - 1]))
+            j -= 1
         else:
-            if i > 0 and j > 0 and D[i][j] == D[i - 1][j - 1] + 1:
-                subs += 1
-                i -= 1
-                j -= 1
-            elif i > 0 and D[i][j] == D[i - 1][j] + 1:
-                dels += 1
-                i -= 1
-            elif j > 0 and D[i][j] == D[i][j - 1] + 1:
-                ins += 1
-                j -= 1
-            else:
-                # sicurezza
-                if i > 0:
-                    dels += 1
-                    i -= 1
-                elif j > 0:
-                    ins += 1
-                    j -= 1
+            # sicurezza
+            ops.append(("D", r[i - 1], None))
+            i -= 1
+    return j
+
+
+def _align_words_full(r, h, use_numpy):
+    # matrice DP completa
+    if use_numpy:
+        r_ids, h_ids = as_numpy(r), as_numpy(h)
+        D = _dp_block_np(np.arange(len(h) + 1), 0, r_ids, h_ids, len(h) + 1)
+    else:
+        D = _dp_block(list(range(len(h) + 1)), 0, r, h, len(h) + 1)
+
+    ops = []
+    j = _backtrace(r, h, D, 0, len(r), len(h), ops)
+    ops.extend(("I", None, h[k]) for k in range(j - 1, -1, -1))
+    ops.reverse()
+    return ops
+
+
+def _align_words_linear(r, h, use_numpy):
+    """
+    Allineamento a memoria ridotta con checkpoint di righe.
+
+    Conserva solo una riga ogni k (k ~ sqrt(|ref|)) come array compatto; durante il
+    backtrace ricalcola un blocco di k righe alla volta, limitato alle colonne
+    ancora raggiungibili. Memoria O(|hyp| * sqrt(|ref|)) invece di O(|ref| * |hyp|),
+    con lo stesso percorso (e quindi le stesse S/D/I) della matrice completa.
+    """
+    n, m = len(r), len(h)
+    k = max(1, isqrt(n))
+
+    if use_numpy:
+        r_ids, h_ids = as_numpy(r), as_numpy(h)
+
+        def block(first, i0, i1, ncols):
+            return _dp_block_np(first, i0, r_ids[i0:i1], h_ids, ncols)
+
+        row = np.arange(m + 1, dtype=np.int32)
+    else:
+
+        def block(first, i0, i1, ncols):
+            return _dp_block(first, i0, r[i0:i1], h, ncols)
+
+        row = array("i", range(m + 1))
+
+    checkpoints = {}
+    for base in range(0, n, k):
+        checkpoints[base] = row
+        row = block(row, base, min(base + k, n), m + 1)[-1]
+        # Copia compatta: una vista terrebbe in memoria l'intero blocco di k righe
+        row = row.copy() if use_numpy else array("i", row)
+
+    ops = []
+    i, j = n, m
+    while i > 0:
+        base = (i - 1) // k * k
+        rows = block(checkpoints[base], base, i, j + 1)
+        j = _backtrace(r, h, rows, base, i, j, ops)
+        i = base
+    ops.extend(("I", None, h[t]) for t in range(j - 1, -1, -1))
+    ops.reverse()
+    return ops
+
+
+def align_ids(r_ids, h_ids, linear_threshold=None, kernel=None):
+    """
+    Allinea due sequenze di id di parole (array('i'), vedi vocabulary.Vocabulary)
+    con un'unica matrice DP e un unico backtrace.
+
+    Restituisce la lista delle operazioni come tuple (op, id_ref, id_hyp),
+    con op in "=" (uguale), "S" (sostituzione), "D" (cancellazione), "I" (inserzione).
+    Se la matrice supera `linear_threshold` celle (default LINEAR_MEMORY_THRESHOLD)
+    viene usato l'allineamento a memoria ridotta, con risultato identico.
+    `kernel` sceglie il calcolo delle righe DP: "numpy" (default se disponibile,
+    lavora su una vista degli array senza copiarli) oppure "python".
+    """
+    if linear_threshold is None:
+        linear_threshold = LINEAR_MEMORY_THRESHOLD
+    if kernel is None:
+        kernel = "python" if np is None else "numpy"
+    if kernel == "numpy" and np is None:
+        raise ImportError("Il kernel 'numpy' richiede NumPy installato")
+    use_numpy = kernel == "numpy"
+    if (len(r_ids) + 1) * (len(h_ids) + 1) > linear_threshold:
+        return _align_words_linear(r_ids, h_ids, use_numpy)
+    return _align_words_full(r_ids, h_ids, use_numpy)
+
+
+def decode_ops(ops, vocab):
+    """
+    Riporta alle parole le operazioni di align_ids.
+    """
+    words = vocab.words
+    return [
+        (op, None if r_id is None else words[r_id], None if h_id is None else words[h_id])
+        for op, r_id, h_id in ops
+    ]
+
+
+def align_words(r, h, linear_threshold=None, kernel=None, vocab=None):
+    """
+    Allinea due liste di parole (vedi align_ids).
+
+    Le parole vengono codificate come interi con `vocab` (se None, un vocabolario
+    creato per la sola coppia). Restituisce le operazioni come tuple
+    (op, parola_ref, parola_hyp).
+    """
+    if vocab is None:
+        vocab = Vocabulary()
+    ops = align_ids(vocab.encode(r), vocab.encode(h), linear_threshold, kernel)
+    return decode_ops(ops, vocab)
+
+
+def stats_from_ops(ops, n):
+    """
+    Conta sostituzioni, cancellazioni e inserzioni di un allineamento.
+    """
+    subs = dels = ins = 0
+    for op, _, _ in ops:
+        if op == "S":
+            subs += 1
+        elif op == "D":
+            dels += 1
+        elif op == "I":
+            ins += 1
     wer = (subs + dels + ins) / n if n > 0 else float("inf")
     return {"S": subs, "D": dels, "I": ins, "N": n, "WER": wer}
 
 
-def align_texts(ref, hyp):
+def format_alignment(ops):
     """
-    Allinea i testi di riferimento e ipotesi, restituendo le versioni con evidenziazioni.
+    Restituisce le versioni di riferimento e ipotesi con evidenziazioni.
     """
-    r = ref.split()
-    h = hyp.split()
-
-    # matrice DP per tracciare il percorso ottimale
-    D = [[0] * (len(h) + 1) for _ in range(len(r) + 1)]
-    for i in range(1, len(r) + 1):
-        D[i][0] = i
-    for j in range(1, len(h) + 1):
-        D[0][j] = j
-    for i in range(1, len(r) + 1):
-        for j in range(1, len(h) + 1):
-            if r[i - 1] == h[j - 1]:
-                D[i][j] = D[i - 1][j - 1]
-            else:
-                D[i][j] = min(D[i - 1][j] + 1, D[i][j - 1] + 1, D[i - 1][j - 1] + 1)
-
-    # backtrace per ricostruire l'allineamento
-    i, j = len(r), len(h)
     ref_aligned = []
     hyp_aligned = []
-
-    while i > 0 or j > 0:
-        if i > 0 and j > 0 and r[i - 1] == h[j - 1]:
+    for op, r_word, h_word in ops:
+        if op == "=":
             # parole uguali
-            ref_aligned.insert(0, r[i - 1])
-            hyp_aligned.insert(0, h[j - 1])
-            i -= 1
-            j -= 1
-        elif i > 0 and j > 0 and D[i][j] == D[i - 1][j - 1] + 1:
+            ref_aligned.append(r_word)
+            hyp_aligned.append(h_word)
+        elif op == "S":
             # sostituzione
-            ref_aligned.insert(0, r[i - 1])
-            hyp_aligned.insert(0, f"**{h[j - 1]}**")
-            i -= 1
-            j -= 1
-        elif i > 0 and D[i][j] == D[i - 1][j] + 1:
+            ref_aligned.append(r_word)
+            hyp_aligned.append(f"**{h_word}**")
+        elif op == "D":
             # cancellazione (parola nel riferimento ma non nell'ipotesi)
-            # La parola dovrebbe essere nell'ipotesi ma manca
-            ref_aligned.insert(0, r[i - 1])
-            hyp_aligned.insert(0, f"**[MISSING: {r[i - 1]}]**")
+            ref_aligned.append(r_word)
+            hyp_aligned.append(f"**[MISSING: {r_word}]**")
+        else:
+            # inserzione (parola nell'ipotesi ma non nel riferimento),
+            # non compare nel riferimento allineato
+            hyp_aligned.append(f"**[EXTRA: {h_word}]**")
+    return " ".join(ref_aligned), " ".join(hyp_aligned)
+
+
+def wer_align(ref, hyp, linear_threshold=None, kernel=None, anchored=False, vocab=None):
+    """
+    Calcola statistiche WER e allineamento evidenziato in un solo passaggio.
+
+    Con `anchored` usa align_words_anchored e aggiunge alle statistiche la chiave
+    "optimal" (True se il costo e' certamente quello minimo). `vocab` e' il
+    vocabolario usato per codificare le parole (vedi align_words).
+
+    Returns:
+        Tupla (stats, ref_aligned, hyp_aligned)
+    """
+    r = ref.split()
+    if anchored:
+        ops, optimal = align_words_anchored(
+            r, hyp.split(), linear_threshold=linear_threshold, kernel=kernel, vocab=vocab
+        )
+    else:
+        ops = align_words(r, hyp.split(), linear_threshold, kernel, vocab)
+    ref_aligned, hyp_aligned = format_alignment(ops)
+    stats = stats_from_ops(ops, len(r))
+    if anchored:
+        stats["optimal"] = optimal
+    return stats, ref_aligned, hyp_aligned
+
+
+def wer_stats(ref, hyp, linear_threshold=None, kernel=None):
+    r = ref.split()
+    return stats_from_ops(align_words(r, hyp.split(), linear_threshold, kernel), len(r))
+
+
+def align_texts(ref, hyp, linear_threshold=None, kernel=None):
+    """
+    Allinea i testi di riferimento e ipotesi, restituendo le versioni con evidenziazioni.
+    """
+    return format_alignment(
+        align_words(ref.split(), hyp.split(), linear_threshold, kernel)
+    )
+
+
+# Lunghezza degli n-grammi usati come ancore dall'allineamento segmentato
+ANCHOR_NGRAM = 4
+
+
+def _unique_ngrams(tokens, n):
+    """
+    Restituisce {n-gramma: posizione} per gli n-grammi che compaiono una sola volta.
+    """
+    seen = {}
+    repeated = set()
+    for k in range(len(tokens) - n + 1):
+        gram = tuple(tokens[k:k + n])
+        if gram in seen:
+            repeated.add(gram)
+        else:
+            seen[gram] = k
+    for gram in repeated:
+        del seen[gram]
+    return seen
+
+
+def find_anchors(r, h, n=ANCHOR_NGRAM):
+    """
+    Trova le ancore tra due liste di parole, come nel patience diff.
+
+    Le ancore sono gli n-grammi che compaiono una sola volta sia in `r` sia in `h`;
+    tra queste si tiene la piu' lunga sequenza crescente in entrambi i testi
+    (LIS in O(k log k)), senza sovrapposizioni, estendendo poi ogni ancora alle
+    parole uguali adiacenti.
+
+    Returns:
+        Lista di tuple (i, j, lunghezza) ordinate, con r[i:i+lunghezza] == h[j:j+lunghezza]
+    """
+    ref_grams = _unique_ngrams(r, n)
+    pairs = sorted(
+        (ref_grams[gram], j) for gram, j in _unique_ngrams(h, n).items() if gram in ref_grams
+    )
+
+    # LIS sulle posizioni in h (le coppie sono gia' ordinate per posizione in r)
+    tails = []  # tails[k] = indice della coppia che chiude la sequenza lunga k+1
+    prev = [-1] * len(pairs)
+    tail_js = []
+    for idx, (_, j) in enumerate(pairs):
+        k = bisect_left(tail_js, j)
+        if k > 0:
+            prev[idx] = tails[k - 1]
+        if k == len(tails):
+            tails.append(idx)
+            tail_js.append(j)
+        else:
+            tails[k] = idx
+            tail_js[k] = j
+    chain = []
+    idx = tails[-1] if tails else -1
+    while idx >= 0:
+        chain.append(pairs[idx])
+        idx = prev[idx]
+    chain.reverse()
+
+    anchors = []
+    end_i = end_j = 0
+    for i, j in chain:
+        if i < end_i or j < end_j:
+            continue  # si sovrappone all'ancora precedente
+        # Estensione all'indietro fino all'ancora precedente
+        while i > end_i and j > end_j and r[i - 1] == h[j - 1]:
             i -= 1
-        elif j > 0 and D[i][j] == D[i][j - 1] + 1:
-            # inserzione (parola nell'ipotesi ma non nel riferimento)
-            # La parola è stata aggiunta erroneamente nell'ipotesi
-            ref_aligned.insert(0, "")
-            hyp_aligned.insert(0, f"**[EXTRA: {h[j - 1]}]**")
             j -= 1
-        else:
-            # caso di sicurezza
-            if i > 0:
-                ref_aligned.insert(0, r[i - 1])
-                hyp_aligned.insert(0, f"**[MISSING: {r[i - 1]}]**")
-                i -= 1
-            elif j > 0:
-                ref_aligned.insert(0, "")
-                hyp_aligned.insert(0, f"**[EXTRA: {h[j - 1]}]**")
-                j -= 1
+            if anchors and i == end_i:
+                break
+        length = n
+        while i + length < len(r) and j + length < len(h) and r[i + length] == h[j + length]:
+            length += 1
+        if anchors and anchors[-1][0] + anchors[-1][2] == i and anchors[-1][1] + anchors[-1][2] == j:
+            pi, pj, plen = anchors.pop()
+            i, j, length = pi, pj, plen + length
+        anchors.append((i, j, length))
+        end_i, end_j = i + length, j + length
+    return anchors
+
 
-    # filtra elementi vuoti per le inserzioni
-    ref_clean = [word for word in ref_aligned if word != ""]
+def edit_distance(a, b):
+    """
+    Distanza di edit (solo il valore) tra due sequenze, con l'algoritmo bit-parallelo
+    di Myers/Hyyro: ogni colonna della DP e' un intero Python di len(a) bit, per cui
+    il costo e' O(len(a) * len(b) / 64) operazioni macchina invece di len(a) * len(b)
+    operazioni in Python.
+    """
+    if not a:
+        return len(b)
+    peq = {}
+    for i, tok in enumerate(a):
+        peq[tok] = peq.get(tok, 0) | (1 << i)
+    mask = (1 << len(a)) - 1
+    high = 1 << (len(a) - 1)
+    pv = mask
+    mv = 0
+    score = len(a)
+    for tok in b:
+        eq = peq.get(tok, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | ~(xh | pv)
+        mh = pv & xh
+        if ph & high:
+            score += 1
+        elif mh & high:
+            score -= 1
+        # La prima riga della DP vale j: la differenza orizzontale in cima e' +1
+        ph = (ph << 1) | 1
+        mh <<= 1
+        pv = (mh | ~(xv | ph)) & mask
+        mv = ph & xv & mask
+    return score
 
-    return " ".join(ref_clean), " ".join(hyp_aligned)
+
+def edit_distance_lower_bound(r, h):
+    """
+    Limite inferiore della distanza di edit: max(|r|, |h|) meno il numero di parole
+    in comune (intersezione dei multiinsiemi), che limita dall'alto le corrispondenze.
+    """
+    common = Counter(r) & Counter(h)
+    return max(len(r), len(h)) - sum(common.values())
 
 
-def compute_from_files(ref_file, hyp_file):
+# Valore "infinito" delle celle fuori dalla banda
+_BAND_INF = 1 << 40
+
+
+def _band_limits(n, m, max_edits):
+    """
+    Diagonali d = j - i della banda di Ukkonen: un percorso che passa per la
+    diagonale d costa almeno |d| + |(m - n) - d|, quindi con al piu' `max_edits`
+    modifiche d resta in [min(0, m-n) - s, max(0, m-n) + s], s = (k - |m-n|) // 2.
+    """
+    delta = m - n
+    slack = (max_edits - abs(delta)) // 2
+    return min(0, delta) - slack, max(0, delta) + slack
+
+
+def _bounded_python(a, b, max_edits):
+    n, m = len(a), len(b)
+    dmin, dmax = _band_limits(n, m, max_edits)
+    delta = m - n
+    inf = _BAND_INF
+    # prev[d - dmin] = D[i-1][i-1+d]
+    prev = [d if 0 <= d <= m else inf for d in range(dmin, dmax + 1)]
+    width = len(prev)
+    for i in range(1, n + 1):
+        ai = a[i - 1]
+        cur = [inf] * width
+        best = inf
+        for t in range(max(0, -i - dmin), min(width, m - i - dmin + 1)):
+            j = i + t + dmin
+            # vertical: D[i-1][j] e' sulla diagonale d+1 della riga precedente
+            value = prev[t + 1] + 1 if t + 1 < width else inf
+            if j > 0:
+                diagonal = prev[t] + (ai != b[j - 1])
+                if diagonal < value:
+                    value = diagonal
+                if t > 0 and cur[t - 1] + 1 < value:
+                    value = cur[t - 1] + 1
+            cur[t] = value
+            bound = value + abs(delta - t - dmin)
+            if bound < best:
+                best = bound
+        if best > max_edits:
+            return None
+        prev = cur
+    distance = prev[delta - dmin]
+    return distance if distance <= max_edits else None
+
+
+def _bounded_numpy(a, b, max_edits):
+    n, m = len(a), len(b)
+    dmin, dmax = _band_limits(n, m, max_edits)
+    width = dmax - dmin + 1
+    delta = m - n
+    inf = _BAND_INF
+    diagonals = np.arange(dmin, dmax + 1)
+    offsets = np.arange(width)
+    remaining = np.abs(delta - diagonals)  # costo minimo per arrivare a (n, m)
+    # b con sentinelle ai lati: la riga i confronta a[i-1] con padded[i:i+width]
+    padded = np.full(max(n + width, m - dmin + 1) + 1, -2, dtype=np.int64)
+    padded[1 - dmin:1 - dmin + m] = as_numpy(b)
+    a_ids = as_numpy(a)
+
+    prev = np.where((diagonals >= 0) & (diagonals <= m), diagonals, inf).astype(np.int64)
+    vertical = np.empty(width, dtype=np.int64)
+    vertical[-1] = inf
+    cur = np.empty(width, dtype=np.int64)
+    for i in range(1, n + 1):
+        np.add(prev[1:], 1, out=vertical[:-1])
+        np.add(prev, padded[i:i + width] != a_ids[i - 1], out=cur)
+        np.minimum(cur, vertical, out=cur)
+        # colonne fuori dalla matrice (j < 0 o j > m)
+        cur[:max(0, -i - dmin)] = inf
+        cur[max(0, m - i - dmin + 1):] = inf
+        # inserzioni lungo la riga: minimo cumulativo sulla forma traslata
+        cur -= offsets
+        np.minimum.accumulate(cur, out=cur)
+        cur += offsets
+        cur[max(0, m - i - dmin + 1):] = inf
+        if (cur + remaining).min() > max_edits:
+            return None
+        prev, cur = cur, prev
+    distance = int(prev[delta - dmin])
+    return distance if distance <= max_edits else None
+
+
+def bounded_edit_distance(a, b, max_edits, kernel=None):
+    """
+    Distanza di edit tra due sequenze di id se non supera `max_edits`, altrimenti None.
+
+    Algoritmo di Ukkonen: si calcolano solo le diagonali della DP che un percorso
+    con al piu' `max_edits` modifiche puo' attraversare (vedi _band_limits), cioe'
+    O(len(a) * max_edits) celle invece di len(a) * len(b), e il calcolo si ferma
+    alla prima riga in cui nessuna cella puo' arrivare in fondo entro il budget.
+    `kernel` come in align_ids.
+    """
+    if max_edits < 0 or abs(len(a) - len(b)) > max_edits:
+        return None
+    if kernel is None:
+        kernel = "python" if np is None else "numpy"
+    if kernel == "numpy" and np is None:
+        raise ImportError("Il kernel 'numpy' richiede NumPy installato")
+    if kernel == "numpy":
+        return _bounded_numpy(a, b, max_edits)
+    return _bounded_python(a, b, max_edits)
+
+
+def _align_gap(args):
+    r_ids, h_ids, linear_threshold, kernel = args
+    return align_ids(r_ids, h_ids, linear_threshold, kernel)
+
+
+def align_words_anchored(
+    r,
+    h,
+    n=ANCHOR_NGRAM,
+    workers=1,
+    linear_threshold=None,
+    kernel=None,
+    verify=True,
+    vocab=None,
+):
+    """
+    Allineamento segmentato per trascrizioni molto lunghe.
+
+    Le ancore (vedi find_anchors) vengono accettate come corrispondenze e la DP
+    esatta viene calcolata solo sugli intervalli tra un'ancora e la successiva,
+    in parallelo su `workers` processi se maggiore di 1. Con ancore frequenti il
+    tempo e' quasi lineare.
+
+    Il risultato puo' differire dall'ottimo globale se un'ancora non fa parte di
+    nessun allineamento ottimo. Con `verify` il costo viene confrontato con un
+    limite inferiore (edit_distance_lower_bound) e, se non basta, con la distanza
+    esatta calcolata da edit_distance.
+
+    Le parole vengono codificate una sola volta con `vocab` (vedi align_words):
+    ancore, intervalli e verifica lavorano sugli id.
+
+    Returns:
+        Tupla (ops, ottimo), con ops come in align_words e ottimo True se il costo
+        e' quello minimo, False se e' superiore, None se non verificato
+    """
+    if vocab is None:
+        vocab = Vocabulary()
+    r, h = vocab.encode(r), vocab.encode(h)
+    anchors = find_anchors(r, h, n)
+    gaps = []
+    i = j = 0
+    for ai, aj, length in anchors:
+        gaps.append((r[i:ai], h[j:aj], linear_threshold, kernel))
+        i, j = ai + length, aj + length
+    gaps.append((r[i:], h[j:], linear_threshold, kernel))
+
+    if workers == 1 or len(gaps) == 1:
+        gap_ops = [_align_gap(gap) for gap in gaps]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            gap_ops = list(pool.map(_align_gap, gaps, chunksize=max(1, len(gaps) // 64)))
+
+    ops = list(gap_ops[0])
+    for (ai, _, length), following in zip(anchors, gap_ops[1:]):
+        ops.extend(("=", w, w) for w in r[ai:ai + length])
+        ops.extend(following)
+    words = decode_ops(ops, vocab)
+
+    if not verify:
+        return words, None
+    cost = sum(1 for op, _, _ in ops if op != "=")
+    if cost == edit_distance_lower_bound(r, h):
+        return words, True
+    return words, cost == edit_distance(r, h)
+
+
+# Parametri di default del WER incrementale
+STREAM_ANCHOR = 4
+STREAM_MAX_BUFFER = 2000
+
+
+class StreamingWER:
+    """
+    WER incrementale per trascrizioni in corso.
+
+    Riferimento e ipotesi arrivano a blocchi (per esempio un segmento Gemini o
+    whisperx alla volta). Le parole non ancora consolidate restano in un buffer che
+    viene riallineato a ogni blocco; quando l'allineamento del buffer contiene una
+    serie di almeno `anchor` corrispondenze consecutive, tutto cio' che precede la
+    fine dell'ultima serie viene consolidato nei contatori e tolto dal buffer.
+    Se non ci sono ancore e il buffer supera `max_buffer` parole viene consolidata
+    comunque la parte dell'allineamento che copre la prima meta' delle parole del
+    flusso in ritardo (quello con meno parole nel buffer), purche' questo abbia
+    almeno la meta' delle parole dell'altro: contro una lunga coda in eccesso del
+    flusso in anticipo le parole in ritardo si possono allineare in molti modi di
+    costo uguale, sparse lungo tutta la coda. Finche' il flusso in ritardo non
+    recupera, il buffer cresce quindi oltre `max_buffer`.
+
+    Il risultato finale coincide con il WER sull'intero testo quando i punti di
+    consolidamento fanno parte anche dell'allineamento globale, come accade per
+    serie di parole corrette abbastanza lunghe. Un taglio forzato non ha questa
+    garanzia: il WER finale non e' mai piu' basso di quello esatto e puo' essere
+    piu' alto, tanto piu' quanto piu' `max_buffer` e' piccolo rispetto alla
+    distanza tra due ancore.
+
+    I buffer contengono gli id delle parole (array('i')) assegnati da `vocab`,
+    condiviso da tutti i blocchi della sessione.
+    """
+
+    def __init__(self, anchor=STREAM_ANCHOR, max_buffer=STREAM_MAX_BUFFER, kernel=None):
+        self.anchor = anchor
+        self.max_buffer = max_buffer
+        self.kernel = kernel
+        self.vocab = Vocabulary()
+        self.subs = self.dels = self.ins = 0
+        self.n = 0
+        self._ref = array("i")
+        self._hyp = array("i")
+        self._ops = []
+
+    @staticmethod
+    def _tokens(chunk):
+        if chunk is None:
+            return []
+        if isinstance(chunk, str):
+            return normalize_text(chunk).split()
+        return list(chunk)
+
+    def add(self, ref=None, hyp=None):
+        """
+        Aggiunge un blocco di riferimento e/o di ipotesi.
+
+        Ogni blocco puo' essere una stringa (viene normalizzata) o una lista di
+        parole gia' normalizzate. Restituisce le statistiche correnti (vedi stats).
+        """
+        ref_tokens = self._tokens(ref)
+        self._ref.extend(self.vocab.encode(ref_tokens))
+        self._hyp.extend(self.vocab.encode(self._tokens(hyp)))
+        self.n += len(ref_tokens)
+        self._ops = align_ids(self._ref, self._hyp, kernel=self.kernel)
+        self._commit()
+        return self.stats()
+
+    def _commit(self):
+        ops = self._ops
+        # Fine dell'ultima serie di almeno `anchor` corrispondenze seguita da almeno
+        # `anchor` parole di entrambi i testi: in coda al buffer il flusso in ritardo
+        # ha piu' allineamenti di costo uguale e le corrispondenze non sono affidabili
+        # `forced` copre la prima meta' delle parole del flusso in ritardo
+        cut = forced = 0
+        run = 0
+        ref_left = len(self._ref)
+        hyp_left = len(self._hyp)
+        lagging_ref = len(self._ref) <= len(self._hyp)
+        half = min(len(self._ref), len(self._hyp)) // 2
+        for k, (op, _, _) in enumerate(ops):
+            run = run + 1 if op == "=" else 0
+            if op != "I":
+                ref_left -= 1
+            if op != "D":
+                hyp_left -= 1
+            if run >= self.anchor and min(ref_left, hyp_left) >= self.anchor:
+                cut = k + 1
+            lagging_used = len(self._ref) - ref_left if lagging_ref else len(self._hyp) - hyp_left
+            if not forced and lagging_used >= half:
+                forced = k + 1
+        balanced = 2 * min(len(self._ref), len(self._hyp)) >= max(len(self._ref), len(self._hyp))
+        if cut == 0 and balanced and len(self._ref) + len(self._hyp) > self.max_buffer:
+            cut = forced
+        if cut == 0:
+            return
+
+        ref_used = hyp_used = 0
+        for op, _, _ in ops[:cut]:
+            if op == "S":
+                self.subs += 1
+            elif op == "D":
+                self.dels += 1
+            elif op == "I":
+                self.ins += 1
+            if op != "I":
+                ref_used += 1
+            if op != "D":
+                hyp_used += 1
+        del self._ref[:ref_used]
+        del self._hyp[:hyp_used]
+        del ops[:cut]
+
+    def stats(self):
+        """
+        Statistiche correnti: contatori consolidati piu' l'allineamento provvisorio
+        del buffer, nello stesso formato di stats_from_ops.
+        """
+        pending = stats_from_ops(self._ops, 0)
+        subs = self.subs + pending["S"]
+        dels = self.dels + pending["D"]
+        ins = self.ins + pending["I"]
+        wer = (subs + dels + ins) / self.n if self.n > 0 else float("inf")
+        return {"S": subs, "D": dels, "I": ins, "N": self.n, "WER": wer}
+
+    def finish(self):
+        """
+        Consolida il buffer (da chiamare a fine sessione) e restituisce le statistiche.
+        """
+        for op, _, _ in self._ops:
+            if op == "S":
+                self.subs += 1
+            elif op == "D":
+                self.dels += 1
+            elif op == "I":
+                self.ins += 1
+        self._ref = array("i")
+        self._hyp = array("i")
+        self._ops = []
+        return self.stats()
+
+
+def wer_row(ref_n, hyp_n, stats, ref_aligned, hyp_aligned):
+    """
+    Risultato strutturato di una coppia riferimento/ipotesi.
+
+    I campi numerici (S, D, I, N, WER) vanno nei file di risultati; "details"
+    contiene cio' che serve in piu' per il report testuale.
+    """
+    return {
+        "metric": "wer",
+        **stats,
+        "details": {
+            "ref_aligned": ref_aligned,
+            "hyp_aligned": hyp_aligned,
+            "ref_preview": ref_n[:200],
+            "hyp_preview": hyp_n[:200],
+        },
+    }
+
+
+def render_report(row):
+    """
+    Restituisce il report testuale di un risultato creato da wer_row.
+    """
+    details = row["details"]
+    out = io.StringIO()
+    print("=== WER STATISTICS ===", file=out)
+    print("Sostituzioni (S):", row["S"], file=out)
+    print("Cancellazioni (D):", row["D"], file=out)
+    print("Inserzioni (I):", row["I"], file=out)
+    print("N (parole riferimento):", row["N"], file=out)
+    print(
+        "WER = (S+D+I)/N =",
+        f"{row['WER']:.3f}",
+        f"-> {row['WER']*100:.1f}%",
+        file=out,
+    )
+    print(file=out)
+
+    if row.get("optimal") is False:
+        print(
+            "Attenzione: allineamento segmentato non ottimo, il WER e' sovrastimato",
+            file=out,
+        )
+        print(file=out)
+
+    print("=== WORD DIFFERENCES ===", file=out)
+    print("Reference: ", details["ref_aligned"], file=out)
+    print("Automatic: ", details["hyp_aligned"], file=out)
+    print(file=out)
+
+    print("=== FULL TEXT PREVIEW ===", file=out)
+    print("Riferimento (prime 200 char):", details["ref_preview"], file=out)
+    print("Ipotetico (prime 200 char):", details["hyp_preview"], file=out)
+    return out.getvalue()
+
+
+def wer_cutoff_row(ref_n, hyp_n, max_wer, kernel=None, vocab=None):
+    """
+    Verifica rapida di una ipotesi: WER se non supera `max_wer`, altrimenti solo
+    l'indicazione "oltre la soglia", senza allineamento.
+
+    La distanza viene calcolata con bounded_edit_distance con un budget di
+    floor(max_wer * N) modifiche, quindi le ipotesi molto peggiori della soglia
+    vengono scartate dopo poche righe della DP. Sotto la soglia il WER e' esatto
+    (e' lo stesso di wer_row), ma senza il dettaglio S/D/I.
+    """
+    if vocab is None:
+        vocab = Vocabulary()
+    r = vocab.encode_text(ref_n)
+    h = vocab.encode_text(hyp_n)
+    n = len(r)
+    # tolleranza per soglie come 0.29 * 100 = 28.999999999999996
+    budget = floor(max_wer * n + 1e-9) if n > 0 else 0
+    distance = bounded_edit_distance(r, h, budget, kernel)
+    if distance is None or n == 0:
+        wer = None if distance is None else (0.0 if distance == 0 else float("inf"))
+    else:
+        wer = distance / n
+    return {
+        "metric": "wer",
+        "E": distance,
+        "N": n,
+        "WER": wer,
+        "max_wer": max_wer,
+        "exceeds_cutoff": distance is None or wer > max_wer,
+        "details": {"ref_preview": ref_n[:200], "hyp_preview": hyp_n[:200]},
+    }
+
+
+def render_cutoff_report(row):
+    """
+    Restituisce il report testuale di un risultato creato da wer_cutoff_row.
+    """
+    details = row["details"]
+    out = io.StringIO()
+    print("=== WER CUTOFF ===", file=out)
+    print("N (parole riferimento):", row["N"], file=out)
+    print(f"Soglia: WER <= {row['max_wer']:.3f} -> {row['max_wer']*100:.1f}%", file=out)
+    if row["exceeds_cutoff"]:
+        print("WER oltre la soglia (exceeds cutoff)", file=out)
+    else:
+        print("Modifiche (S+D+I):", row["E"], file=out)
+        print(
+            "WER = (S+D+I)/N =",
+            f"{row['WER']:.3f}",
+            f"-> {row['WER']*100:.1f}%",
+            file=out,
+        )
+    print(file=out)
+
+    print("=== FULL TEXT PREVIEW ===", file=out)
+    print("Riferimento (prime 200 char):", details["ref_preview"], file=out)
+    print("Ipotetico (prime 200 char):", details["hyp_preview"], file=out)
+    return out.getvalue()
+
+
+def substitution_cer(ops):
+    """
+    CER di ogni coppia di parole sostituite di un allineamento (vedi align_words):
+    modifiche di caratteri (edit_distance) divise per la lunghezza della parola di
+    riferimento, es. "anurisma" per "aneurisma" = 1/9.
+
+    Returns:
+        Lista di dizionari {"ref", "hyp", "E", "CER"} nell'ordine dell'allineamento
+    """
+    pairs = []
+    for op, r_word, h_word in ops:
+        if op == "S":
+            edits = edit_distance(r_word, h_word)
+            pairs.append({"ref": r_word, "hyp": h_word, "E": edits, "CER": edits / len(r_word)})
+    return pairs
+
+
+def cer_row(ref_n, hyp_n, linear_threshold=None, anchored=False, vocab=None):
+    """
+    Risultato strutturato del CER di una coppia di testi gia' normalizzati.
+
+    Il CER e' la distanza di edit tra le sequenze di caratteri (spazi compresi)
+    divisa per il numero di caratteri del riferimento; la distanza e' calcolata da
+    edit_distance (bit-parallelo), senza la DP quadratica sui caratteri. Le coppie
+    di parole sostituite vengono dall'allineamento delle parole, come per il WER, e
+    ognuna ha il suo CER (vedi substitution_cer); "S_CER" e' la loro media.
+    """
+    r = ref_n.split()
+    if anchored:
+        ops, _ = align_words_anchored(
+            r, hyp_n.split(), linear_threshold=linear_threshold, vocab=vocab
+        )
+    else:
+        ops = align_words(r, hyp_n.split(), linear_threshold, vocab=vocab)
+    pairs = substitution_cer(ops)
+    edits = edit_distance(ref_n, hyp_n)
+    n = len(ref_n)
+    return {
+        "metric": "cer",
+        "E": edits,
+        "N": n,
+        "CER": edits / n if n > 0 else float("inf"),
+        "S_pairs": len(pairs),
+        "S_CER": sum(pair["CER"] for pair in pairs) / len(pairs) if pairs else None,
+        "details": {
+            "substitutions": pairs,
+            "ref_preview": ref_n[:200],
+            "hyp_preview": hyp_n[:200],
+        },
+    }
+
+
+def render_cer_report(row):
+    """
+    Restituisce il report testuale di un risultato creato da cer_row.
+    """
+    details = row["details"]
+    out = io.StringIO()
+    print("=== CER STATISTICS ===", file=out)
+    print("Modifiche di caratteri (E):", row["E"], file=out)
+    print("N (caratteri riferimento):", row["N"], file=out)
+    print(
+        "CER = E/N =",
+        f"{row['CER']:.3f}",
+        f"-> {row['CER']*100:.1f}%",
+        file=out,
+    )
+    if row["S_CER"] is not None:
+        print(
+            "Parole sostituite:",
+            row["S_pairs"],
+            f"(CER medio per coppia: {row['S_CER']:.3f})",
+            file=out,
+        )
+    else:
+        print("Parole sostituite: 0", file=out)
+    print(file=out)
+
+    print("=== SUBSTITUTIONS (CER per coppia) ===", file=out)
+    for pair in details["substitutions"]:
+        print(
+            f"{pair['ref']} -> {pair['hyp']}: {pair['E']}/{len(pair['ref'])}"
+            f" = {pair['CER']:.3f}",
+            file=out,
+        )
+    print(file=out)
+
+    print("=== FULL TEXT PREVIEW ===", file=out)
+    print("Riferimento (prime 200 char):", details["ref_preview"], file=out)
+    print("Ipotetico (prime 200 char):", details["hyp_preview"], file=out)
+    return out.getvalue()
+
+
+def cache_version():
+    """
+    Versione del codice per la chiave della cache: il sorgente di questo modulo e
+    dei moduli da cui dipendono i risultati (normalizzazione e vocabolario).
+    """
+    return code_version(sys.modules[__name__], text_normalization, vocabulary)
+
+
+def read_normalized(path, rules=WER_RULES):
+    with open(path, encoding="utf-8") as f:
+        return normalize_text(f.read(), rules)
+
+
+def score_normalized(
+    ref_n, hyp_n, linear_threshold=None, anchored=False, vocab=None, metric="wer", max_wer=None
+):
+    """
+    Calcola WER e allineamento (o il CER con metric="cer", vedi cer_row) su testi
+    gia' normalizzati e restituisce il risultato. Con `max_wer` calcola solo se il
+    WER resta entro la soglia (vedi wer_cutoff_row).
+    """
+    if max_wer is not None:
+        return wer_cutoff_row(ref_n, hyp_n, max_wer, vocab=vocab)
+    if metric == "cer":
+        return cer_row(ref_n, hyp_n, linear_threshold, anchored, vocab)
+    return wer_row(
+        ref_n,
+        hyp_n,
+        *wer_align(ref_n, hyp_n, linear_threshold, anchored=anchored, vocab=vocab),
+    )
+
+
+def render(row):
+    """
+    Report testuale di un risultato WER o CER.
+    """
+    if "exceeds_cutoff" in row:
+        return render_cutoff_report(row)
+    return render_cer_report(row) if row["metric"] == "cer" else render_report(row)
+
+
+def compute_from_files(
+    ref_file,
+    hyp_file,
+    linear_threshold=None,
+    anchored=False,
+    normalization=None,
+    metric="wer",
+    max_wer=None,
+):
+    rules = wer_rules(normalization)
+    ref_n = read_normalized(ref_file, rules)
+    hyp_n = read_normalized(hyp_file, rules)
+    row = score_normalized(
+        ref_n, hyp_n, linear_threshold, anchored, metric=metric, max_wer=max_wer
+    )
+    print(render(row), end="")
+
+
+# Stato dei worker del batch: il riferimento normalizzato e il vocabolario del batch
+# vengono passati una sola volta all'avvio di ogni processo invece che con ogni ipotesi
+_batch_ref = None
+_batch_linear_threshold = None
+_batch_anchored = False
+_batch_vocab = None
+_batch_metric = "wer"
+_batch_max_wer = None
+
+
+def _init_batch_worker(
+    ref_n, linear_threshold, anchored=False, vocab=None, metric="wer", max_wer=None
+):
+    global _batch_ref, _batch_linear_threshold, _batch_anchored, _batch_vocab, _batch_metric
+    global _batch_max_wer
+    _batch_ref = ref_n
+    _batch_linear_threshold = linear_threshold
+    _batch_anchored = anchored
+    _batch_vocab = vocab
+    _batch_metric = metric
+    _batch_max_wer = max_wer
+
+
+def _score_batch_text(hyp_n):
+    return score_normalized(
+        _batch_ref,
+        hyp_n,
+        _batch_linear_threshold,
+        _batch_anchored,
+        _batch_vocab,
+        _batch_metric,
+        _batch_max_wer,
+    )
+
+
+def score_batch(
+    ref_file,
+    hyp_files,
+    workers=None,
+    linear_threshold=None,
+    cache=None,
+    anchored=False,
+    normalization=None,
+    metric="wer",
+    max_wer=None,
+):
+    """
+    Calcola il WER (o il CER con metric="cer") di piu' ipotesi rispetto allo
+    stesso riferimento.
+
+    Il riferimento viene letto e normalizzato una sola volta; le ipotesi vengono
+    valutate in parallelo su un pool di processi (`workers`, default: numero di CPU).
+    Con `cache` (una ResultCache) le coppie gia' calcolate con lo stesso contenuto
+    e lo stesso codice vengono lette dalla cache invece di essere ricalcolate.
+    `anchored` usa l'allineamento segmentato (vedi wer_align), `normalization`
+    modifica le regole di normalizzazione (vedi wer_rules). Con `max_wer` le
+    ipotesi vengono solo confrontate con la soglia (vedi wer_cutoff_row), per
+    scartare rapidamente le run peggiori in una sweep di modelli o parametri.
+
+    Le parole di riferimento e ipotesi da calcolare vengono codificate in un unico
+    vocabolario, passato ai worker all'avvio: durante gli allineamenti la codifica
+    e' una sola ricerca per parola, senza assegnare nuovi id.
+
+    Returns:
+        Lista dei risultati (vedi wer_row, cer_row e wer_cutoff_row), nello stesso
+        ordine di `hyp_files`
+    """
     with open(ref_file, encoding="utf-8") as f:
         ref = f.read()
-    with open(hyp_file, encoding="utf-8") as f:
-        hyp = f.read()
-    ref_n = normalize_text(ref)
-    hyp_n = normalize_text(hyp)
-    stats = wer_stats(ref_n, hyp_n)
-
-    print("=== WER STATISTICS ===")
-    print("Sostituzioni (S):", stats["S"])
-    print("Cancellazioni (D):", stats["D"])
-    print("Inserzioni (I):", stats["I"])
-    print("N (parole riferimento):", stats["N"])
-    print("WER = (S+D+I)/N =", f"{stats['WER']:.3f}", f"-> {stats['WER']*100:.1f}%")
-    print()
-
-    print("=== WORD DIFFERENCES ===")
-    ref_aligned, hyp_aligned = align_texts(ref_n, hyp_n)
-    print("Reference: ", ref_aligned)
-    print("Automatic: ", hyp_aligned)
-    print()
-
-    print("=== FULL TEXT PREVIEW ===")
-    print("Riferimento (prime 200 char):", ref_n[:200])
-    print("Ipotetico (prime 200 char):", hyp_n[:200])
+    rules = wer_rules(normalization)
+    ref_n = normalize_text(ref, rules)
+    hyps = []
+    for hyp_file in hyp_files:
+        with open(hyp_file, encoding="utf-8") as f:
+            hyps.append(f.read())
+    hyp_ns = [normalize_text(hyp, rules) for hyp in hyps]
+
+    rows = [None] * len(hyps)
+    keys = [None] * len(hyps)
+    if cache is not None:
+        version = cache_version()
+        options = {"anchored": True} if anchored else {}
+        if normalization:
+            options["normalization"] = normalization
+        if max_wer is not None:
+            options["max_wer"] = max_wer
+        for i, hyp in enumerate(hyps):
+            keys[i] = cache.key(metric, options, version, ref, hyp)
+            rows[i] = cache.get(keys[i])
+
+    todo = [i for i, row in enumerate(rows) if row is None]
+    vocab = Vocabulary(ref_n.split())
+    for i in todo:
+        vocab.encode_text(hyp_ns[i])
+    if workers == 1 or len(todo) <= 1:
+        _init_batch_worker(ref_n, linear_threshold, anchored, vocab, metric, max_wer)
+        computed = [_score_batch_text(hyp_ns[i]) for i in todo]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_batch_worker,
+            initargs=(ref_n, linear_threshold, anchored, vocab, metric, max_wer),
+        ) as pool:
+            computed = list(pool.map(_score_batch_text, [hyp_ns[i] for i in todo]))
+
+    for i, row in zip(todo, computed):
+        rows[i] = row
+        if cache is not None:
+            cache.put(keys[i], row)
+    return rows
 
 
 if __name__ == "__main__":
-    import sys
+    import argparse
 
-    if len(sys.argv) < 3:
-        print("Uso: python compute_wer.py ref.txt hyp.txt")
-        sys.exit(1)
-    compute_from_files(sys.argv[1], sys.argv[2])
+    parser = argparse.ArgumentParser(
+        description="Calcola il WER tra una trascrizione di riferimento e una o piu' ipotesi"
+    )
+    parser.add_argument("ref", help="File di riferimento (ref.txt)")
+    parser.add_argument("hyp", nargs="+", help="File ipotesi (hyp.txt)")
+    parser.add_argument(
+        "--linear-memory-threshold",
+        type=int,
+        default=LINEAR_MEMORY_THRESHOLD,
+        help="Numero di celle DP oltre il quale usare l'allineamento a memoria ridotta "
+        f"(default: {LINEAR_MEMORY_THRESHOLD})",
+    )
+    parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=None,
+        help="Processi per il calcolo di piu' ipotesi (default: numero di CPU)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Directory della cache dei risultati per piu' ipotesi (default: nessuna cache)",
+    )
+    parser.add_argument(
+        "--anchored",
+        action="store_true",
+        help="Allineamento segmentato su ancore (n-grammi unici) per trascrizioni molto "
+        "lunghe; il report segnala se il risultato non e' ottimo",
+    )
+    parser.add_argument(
+        "--fold-accents",
+        action="store_true",
+        help="Ignora gli accenti (perché = perche)",
+    )
+    parser.add_argument(
+        "--number-words",
+        action="store_true",
+        help="Converte i numeri scritti in lettere in cifre (dieci = 10)",
+    )
+    parser.add_argument(
+        "--cer",
+        action="store_true",
+        help="Calcola il CER (caratteri) invece del WER, con il CER di ogni parola sostituita",
+    )
+    parser.add_argument(
+        "--max-wer",
+        type=float,
+        default=None,
+        help="Verifica solo se il WER resta entro la soglia (es. 0.15), scartando "
+        "rapidamente le ipotesi peggiori; senza allineamento ne' dettaglio S/D/I",
+    )
+    args = parser.parse_args()
+    if args.max_wer is not None and args.cer:
+        parser.error("--max-wer si applica solo al WER")
+    metric = "cer" if args.cer else "wer"
+    normalization = {
+        name: True for name in ("fold_accents", "number_words") if getattr(args, name)
+    }
+    if len(args.hyp) == 1:
+        compute_from_files(
+            args.ref,
+            args.hyp[0],
+            args.linear_memory_threshold,
+            args.anchored,
+            normalization,
+            metric,
+            args.max_wer,
+        )
+    else:
+        cache = ResultCache(args.cache_dir) if args.cache_dir else None
+        rows = score_batch(
+            args.ref,
+            args.hyp,
+            args.workers,
+            args.linear_memory_threshold,
+            cache,
+            args.anchored,
+            normalization,
+            metric,
+            args.max_wer,
+        )
+        for hyp_file, row in zip(args.hyp, rows):
+            print(f"### {hyp_file}")
+            print(render(row), end="")
@@ -0,0 +1,200 @@
+"""
+Concatenated minimum-permutation WER (cpWER) of speaker-labeled transcripts
+
+The words of every speaker are concatenated, in order, on both sides; cpWER is the
+total word edit distance of the best one-to-one pairing of reference and hypothesis
+speakers, over the number of reference words. Unpaired speakers count all their
+words as deletions or insertions. Since the total is a sum of per-pair distances,
+the best pairing is the minimum cost assignment of the pairwise distance matrix
+(Hungarian algorithm, O(speakers^3)) instead of a search over all permutations.
+"""
+
+import argparse
+import io
+import sys
+from array import array
+from typing import Any, Dict, List, Optional, Sequence
+
+import assignment
+import compute_der_gemini
+import compute_wer
+import text_normalization
+import vocabulary
+from assignment import linear_sum_assignment
+from compute_der_gemini import TranscriptSegment, parse_ground_truth_file, parse_test_file
+from compute_wer import edit_distance, normalize_text, wer_rules
+from result_cache import ResultCache, cached_row, code_version
+from text_normalization import NormalizationRules
+from vocabulary import Vocabulary
+
+
+def cpwer_rules(normalization: Optional[Dict[str, Any]] = None) -> NormalizationRules:
+    """
+    WER normalization rules (see compute_wer.wer_rules) for segment texts, whose
+    speaker labels have already been parsed off.
+    """
+    return wer_rules(normalization).with_options(strip_speaker_labels=False)
+
+
+def speaker_words(
+    segments: Sequence[TranscriptSegment], vocab: Vocabulary, rules: NormalizationRules
+) -> Dict[str, array]:
+    """
+    Concatenate the normalized words of every speaker.
+
+    Args:
+        segments: Transcript segments, in order
+        vocab: Vocabulary shared by the reference and the hypothesis
+        rules: Normalization rules, see cpwer_rules
+
+    Returns:
+        Speaker to word ids, speakers in order of first appearance
+    """
+    words: Dict[str, array] = {}
+    for segment in segments:
+        ids = vocab.encode_text(normalize_text(segment.text, rules))
+        words.setdefault(segment.speaker, array("i")).extend(ids)
+    return words
+
+
+def pairwise_errors(reference: Sequence[array], hypothesis: Sequence[array]) -> List[List[int]]:
+    """
+    Word edit distance of every reference/hypothesis speaker pair.
+
+    The matrix is padded to a square with empty speakers, so that leaving a speaker
+    unpaired costs all its words.
+
+    Returns:
+        Square matrix, rows are reference speakers and columns hypothesis speakers
+    """
+    size = max(len(reference), len(hypothesis))
+    reference = [*reference, *[array("i")] * (size - len(reference))]
+    hypothesis = [*hypothesis, *[array("i")] * (size - len(hypothesis))]
+    return [[edit_distance(ref, hyp) for hyp in hypothesis] for ref in reference]
+
+
+def cpwer(reference: Dict[str, array], hypothesis: Dict[str, array]) -> Dict[str, Any]:
+    """
+    cpWER of per-speaker word sequences.
+
+    Args:
+        reference: Reference speaker to word ids, see speaker_words
+        hypothesis: Hypothesis speaker to word ids, encoded with the same vocabulary
+
+    Returns:
+        Dict with E (total edits), N (reference words), cpWER and "speakers", one dict
+        per pair with reference/hypothesis (None for an unpaired speaker), E and N
+    """
+    ref_labels: List[Optional[str]] = list(reference)
+    hyp_labels: List[Optional[str]] = list(hypothesis)
+    errors = pairwise_errors(list(reference.values()), list(hypothesis.values()))
+    size = len(errors)
+    ref_labels += [None] * (size - len(ref_labels))
+    hyp_labels += [None] * (size - len(hyp_labels))
+
+    speakers = []
+    for row, col in linear_sum_assignment(errors):
+        if ref_labels[row] is None and hyp_labels[col] is None:
+            continue
+        n = len(reference[ref_labels[row]]) if ref_labels[row] is not None else 0
+        speakers.append(
+            {"reference": ref_labels[row], "hypothesis": hyp_labels[col], "E": errors[row][col], "N": n}
+        )
+    total_errors = sum(pair["E"] for pair in speakers)
+    total_words = sum(len(words) for words in reference.values())
+    return {
+        "E": total_errors,
+        "N": total_words,
+        "cpWER": total_errors / total_words if total_words > 0 else float("inf"),
+        "speakers": speakers,
+    }
+
+
+def cache_version() -> str:
+    """
+    Code version of the cache keys: the source of this module and of every module
+    its results depend on (turn parsing, normalization, interning, edit distance
+    and the assignment solver).
+    """
+    return code_version(
+        sys.modules[__name__], assignment, compute_der_gemini, compute_wer, text_normalization, vocabulary
+    )
+
+
+def cpwer_row(
+    ground_truth_file: str,
+    test_file: str,
+    cache: Optional[ResultCache] = None,
+    normalization: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Compute the cpWER of a file pair as a structured result row.
+
+    Args:
+        ground_truth_file: Ground truth transcript ("Speaker: text" lines)
+        test_file: Test transcript ("[timestamp] Speaker: text" lines)
+        cache: Result cache, reused when file contents, options and code are unchanged
+        normalization: Normalization options, see compute_wer.wer_rules
+
+    Returns:
+        Row with metric "cpwer", the files and the fields returned by cpwer
+    """
+
+    def compute() -> Dict[str, Any]:
+        rules = cpwer_rules(normalization)
+        vocab = Vocabulary()
+        reference = speaker_words(parse_ground_truth_file(ground_truth_file), vocab, rules)
+        hypothesis = speaker_words(parse_test_file(test_file), vocab, rules)
+        return {
+            "metric": "cpwer",
+            "ground_truth_file": ground_truth_file,
+            "test_file": test_file,
+            **cpwer(reference, hypothesis),
+        }
+
+    options = {"normalization": normalization} if normalization else {}
+    files = {"ground_truth_file": ground_truth_file, "test_file": test_file}
+    return cached_row(cache, "cpwer", options, cache_version, files, compute)
+
+
+def render_cpwer(row: Dict[str, Any]) -> str:
+    """Format a cpWER result row as the text report printed by the command line."""
+    out = io.StringIO()
+    print("=" * 50, file=out)
+    print("cpWER COMPUTATION RESULTS", file=out)
+    print("=" * 50, file=out)
+    print(f"Ground truth file: {row['ground_truth_file']}", file=out)
+    print(f"Test file: {row['test_file']}", file=out)
+    print(f"Errors (S+D+I): {row['E']}", file=out)
+    print(f"Reference words: {row['N']}", file=out)
+    print(f"cpWER: {row['cpWER']:.4f} ({row['cpWER']*100:.2f}%)", file=out)
+    print("\nSpeaker pairing (ground truth <- test):", file=out)
+    for pair in row["speakers"]:
+        reference = pair["reference"] if pair["reference"] is not None else "(none)"
+        hypothesis = pair["hypothesis"] if pair["hypothesis"] is not None else "(none)"
+        rate = f"{pair['E']/pair['N']*100:.2f}%" if pair["N"] > 0 else "N/A"
+        print(f"  {reference} <- {hypothesis}: {pair['E']} errors / {pair['N']} words ({rate})", file=out)
+    print("=" * 50, file=out)
+    return out.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Speaker-attributed WER (cpWER) between two speaker-labeled transcripts"
+    )
+    parser.add_argument("ground_truth_file", help="Ground truth transcript (Speaker: text)")
+    parser.add_argument("test_file", help="Test transcript ([timestamp] Speaker: text)")
+    parser.add_argument("--fold-accents", action="store_true", help="Ignore accents")
+    parser.add_argument(
+        "--number-words", action="store_true", help="Map Italian number words to digits"
+    )
+    args = parser.parse_args()
+
+    normalization = {
+        name: True for name in ("fold_accents", "number_words") if getattr(args, name)
+    }
+    print(render_cpwer(cpwer_row(args.ground_truth_file, args.test_file, normalization=normalization)), end="")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,19 @@
 import json
 import sys
 import argparse
-from typing import List, Dict, Any, Tuple
+import heapq
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from typing import List, Dict, Any, Iterator, Set, Tuple
+
+import assignment
+from assignment import linear_sum_assignment
+from result_cache import ResultCache, cached_row, code_version
+
+try:
+    import numpy as np
+except ImportError:  # only needed for the time-weighted DER
+    np = None
 
 
 def load_diarization_file(file_path: str) -> List[Dict[str, Any]]:
@@ -26,51 +38,152 @@ def load_diarization_file(file_path: str) -> List[Dict[str, Any]]:
         sys.exit(1)
 
 
-def find_ground_truth_speaker(segment: Dict[str, Any], ground_truth: List[Dict[str, Any]]) -> str | None:
+@dataclass
+class GroundTruthIndex:
+    """
+    Ground truth segments sorted by start time, with times converted to float once.
+
+    `max_end[k]` is the largest end among the first k+1 sorted segments, so it is
+    non-decreasing and can be bisected to skip every segment that ends before a query.
+    """
+
+    starts: List[float]
+    ends: List[float]
+    speakers: List[str]
+    order: List[int]
+    max_end: List[float]
+
+    @classmethod
+    def from_segments(cls, ground_truth: List[Dict[str, Any]]) -> "GroundTruthIndex":
+        """
+        Build the index from the ground truth segments.
+
+        Args:
+            ground_truth: List of ground truth segments
+
+        Returns:
+            The index over the segments
+        """
+        rows = sorted(
+            (float(seg['start']), pos, float(seg['end']), str(seg['speaker']))
+            for pos, seg in enumerate(ground_truth)
+        )
+        max_end = []
+        running = float('-inf')
+        for _, _, end, _ in rows:
+            running = max(running, end)
+            max_end.append(running)
+        return cls(
+            starts=[row[0] for row in rows],
+            ends=[row[2] for row in rows],
+            speakers=[row[3] for row in rows],
+            order=[row[1] for row in rows],
+            max_end=max_end,
+        )
+
+    def speaker_for(self, segment_start: float, segment_end: float) -> str | None:
+        """
+        Find the speaker with the maximum overlap with the given interval.
+
+        Ties are broken by the position in the original ground truth list, as the
+        linear scan did.
+
+        Returns:
+            The speaker ID, or None if no overlap found
+        """
+        # Only segments that end after segment_start and start before segment_end can overlap
+        lo = bisect_right(self.max_end, segment_start)
+        hi = bisect_left(self.starts, segment_end)
+
+        best_speaker = None
+        best_duration = 0.0
+        best_order = -1
+        for k in range(lo, hi):
+            overlap_start = max(segment_start, self.starts[k])
+            overlap_end = min(segment_end, self.ends[k])
+
+            if overlap_start < overlap_end:  # There is overlap
+                overlap_duration = overlap_end - overlap_start
+                if (
+                    best_speaker is None
+                    or overlap_duration > best_duration
+                    or (overlap_duration == best_duration and self.order[k] < best_order)
+                ):
+                    best_speaker = self.speakers[k]
+                    best_duration = overlap_duration
+                    best_order = self.order[k]
+
+        return best_speaker
+
+
+def find_ground_truth_speaker(
+    segment: Dict[str, Any], ground_truth: List[Dict[str, Any]] | GroundTruthIndex
+) -> str | None:
     """
     Find the speaker for a given segment based on ground truth intervals.
     
     Args:
         segment: Test segment with 'start', 'end', and 'speaker' fields
-        ground_truth: List of ground truth segments
+        ground_truth: List of ground truth segments, or a prebuilt GroundTruthIndex
         
     Returns:
         The speaker ID from ground truth, or None if no overlap found
     """
+    if not isinstance(ground_truth, GroundTruthIndex):
+        ground_truth = GroundTruthIndex.from_segments(ground_truth)
+
     # Convert start/end to float in case they are strings
-    segment_start = float(segment['start'])
-    segment_end = float(segment['end'])
-    
-    # Find overlapping ground truth segments
-    overlapping_speakers = []
-    
-    for gt_segment in ground_truth:
-        gt_start = float(gt_segment['start'])
-        gt_end = float(gt_segment['end'])
-        
-        # Check if there's any overlap between the segments
-        overlap_start = max(segment_start, gt_start)
-        overlap_end = min(segment_end, gt_end)
-        
-        if overlap_start < overlap_end:  # There is overlap
-            overlap_duration = overlap_end - overlap_start
-            overlapping_speakers.append((str(gt_segment['speaker']), overlap_duration))
-    
-    if not overlapping_speakers:
-        return None
-    
-    # Return the speaker with the maximum overlap
-    overlapping_speakers.sort(key=lambda x: x[1], reverse=True)
-    return overlapping_speakers[0][0]
+    return ground_truth.speaker_for(float(segment['start']), float(segment['end']))
+
+
+def match_segment_speakers(ground_truth: List[Dict[str, Any]], test_data: List[Dict[str, Any]], mapping: Dict[str, str] | None = None) -> Iterator[Tuple[Dict[str, Any], str | None, str]]:
+    """
+    Pair every test segment with the ground truth speaker it overlaps most.
+
+    Args:
+        ground_truth: Ground truth segments
+        test_data: Test segments
+        mapping: Test label to ground truth label; None compares the labels literally
+
+    Yields:
+        Tuples of (test segment, ground truth speaker or None, test speaker after mapping)
+    """
+    gt_index = GroundTruthIndex.from_segments(ground_truth)
+    for test_segment in test_data:
+        gt_speaker = find_ground_truth_speaker(test_segment, gt_index)
+        test_speaker = str(test_segment['speaker'])  # Convert to string for comparison
+        if mapping is not None:
+            # Unmapped test speakers never match a ground truth speaker
+            test_speaker = mapping.get(test_speaker, f"unmapped {test_speaker}")
+        yield test_segment, gt_speaker, test_speaker
+
+
+def speaker_accuracy(ground_truth: List[Dict[str, Any]], test_data: List[Dict[str, Any]], mapping: Dict[str, str] | None = None) -> Dict[str, Dict[str, int]]:
+    """
+    Count the correct test segments per test speaker.
+
+    Returns:
+        Speaker label to {"correct": ..., "total": ...}, in order of first appearance
+    """
+    stats: Dict[str, Dict[str, int]] = {}
+    for _, gt_speaker, test_speaker in match_segment_speakers(ground_truth, test_data, mapping):
+        entry = stats.setdefault(test_speaker, {"correct": 0, "total": 0})
+        entry["total"] += 1
+        if gt_speaker is not None and gt_speaker == test_speaker:
+            entry["correct"] += 1
+    return stats
 
 
-def compute_der(ground_truth_file: str, test_file: str) -> Tuple[float, int, int]:
+def compute_der(ground_truth_file: str, test_file: str, mapping: Dict[str, str] | None = None, verbose: bool = True) -> Tuple[float, int, int]:
     """
     Compute the Diarization Error Rate (DER).
     
     Args:
         ground_truth_file: Path to ground truth JSON file
         test_file: Path to test JSON file
+        mapping: Test label to ground truth label, e.g. from optimal_speaker_mapping;
+            None compares the labels literally
+        verbose: Whether to print the per-segment results
         
     Returns:
         Tuple of (DER, correct_count, total_count)
@@ -79,21 +192,22 @@ def compute_der(ground_truth_file: str, test_file: str) -> Tuple[float, int, int
     ground_truth = load_diarization_file(ground_truth_file)
     test_data = load_diarization_file(test_file)
     
-    print(f"Loaded {len(ground_truth)} ground truth segments")
-    print(f"Loaded {len(test_data)} test segments")
+    if verbose:
+        print(f"Loaded {len(ground_truth)} ground truth segments")
+        print(f"Loaded {len(test_data)} test segments")
     
     correct_count = 0
     total_count = len(test_data)
-    
+
     # For each segment in test data, check if speaker matches ground truth
-    for i, test_segment in enumerate(test_data):
-        gt_speaker = find_ground_truth_speaker(test_segment, ground_truth)
-        test_speaker = str(test_segment['speaker'])  # Convert to string for comparison
-        
+    for i, (test_segment, gt_speaker, test_speaker) in enumerate(
+        match_segment_speakers(ground_truth, test_data, mapping)
+    ):
         if gt_speaker is not None and gt_speaker == test_speaker:
             correct_count += 1
-            print(f"Segment {i+1}: CORRECT - {test_speaker} (time: {test_segment['start']:.2f}-{test_segment['end']:.2f})")
-        else:
+            if verbose:
+                print(f"Segment {i+1}: CORRECT - {test_speaker} (time: {test_segment['start']:.2f}-{test_segment['end']:.2f})")
+        elif verbose:
             if gt_speaker is None:
                 print(f"Segment {i+1}: ERROR - No ground truth overlap for {test_speaker} (time: {test_segment['start']:.2f}-{test_segment['end']:.2f})")
             else:
@@ -105,6 +219,432 @@ def compute_der(ground_truth_file: str, test_file: str) -> Tuple[float, int, int
     return der, correct_count, total_count
 
 
+@dataclass
+class SegmentArrays:
+    """
+    Diarization segments as contiguous arrays.
+
+    `speaker_ids` index into `labels`; the label list can be shared between the
+    reference and the hypothesis so that equal labels get equal ids.
+    """
+
+    starts: "np.ndarray"
+    ends: "np.ndarray"
+    speaker_ids: "np.ndarray"
+    labels: List[str]
+
+
+def to_segment_arrays(segments: List[Dict[str, Any]], labels: List[str] | None = None) -> SegmentArrays:
+    """
+    Convert the segments returned by load_diarization_file into NumPy arrays.
+
+    Args:
+        segments: List of segments with 'start', 'end' and 'speaker' fields
+        labels: Label list to extend (shared with another file), or None for a new one
+
+    Returns:
+        The segment arrays
+    """
+    if np is None:
+        raise ImportError("Time-weighted DER requires NumPy")
+    if labels is None:
+        labels = []
+    label_ids = {label: i for i, label in enumerate(labels)}
+    speaker_ids = np.empty(len(segments), dtype=np.int32)
+    for i, seg in enumerate(segments):
+        label = str(seg['speaker'])
+        if label not in label_ids:
+            label_ids[label] = len(labels)
+            labels.append(label)
+        speaker_ids[i] = label_ids[label]
+    return SegmentArrays(
+        starts=np.array([float(seg['start']) for seg in segments], dtype=np.float64),
+        ends=np.array([float(seg['end']) for seg in segments], dtype=np.float64),
+        speaker_ids=speaker_ids,
+        labels=labels,
+    )
+
+
+def _interval_coverage(boundaries: "np.ndarray", starts: "np.ndarray", ends: "np.ndarray", ids: "np.ndarray", n_ids: int) -> "np.ndarray":
+    """
+    Count, for each elementary interval between consecutive boundaries, how many
+    segments of each id cover it. Every start/end must be one of the boundaries.
+
+    Returns:
+        Integer array of shape (len(boundaries) - 1, n_ids)
+    """
+    keep = ends > starts
+    diff = np.zeros((len(boundaries), n_ids), dtype=np.int32)
+    np.add.at(diff, (np.searchsorted(boundaries, starts[keep]), ids[keep]), 1)
+    np.add.at(diff, (np.searchsorted(boundaries, ends[keep]), ids[keep]), -1)
+    return np.cumsum(diff, axis=0)[:-1]
+
+
+def _sweep_activity(reference: SegmentArrays, hypothesis: SegmentArrays, collar: float = 0.0) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    """
+    Merge all segment boundaries and compute speaker activity per elementary interval.
+
+    Returns:
+        Tuple of (scored duration per interval, reference activity, hypothesis activity),
+        the activities being boolean arrays of shape (intervals, labels)
+    """
+    if reference.labels is not hypothesis.labels:
+        raise ValueError("Reference and hypothesis must share the same label list")
+    n_labels = len(reference.labels)
+
+    edges = [reference.starts, reference.ends, hypothesis.starts, hypothesis.ends]
+    ref_edges = np.concatenate([reference.starts, reference.ends])
+    if collar > 0:
+        edges += [ref_edges - collar, ref_edges + collar]
+    boundaries = np.unique(np.concatenate(edges))
+    if len(boundaries) < 2:
+        empty = np.zeros((0, n_labels), dtype=bool)
+        return np.zeros(0), empty, empty
+
+    ref_active = _interval_coverage(boundaries, reference.starts, reference.ends, reference.speaker_ids, n_labels) > 0
+    hyp_active = _interval_coverage(boundaries, hypothesis.starts, hypothesis.ends, hypothesis.speaker_ids, n_labels) > 0
+
+    weights = np.diff(boundaries)
+    if collar > 0:
+        no_score = _interval_coverage(
+            boundaries, ref_edges - collar, ref_edges + collar, np.zeros(len(ref_edges), dtype=np.int32), 1
+        )[:, 0]
+        weights = np.where(no_score > 0, 0.0, weights)
+
+    return weights, ref_active, hyp_active
+
+
+def optimal_speaker_mapping(reference: SegmentArrays, hypothesis: SegmentArrays) -> Dict[str, str]:
+    """
+    Find the one-to-one speaker mapping that maximizes the total overlap time.
+
+    The overlap between every reference and hypothesis speaker is computed from the
+    segment arrays and the assignment is solved with the Hungarian algorithm.
+
+    Args:
+        reference: Ground truth segment arrays
+        hypothesis: Test segment arrays (sharing the label list)
+
+    Returns:
+        Dict from hypothesis label to reference label; hypothesis speakers that do
+        not overlap their assigned reference speaker are left out
+    """
+    weights, ref_active, hyp_active = _sweep_activity(reference, hypothesis)
+    ref_ids = np.unique(reference.speaker_ids)
+    hyp_ids = np.unique(hypothesis.speaker_ids)
+    overlap = (hyp_active[:, hyp_ids].T * weights) @ ref_active[:, ref_ids]
+
+    mapping = {}
+    for row, col in linear_sum_assignment((-overlap).tolist()):
+        if overlap[row, col] > 0:
+            mapping[hypothesis.labels[hyp_ids[row]]] = reference.labels[ref_ids[col]]
+    return mapping
+
+
+def time_weighted_der(reference: SegmentArrays, hypothesis: SegmentArrays, collar: float = 0.0, mapping: Dict[str, str] | None = None) -> Dict[str, float]:
+    """
+    Compute the time-weighted Diarization Error Rate.
+
+    All segment boundaries are merged into one sorted array and every elementary
+    interval between them is scored at once: missed speech, false alarm and speaker
+    confusion are weighted by the interval duration. Overlapping segments of the same
+    speaker count once.
+
+    Args:
+        reference: Ground truth segment arrays
+        hypothesis: Test segment arrays (sharing the label list)
+        collar: Seconds around each reference boundary excluded from scoring
+        mapping: Hypothesis label to reference label, e.g. from optimal_speaker_mapping;
+            None compares the labels literally
+
+    Returns:
+        Dict with 'total' (scored reference speech), 'missed', 'false_alarm',
+        'confusion' (all in seconds) and 'der'
+    """
+    weights, ref_active, hyp_active = _sweep_activity(reference, hypothesis, collar)
+
+    if mapping is not None:
+        # Move each mapped hypothesis speaker to the column of its reference speaker
+        label_ids = {label: i for i, label in enumerate(reference.labels)}
+        mapped = np.zeros_like(hyp_active)
+        for hyp_label, ref_label in mapping.items():
+            mapped[:, label_ids[ref_label]] |= hyp_active[:, label_ids[hyp_label]]
+        correct = (ref_active & mapped).sum(axis=1)
+    else:
+        correct = (ref_active & hyp_active).sum(axis=1)
+
+    ref_count = ref_active.sum(axis=1)
+    hyp_count = hyp_active.sum(axis=1)
+
+    total = float(weights @ ref_count)
+    missed = float(weights @ np.maximum(ref_count - hyp_count, 0))
+    false_alarm = float(weights @ np.maximum(hyp_count - ref_count, 0))
+    confusion = float(weights @ (np.minimum(ref_count, hyp_count) - correct))
+    der = (missed + false_alarm + confusion) / total if total > 0 else 1.0
+
+    return {"total": total, "missed": missed, "false_alarm": false_alarm, "confusion": confusion, "der": der}
+
+
+# Sides of the boundary events of sweep_regions
+_REFERENCE, _HYPOTHESIS, _NO_SCORE = 0, 1, 2
+
+
+def _event_time(event: Tuple[float, int, str, int]) -> float:
+    return event[0]
+
+
+def _boundary_events(segments: List[Dict[str, Any]], side: int) -> Iterator[Tuple[float, int, str, int]]:
+    """
+    (time, side, speaker, +1/-1) start and end events of the non-empty segments, in
+    time order. Segments are sorted by start once; their ends wait in a heap holding
+    only the segments open at the current time.
+    """
+    ends: List[Tuple[float, str]] = []
+    for start, end, label in sorted(
+        (float(seg['start']), float(seg['end']), str(seg['speaker'])) for seg in segments
+    ):
+        if end <= start:
+            continue
+        while ends and ends[0][0] <= start:
+            closed, closed_label = heapq.heappop(ends)
+            yield closed, side, closed_label, -1
+        yield start, side, label, 1
+        heapq.heappush(ends, (end, label))
+    while ends:
+        closed, closed_label = heapq.heappop(ends)
+        yield closed, side, closed_label, -1
+
+
+def _collar_events(ground_truth: List[Dict[str, Any]], collar: float) -> Iterator[Tuple[float, int, str, int]]:
+    """Events of the no-score regions of `collar` seconds around every ground truth boundary, in time order."""
+    edges = sorted(float(seg[key]) for seg in ground_truth for key in ('start', 'end'))
+    return heapq.merge(
+        ((edge - collar, _NO_SCORE, "", 1) for edge in edges),
+        ((edge + collar, _NO_SCORE, "", -1) for edge in edges),
+        key=_event_time,
+    )
+
+
+def sweep_regions(ground_truth: List[Dict[str, Any]], test_data: List[Dict[str, Any]], collar: float = 0.0) -> Iterator[Tuple[float, Set[str], Set[str]]]:
+    """
+    Sweep the merged boundaries of both diarizations in time order.
+
+    The start/end events of each side are generated in time order and merged with
+    heapq.merge into one stream; between consecutive event times the sets of active
+    speakers are constant, so every such region is scored as a whole. Only the
+    segments sorted by start, the open segments and the active counts are kept in
+    memory, never per-frame or per-region arrays, so a day-long recording costs
+    O(segments).
+
+    Args:
+        ground_truth: Ground truth segments with 'start', 'end' and 'speaker' fields
+        test_data: Test segments
+        collar: Seconds around each ground truth boundary excluded from scoring
+
+    Yields:
+        Tuples of (duration, active ground truth speakers, active test speakers) for
+        every scored region with at least one active speaker; the sets are updated in
+        place by the sweep and must not be kept or modified
+    """
+    streams = [_boundary_events(ground_truth, _REFERENCE), _boundary_events(test_data, _HYPOTHESIS)]
+    if collar > 0:
+        streams.append(_collar_events(ground_truth, collar))
+
+    counts: Tuple[Dict[str, int], Dict[str, int]] = ({}, {})
+    active: Tuple[Set[str], Set[str]] = (set(), set())
+    no_score = 0
+    previous = None
+    for time, side, label, delta in heapq.merge(*streams, key=_event_time):
+        if previous is not None and time > previous and not no_score and (active[0] or active[1]):
+            yield time - previous, active[0], active[1]
+        previous = time
+        if side == _NO_SCORE:
+            no_score += delta
+            continue
+        # Overlapping segments of the same speaker count once
+        count = counts[side].get(label, 0) + delta
+        counts[side][label] = count
+        if count == 0:
+            active[side].discard(label)
+        elif count == 1 and delta == 1:
+            active[side].add(label)
+
+
+def event_speaker_mapping(ground_truth: List[Dict[str, Any]], test_data: List[Dict[str, Any]]) -> Dict[str, str]:
+    """
+    Find the one-to-one speaker mapping that maximizes the total overlap time, like
+    optimal_speaker_mapping but with the overlaps accumulated by sweep_regions.
+
+    Returns:
+        Dict from test label to ground truth label; test speakers that do not overlap
+        their assigned ground truth speaker are left out
+    """
+    # Same label order as the shared label list of to_segment_arrays
+    label_ids: Dict[str, int] = {}
+    for seg in (*ground_truth, *test_data):
+        label_ids.setdefault(str(seg['speaker']), len(label_ids))
+    ref_labels = sorted({str(seg['speaker']) for seg in ground_truth}, key=label_ids.__getitem__)
+    hyp_labels = sorted({str(seg['speaker']) for seg in test_data}, key=label_ids.__getitem__)
+    if not ref_labels or not hyp_labels:
+        return {}
+
+    overlap: Dict[Tuple[str, str], float] = {}
+    for duration, ref_active, hyp_active in sweep_regions(ground_truth, test_data):
+        for hyp_label in hyp_active:
+            for ref_label in ref_active:
+                overlap[hyp_label, ref_label] = overlap.get((hyp_label, ref_label), 0.0) + duration
+
+    cost = [[-overlap.get((hyp, ref), 0.0) for ref in ref_labels] for hyp in hyp_labels]
+    mapping = {}
+    for row, col in linear_sum_assignment(cost):
+        if cost[row][col] < 0:
+            mapping[hyp_labels[row]] = ref_labels[col]
+    return mapping
+
+
+def event_der(ground_truth: List[Dict[str, Any]], test_data: List[Dict[str, Any]], collar: float = 0.0, mapping: Dict[str, str] | None = None) -> Dict[str, float]:
+    """
+    Compute the time-weighted DER with the event-stream sweep (see sweep_regions).
+
+    Scores like time_weighted_der, without NumPy: in every region each active ground
+    truth speaker is correct, confused or missed and each extra test speaker a false
+    alarm, so overlapped speech is scored per speaker instead of being collapsed
+    into the dominant one.
+
+    Args:
+        ground_truth: Ground truth segments, e.g. from load_diarization_file
+        test_data: Test segments
+        collar: Seconds around each ground truth boundary excluded from scoring
+        mapping: Test label to ground truth label, e.g. from event_speaker_mapping;
+            None compares the labels literally
+
+    Returns:
+        Dict with 'total' (scored reference speech), 'missed', 'false_alarm',
+        'confusion', 'overlap' (scored time with two or more ground truth speakers,
+        all in seconds) and 'der'
+    """
+    total = missed = false_alarm = confusion = overlap = 0.0
+    for duration, ref_active, hyp_active in sweep_regions(ground_truth, test_data, collar):
+        if mapping is not None:
+            correct = len(ref_active.intersection(mapping[label] for label in hyp_active if label in mapping))
+        else:
+            correct = len(ref_active & hyp_active)
+        ref_count = len(ref_active)
+        hyp_count = len(hyp_active)
+        total += duration * ref_count
+        missed += duration * max(ref_count - hyp_count, 0)
+        false_alarm += duration * max(hyp_count - ref_count, 0)
+        confusion += duration * (min(ref_count, hyp_count) - correct)
+        if ref_count > 1:
+            overlap += duration
+    der = (missed + false_alarm + confusion) / total if total > 0 else 1.0
+
+    return {"total": total, "missed": missed, "false_alarm": false_alarm, "confusion": confusion, "overlap": overlap, "der": der}
+
+
+def format_mapping(mapping: Dict[str, str]) -> str:
+    """Format a speaker mapping as 'test -> ground truth' pairs."""
+    return ", ".join(f"{hyp} -> {ref}" for hyp, ref in sorted(mapping.items())) or "none"
+
+
+def print_time_weighted_summary(ground_truth_file: str, test_file: str, collar: float, result: Dict[str, float], mapping: Dict[str, str] | None = None):
+    """Print summary of the time-weighted DER computation."""
+    total = result["total"]
+
+    def share(seconds):
+        return f"{seconds/total*100:.2f}%" if total > 0 else "N/A"
+
+    print("\n" + "="*50)
+    print("TIME-WEIGHTED DER COMPUTATION RESULTS")
+    print("="*50)
+    print(f"Ground truth file: {ground_truth_file}")
+    print(f"Test file: {test_file}")
+    if mapping is not None:
+        print(f"Speaker mapping: {format_mapping(mapping)}")
+    print(f"Collar: {collar:.2f}s")
+    print(f"Scored reference speech: {total:.2f}s")
+    print(f"Missed speech: {result['missed']:.2f}s ({share(result['missed'])})")
+    print(f"False alarm: {result['false_alarm']:.2f}s ({share(result['false_alarm'])})")
+    print(f"Speaker confusion: {result['confusion']:.2f}s ({share(result['confusion'])})")
+    if "overlap" in result:
+        print(f"Overlapped speech (2+ ground truth speakers): {result['overlap']:.2f}s")
+    print(f"DER: {result['der']:.4f}")
+    print("="*50)
+
+
+def format_summary(ground_truth_file: str, test_file: str, der: float, correct: int, total: int, mapping: Dict[str, str] | None = None) -> str:
+    """Format the summary of the segment DER computation."""
+    lines = ["", "="*50, "DER COMPUTATION RESULTS", "="*50]
+    lines.append(f"Ground truth file: {ground_truth_file}")
+    lines.append(f"Test file: {test_file}")
+    if mapping is not None:
+        lines.append(f"Speaker mapping: {format_mapping(mapping)}")
+    lines.append(f"Total segments: {total}")
+    lines.append(f"Correct segments: {correct}")
+    lines.append(f"Incorrect segments: {total - correct}")
+    lines.append(f"Accuracy: {correct/total*100:.2f}%" if total > 0 else "Accuracy: N/A")
+    lines.append(f"DER: {der:.4f}")
+    lines.append("="*50)
+    return "\n".join(lines) + "\n"
+
+
+def cache_version() -> str:
+    """
+    Code version of the cache keys: the source of this module and of the assignment
+    solver used by the speaker mapping.
+    """
+    return code_version(sys.modules[__name__], assignment)
+
+
+def segment_der_row(ground_truth_file: str, test_file: str, cache: ResultCache | None = None, optimal_mapping: bool = False) -> Dict[str, Any]:
+    """
+    Compute the segment DER of a file pair as a structured result row.
+
+    Args:
+        ground_truth_file: Path to ground truth JSON file
+        test_file: Path to test JSON file
+        cache: Result cache, reused when both file contents, the options and the code are unchanged
+        optimal_mapping: Map test speakers to ground truth speakers with
+            event_speaker_mapping instead of comparing the labels literally
+
+    Returns:
+        Dict with the file paths, DER, correct and total segment counts, the
+        per-speaker accuracy (see speaker_accuracy) and, with optimal_mapping,
+        the speaker mapping
+    """
+
+    def compute() -> Dict[str, Any]:
+        ground_truth = load_diarization_file(ground_truth_file)
+        test_data = load_diarization_file(test_file)
+        mapping = event_speaker_mapping(ground_truth, test_data) if optimal_mapping else None
+        speakers = speaker_accuracy(ground_truth, test_data, mapping)
+        correct = sum(stats["correct"] for stats in speakers.values())
+        total = len(test_data)
+        row = {
+            "metric": "der-segment",
+            "ground_truth_file": ground_truth_file,
+            "test_file": test_file,
+            "DER": 1 - (correct / total) if total > 0 else 1.0,
+            "correct": correct,
+            "total": total,
+            "speaker_accuracy": speakers,
+        }
+        if mapping is not None:
+            row["mapping"] = mapping
+        return row
+
+    options = {"optimal_mapping": True} if optimal_mapping else {}
+    files = {"ground_truth_file": ground_truth_file, "test_file": test_file}
+    return cached_row(cache, "der-segment", options, cache_version, files, compute)
+
+
+def render_segment_summary(row: Dict[str, Any]) -> str:
+    """Format the summary of a row from segment_der_row."""
+    return format_summary(
+        row["ground_truth_file"], row["test_file"], row["DER"], row["correct"], row["total"], row.get("mapping")
+    )
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Compute Diarization Error Rate (DER) between ground truth and test files"
@@ -112,31 +652,54 @@ def main():
     parser.add_argument("ground_truth", help="Path to ground truth JSON file")
     parser.add_argument("test_file", help="Path to test JSON file")
     parser.add_argument("-v", "--verbose", action="store_true", help="Enable verbose output")
+    parser.add_argument(
+        "--mode",
+        choices=["segment", "time", "events"],
+        default="segment",
+        help="'segment' counts test segments with the right speaker, "
+        "'time' weights missed speech, false alarm and confusion by duration, "
+        "'events' computes the time DER with an event-stream sweep in O(segments) memory, "
+        "without NumPy, and also reports overlapped speech (default: segment)",
+    )
+    parser.add_argument(
+        "--optimal-mapping",
+        action="store_true",
+        help="Map test speakers to ground truth speakers with the one-to-one assignment "
+        "that maximizes overlap time, instead of comparing labels literally",
+    )
+    parser.add_argument(
+        "--collar",
+        type=float,
+        default=0.0,
+        help="Seconds around each ground truth boundary excluded in time and events modes (default: 0.0)",
+    )
     
     args = parser.parse_args()
+
+    mapping = None
+    if args.mode == "events":
+        ground_truth = load_diarization_file(args.ground_truth)
+        test_data = load_diarization_file(args.test_file)
+        if args.optimal_mapping:
+            mapping = event_speaker_mapping(ground_truth, test_data)
+        result = event_der(ground_truth, test_data, args.collar, mapping)
+        print_time_weighted_summary(args.ground_truth, args.test_file, args.collar, result, mapping)
+        return
+
+    if args.mode == "time" or args.optimal_mapping:
+        labels = []
+        reference = to_segment_arrays(load_diarization_file(args.ground_truth), labels)
+        hypothesis = to_segment_arrays(load_diarization_file(args.test_file), labels)
+        if args.optimal_mapping:
+            mapping = optimal_speaker_mapping(reference, hypothesis)
+
+    if args.mode == "time":
+        result = time_weighted_der(reference, hypothesis, args.collar, mapping)
+        print_time_weighted_summary(args.ground_truth, args.test_file, args.collar, result, mapping)
+        return
     
-    original_stdout = sys.stdout
-    if not args.verbose:
-        # Suppress individual segment results if not verbose
-        sys.stdout = open('/dev/null', 'w')
-        
-    der, correct, total = compute_der(args.ground_truth, args.test_file)
-    
-    if not args.verbose:
-        sys.stdout.close()
-        sys.stdout = original_stdout
-    
-    print("\n" + "="*50)
-    print("DER COMPUTATION RESULTS")
-    print("="*50)
-    print(f"Ground truth file: {args.ground_truth}")
-    print(f"Test file: {args.test_file}")
-    print(f"Total segments: {total}")
-    print(f"Correct segments: {correct}")
-    print(f"Incorrect segments: {total - correct}")
-    print(f"Accuracy: {correct/total*100:.2f}%" if total > 0 else "Accuracy: N/A")
-    print(f"DER: {der:.4f}")
-    print("="*50)
+    der, correct, total = compute_der(args.ground_truth, args.test_file, mapping, args.verbose)
+    print(format_summary(args.ground_truth, args.test_file, der, correct, total, mapping), end="")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,177 @@
+"""
+Persistent, content-addressed cache for metric results.
+
+Entries are keyed by a hash of the input file contents, the metric name, its
+options and the source code of the modules computing it, so a result is reused
+only if nothing that could change it has changed. The cache directory is bounded
+in size and evicts the least recently used entries.
+
+Metrics computed one file pair at a time go through cached_row.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from types import ModuleType
+from typing import Any, Callable, Dict, Optional
+
+DEFAULT_CACHE_DIR = ".metric_cache"
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# Puts between two scans of the directory, which also account for the entries
+# written by other processes sharing it
+EVICT_INTERVAL = 64
+
+
+def code_version(*modules: ModuleType) -> str:
+    """
+    Hash the source files of the given modules.
+
+    Returns:
+        Hex digest that changes whenever one of the sources changes
+    """
+    digest = hashlib.sha256()
+    for module in modules:
+        with open(module.__file__, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    On-disk cache of JSON-serializable metric results with LRU eviction.
+
+    Every entry is a JSON file named after its key. Reads refresh the file
+    modification time, which is used as the recency for eviction. The size of the
+    directory is measured by the first put and then kept as a running total, so
+    the directory is only scanned again when the total goes over max_bytes or
+    every EVICT_INTERVAL puts.
+    """
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._size: Optional[int] = None
+        self._puts = 0
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(metric: str, options: Dict[str, Any], version: str, *contents: str) -> str:
+        """
+        Build the cache key for a metric run.
+
+        Args:
+            metric: Metric name, e.g. "wer"
+            options: Metric options that can change the result (JSON-serializable)
+            version: Code version, see code_version
+            *contents: Contents of the input files, in a fixed order
+
+        Returns:
+            Hex digest identifying the run
+        """
+        digest = hashlib.sha256()
+        header = json.dumps([metric, options, version], sort_keys=True)
+        digest.update(header.encode("utf-8"))
+        for content in contents:
+            # Length prefix so that different splits of the same bytes differ
+            data = content.encode("utf-8")
+            digest.update(len(data).to_bytes(8, "little"))
+            digest.update(data)
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for `key`, or None if missing or unreadable."""
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        os.utime(path)
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value: Any):
+        """Store `value` under `key`, then evict old entries if over the size limit."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        data = json.dumps(value).encode("utf-8")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        # Atomic rename, so concurrent readers never see a partial entry
+        os.replace(tmp_path, self._path(key))
+        self._puts += 1
+        if self._size is not None:
+            # Overestimates when the key was already cached, which only scans earlier
+            self._size += len(data)
+        if self._size is None or self._size > self.max_bytes or self._puts % EVICT_INTERVAL == 0:
+            self.evict()
+
+    def evict(self):
+        """Delete the least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    # Evicted by another process sharing the directory
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._size = total
+
+
+def cached_row(
+    cache: Optional[ResultCache],
+    metric: str,
+    options: Dict[str, Any],
+    version: Callable[[], str],
+    files: Dict[str, str],
+    compute: Callable[[], Dict[str, Any]],
+) -> Dict[str, Any]:
+    """
+    Return the result row of a metric run from the cache, or compute and store it.
+
+    Args:
+        cache: Result cache, None to always compute
+        metric: Metric name, part of the key
+        options: Metric options that can change the result, part of the key
+        version: Returns the code version of the metric, see code_version
+        files: Row field to input file path, e.g. {"ground_truth_file": ..., "test_file": ...};
+            the file contents are part of the key
+        compute: Computes the row on a cache miss
+
+    Returns:
+        The row, with the `files` fields set to the given paths
+    """
+    if cache is None:
+        return compute()
+    contents = []
+    for path in files.values():
+        with open(path, encoding="utf-8") as f:
+            contents.append(f.read())
+    key = cache.key(metric, options, version(), *contents)
+    row = cache.get(key)
+    if row is not None:
+        # Paths are not part of the key, the same contents may be cached under another name
+        row.update(files)
+        return row
+    row = compute()
+    cache.put(key, row)
+    return row
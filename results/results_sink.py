@@ -0,0 +1,109 @@
+"""
+Structured results writer: one row per (system, run, file) next to the text reports
+
+Rows are plain dicts produced by the metric modules (see compute_wer.score_batch,
+cpwer.cpwer_row, der.segment_der_row and compute_der_gemini.der_row). They are
+streamed to a JSON Lines file and can optionally be collected into CSV and Parquet files.
+The "details" field holds what is only needed to render the text reports (aligned
+texts, previews) and is left out of the structured output unless requested.
+"""
+
+import csv
+import json
+from typing import Any, Dict, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+
+class ResultsWriter:
+    """
+    Write metric rows to JSON Lines, and optionally to CSV and Parquet.
+
+    JSON Lines rows are written as they are added; CSV and Parquet need the full set
+    of columns, so those rows are kept in memory and written on close.
+    Use as a context manager.
+    """
+
+    def __init__(
+        self,
+        jsonl_path: str,
+        csv_path: Optional[str] = None,
+        parquet_path: Optional[str] = None,
+        include_details: bool = False,
+    ):
+        if parquet_path and pa is None:
+            raise RuntimeError("pyarrow is required to write Parquet files")
+        self.csv_path = csv_path
+        self.parquet_path = parquet_path
+        self.include_details = include_details
+        self.rows: List[Dict[str, Any]] = []
+        self._jsonl = open(jsonl_path, "w", encoding="utf-8")
+
+    def add(self, row: Dict[str, Any], **context: Any):
+        """
+        Add a result row.
+
+        Args:
+            row: Metric row
+            **context: Identifying fields put first in the row, e.g. system, run, file
+        """
+        record = dict(context)
+        record.update(row)
+        if not self.include_details:
+            record.pop("details", None)
+        self._jsonl.write(json.dumps(record, ensure_ascii=False) + "\n")
+        if self.csv_path or self.parquet_path:
+            self.rows.append(record)
+
+    def close(self):
+        self._jsonl.close()
+        if self.csv_path:
+            write_csv(self.csv_path, self.rows)
+        if self.parquet_path:
+            write_parquet(self.parquet_path, self.rows)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _columns(rows: List[Dict[str, Any]]) -> List[str]:
+    """Union of the row keys, in first-seen order."""
+    columns: Dict[str, None] = {}
+    for row in rows:
+        columns.update(dict.fromkeys(row))
+    return list(columns)
+
+
+def _flat(value: Any) -> Any:
+    """Encode nested values (per-speaker accuracy, details) as JSON strings."""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def write_csv(path: str, rows: List[Dict[str, Any]]):
+    columns = _columns(rows)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({key: _flat(value) for key, value in row.items()})
+
+
+def write_parquet(path: str, rows: List[Dict[str, Any]]):
+    columns = _columns(rows)
+    table = pa.table({key: [_flat(row.get(key)) for row in rows] for key in columns})
+    pq.write_table(table, path)
+
+
+def read_jsonl(path: str) -> List[Dict[str, Any]]:
+    """Load the rows of a JSON Lines results file."""
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
@@ -0,0 +1,331 @@
+"""
+Runs the experiments declared in experiments.toml in a single process pool.
+
+The manifest is expanded into one job per (report, system, run); the jobs are
+scored in parallel and every report is written as soon as all of its jobs are done.
+WER and CER jobs sharing a ground truth are scored as one batch, so the reference is
+normalized and interned once per batch instead of once per run.
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+import tomllib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from aggregate import write_aggregate
+from compute_der_gemini import der_row, render_summary
+from compute_wer import render, render_cer_report, score_batch
+from cpwer import cpwer_row, render_cpwer
+from der import render_segment_summary, segment_der_row
+from result_cache import ResultCache
+from results_sink import ResultsWriter
+
+DEFAULT_MANIFEST = "experiments.toml"
+REPORT_RULE = "==================="
+
+
+@dataclass
+class Job:
+    """One metric computation: a run of a system against its ground truth."""
+
+    report: int
+    system: str
+    run: int
+    file: str
+    path: str
+    ground_truth: str
+    metric: str
+    options: Dict[str, Any] = field(default_factory=dict)
+    condition: Optional[str] = None
+
+
+def _wer_rows(ground_truth: str, paths: List[str], cache: Optional[ResultCache], **options) -> List[Dict[str, Any]]:
+    return score_batch(ground_truth, paths, workers=1, cache=cache, **options)
+
+
+def _cer_rows(ground_truth: str, paths: List[str], cache: Optional[ResultCache], **options) -> List[Dict[str, Any]]:
+    return score_batch(ground_truth, paths, workers=1, cache=cache, metric="cer", **options)
+
+
+# Metric name -> (row function, report renderer); the row functions of the
+# BATCH_METRICS score a list of runs and return a list of rows
+METRICS: Dict[str, Tuple[Callable[..., Any], Callable[[Dict[str, Any]], str]]] = {
+    "wer": (_wer_rows, render),
+    "cer": (_cer_rows, render_cer_report),
+    "cpwer": (cpwer_row, render_cpwer),
+    "der-gemini": (der_row, render_summary),
+    "der-segment": (segment_der_row, render_segment_summary),
+}
+
+# Metrics scored in batches of runs sharing report, ground truth and options: the
+# reference is read, normalized and interned once for all the runs of a batch
+BATCH_METRICS = {"wer", "cer"}
+
+
+def load_manifest(path: str) -> List[Dict[str, Any]]:
+    """
+    Load the reports declared in a TOML manifest.
+
+    Returns:
+        List of report tables, in manifest order
+    """
+    with open(path, "rb") as f:
+        reports = tomllib.load(f).get("reports", [])
+    for report in reports:
+        if report["metric"] not in METRICS:
+            raise ValueError(f"Unknown metric '{report['metric']}' in report '{report['name']}'")
+    return reports
+
+
+def natural_key(path: str) -> List[Any]:
+    """Sort key that orders the numbers in a path by value (run_2 before run_10)."""
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", path)]
+
+
+def expand_jobs(report: Dict[str, Any], report_index: int = 0) -> List[Job]:
+    """
+    Expand the systems of a report into jobs.
+
+    Args:
+        report: Report table from load_manifest
+        report_index: Position of the report, stored in the jobs
+
+    Returns:
+        Jobs in report order (systems in manifest order, runs in natural order)
+    """
+    base_path = report.get("base_path", "")
+    jobs = []
+    for system in report["systems"]:
+        ground_truth = system.get("ground_truth", report.get("ground_truth"))
+        if ground_truth is None:
+            raise ValueError(f"No ground truth for system '{system['name']}'")
+        options = {**report.get("options", {}), **system.get("options", {})}
+        paths = glob.glob(os.path.join(base_path, system["glob"]))
+        if not paths:
+            raise ValueError(f"No files match '{system['glob']}' for system '{system['name']}'")
+        for run, path in enumerate(sorted(paths, key=natural_key), start=1):
+            jobs.append(
+                Job(
+                    report=report_index,
+                    system=system["name"],
+                    run=run,
+                    file=os.path.relpath(path, base_path) if base_path else path,
+                    path=path,
+                    ground_truth=ground_truth,
+                    metric=report["metric"],
+                    options=options,
+                    condition=system.get("condition"),
+                )
+            )
+    return jobs
+
+
+def run_job(job: Job, cache: Optional[ResultCache] = None) -> Dict[str, Any]:
+    """Compute the result row of a job."""
+    row_function, _ = METRICS[job.metric]
+    return row_function(job.ground_truth, job.path, cache, **job.options)
+
+
+def write_report(
+    report: Dict[str, Any],
+    jobs: List[Job],
+    rows: List[Dict[str, Any]],
+    csv: bool = False,
+    parquet: bool = False,
+):
+    """
+    Write the text report and the structured results of a report.
+
+    Args:
+        report: Report table from load_manifest
+        jobs: Jobs of the report, from expand_jobs
+        rows: Result row of every job
+        csv: Also write the results as CSV next to the JSON Lines file
+        parquet: Also write the results as Parquet next to the JSON Lines file
+    """
+    _, render = METRICS[report["metric"]]
+    stem = os.path.splitext(report["results"])[0]
+    with ResultsWriter(
+        report["results"], stem + ".csv" if csv else None, stem + ".parquet" if parquet else None
+    ) as results, open(report["output"], "w") as f:
+        f.write(f"{report['title']}\n")
+        f.write(f"{REPORT_RULE}\n\n")
+
+        system = None
+        for job, row in zip(jobs, rows):
+            if job.system != system:
+                system = job.system
+                f.write(f"\n## {system}\n")
+            results.add(
+                row,
+                system=job.system,
+                condition=job.condition,
+                run=job.run,
+                file=job.file,
+                reference=job.ground_truth,
+            )
+            f.write(report["heading"].format(run=job.run, file=job.file))
+            f.write(render(row))
+
+
+def group_jobs(jobs: List[Job], workers: int = 1) -> List[List[int]]:
+    """
+    Split the jobs of a report into tasks: the jobs of a batch metric sharing the
+    ground truth and the options are split into `workers` batches of about the same
+    size, so that the pool scores them in parallel; every other job is a task of
+    its own.
+
+    Returns:
+        Job indices of every task, tasks in order of their first job
+    """
+    batches: Dict[Tuple[str, str], List[int]] = {}
+    tasks = []
+    for index, job in enumerate(jobs):
+        if job.metric not in BATCH_METRICS:
+            tasks.append([index])
+            continue
+        key = (job.ground_truth, json.dumps(job.options, sort_keys=True))
+        if key not in batches:
+            batches[key] = []
+            tasks.append(batches[key])
+        batches[key].append(index)
+
+    chunked = []
+    for task in tasks:
+        size = -(-len(task) // workers)
+        chunked.extend(task[start:start + size] for start in range(0, len(task), size))
+    return chunked
+
+
+def run_task(jobs: List[Job], cache: Optional[ResultCache] = None) -> List[Dict[str, Any]]:
+    """Compute the result rows of a task from group_jobs, in the order of `jobs`."""
+    if jobs[0].metric in BATCH_METRICS:
+        batch, _ = METRICS[jobs[0].metric]
+        return batch(jobs[0].ground_truth, [job.path for job in jobs], cache, **jobs[0].options)
+    return [run_job(job, cache) for job in jobs]
+
+
+def run_reports(
+    reports: List[Dict[str, Any]],
+    cache: Optional[ResultCache] = None,
+    workers: Optional[int] = None,
+    csv: bool = False,
+    parquet: bool = False,
+):
+    """
+    Score every job of the given reports in parallel and write the reports.
+
+    Args:
+        reports: Report tables from load_manifest
+        cache: Result cache shared by all jobs
+        workers: Worker processes (default: number of CPUs, 1 runs in-process)
+        csv: Also write the results as CSV
+        parquet: Also write the results as Parquet
+    """
+    jobs = [expand_jobs(report, index) for index, report in enumerate(reports)]
+    rows = [[None] * len(report_jobs) for report_jobs in jobs]
+    pending = [len(report_jobs) for report_jobs in jobs]
+    pool_size = 1 if workers == 1 else workers or os.cpu_count() or 1
+    tasks = [
+        (report_index, task)
+        for report_index, report_jobs in enumerate(jobs)
+        for task in group_jobs(report_jobs, pool_size)
+    ]
+
+    def done(report_index, task, task_rows):
+        for job_index, row in zip(task, task_rows):
+            rows[report_index][job_index] = row
+        pending[report_index] -= len(task)
+        if pending[report_index] == 0:
+            write_report(reports[report_index], jobs[report_index], rows[report_index], csv, parquet)
+
+    def task_jobs(report_index, task):
+        return [jobs[report_index][job_index] for job_index in task]
+
+    if workers == 1:
+        for report_index, task in tasks:
+            done(report_index, task, run_task(task_jobs(report_index, task), cache))
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(run_task, task_jobs(report_index, task), cache): (report_index, task)
+            for report_index, task in tasks
+        }
+        for future in as_completed(futures):
+            done(*futures[future], future.result())
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Run the experiments declared in a manifest")
+    parser.add_argument(
+        "--manifest",
+        default=None,
+        help=f"Manifest file (default: {DEFAULT_MANIFEST} in the results directory)",
+    )
+    parser.add_argument(
+        "-r",
+        "--report",
+        action="append",
+        help="Run only this report (repeatable, default: all reports)",
+    )
+    parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes (default: number of CPUs)",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Recompute every pair")
+    parser.add_argument(
+        "--csv", action="store_true", help="Also write the structured results as CSV"
+    )
+    parser.add_argument(
+        "--parquet",
+        action="store_true",
+        help="Also write the structured results as Parquet (needs pyarrow)",
+    )
+    parser.add_argument(
+        "--aggregate",
+        action="store_true",
+        help="Then aggregate the runs of every system (see aggregate.py)",
+    )
+    parser.add_argument(
+        "--list", action="store_true", help="Only print the jobs the manifest expands to"
+    )
+    args = parser.parse_args(argv)
+
+    # The manifest paths are relative to the results directory
+    manifest = os.path.abspath(args.manifest) if args.manifest else DEFAULT_MANIFEST
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        reports = load_manifest(manifest)
+        if args.report:
+            unknown = set(args.report) - {report["name"] for report in reports}
+            if unknown:
+                raise ValueError(f"Unknown report(s): {', '.join(sorted(unknown))}")
+            reports = [report for report in reports if report["name"] in args.report]
+
+        if args.list:
+            for index, report in enumerate(reports):
+                for job in expand_jobs(report, index):
+                    print(f"{report['name']}\t{job.system}\t{job.run}\t{job.path}\t{job.ground_truth}")
+            return
+
+        cache = None if args.no_cache else ResultCache()
+        run_reports(reports, cache, args.workers, args.csv, args.parquet)
+        if args.aggregate:
+            write_aggregate([report["results"] for report in reports])
+    except (ValueError, RuntimeError, ImportError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Synthetic Italian-like transcripts and diarizations with controlled error rates
+
+Used by benchmark.py to measure the metric scripts on inputs much longer than the
+recorded session: words are built from Italian syllables with a Zipf-like frequency
+distribution, hypotheses are derived from the reference with a given share of
+substitutions, deletions and insertions, and diarizations alternate speakers with a
+given share of wrong labels. Everything is deterministic for a given seed.
+"""
+
+import json
+import random
+from functools import lru_cache
+from typing import Any, Dict, List, Sequence, Tuple
+
+from compute_der_gemini import TranscriptSegment
+
+_ONSETS = ["", "b", "c", "d", "f", "g", "l", "m", "n", "p", "r", "s", "t", "v", "ch", "gl", "gn", "pr", "st", "tr"]
+_VOWELS = ["a", "e", "i", "o", "u", "a", "e", "o", "i"]
+_ENDINGS = ["a", "e", "i", "o", "o", "are", "ere", "ire", "ato", "ente", "zione", "mente", "è", "à", "ò"]
+# Short function words, the most frequent in real Italian transcripts
+_FUNCTION_WORDS = ["di", "e", "il", "la", "che", "un", "a", "per", "in", "non", "è", "l'", "con", "si", "da"]
+
+DEFAULT_VOCABULARY = 5000
+DEFAULT_SPEAKERS = ["Professore", "Studente 1", "Studente 2", "Studente 3"]
+
+
+@lru_cache(maxsize=8)
+def italian_vocabulary(size: int = DEFAULT_VOCABULARY, seed: int = 0) -> Tuple[str, ...]:
+    """
+    Distinct Italian-like words, most frequent first (function words, then words of
+    one to four syllables with an Italian ending).
+    """
+    rng = random.Random(seed)
+    words = list(_FUNCTION_WORDS[:size])
+    seen = set(words)
+    while len(words) < size:
+        syllables = rng.choice((1, 2, 2, 3, 3, 4))
+        stem = "".join(rng.choice(_ONSETS) + rng.choice(_VOWELS) for _ in range(syllables - 1))
+        word = stem + rng.choice(_ONSETS[1:]) + rng.choice(_ENDINGS)
+        if word not in seen:
+            seen.add(word)
+            words.append(word)
+    return tuple(words)
+
+
+class ZipfSampler:
+    """Draws words with probability proportional to 1 / rank**exponent."""
+
+    def __init__(self, words: Sequence[str], exponent: float = 1.0):
+        self.words = words
+        weights = [1.0 / (rank ** exponent) for rank in range(1, len(words) + 1)]
+        self.cumulative = []
+        total = 0.0
+        for weight in weights:
+            total += weight
+            self.cumulative.append(total)
+
+    def sample(self, rng: random.Random, n: int) -> List[str]:
+        return rng.choices(self.words, cum_weights=self.cumulative, k=n)
+
+
+@lru_cache(maxsize=8)
+def zipf_sampler(vocabulary: int = DEFAULT_VOCABULARY, seed: int = 0) -> ZipfSampler:
+    """Shared sampler over italian_vocabulary(vocabulary, seed)."""
+    return ZipfSampler(italian_vocabulary(vocabulary, seed))
+
+
+def synthetic_reference(n_words: int, seed: int = 0, vocabulary: int = DEFAULT_VOCABULARY) -> List[str]:
+    """Reference transcript of `n_words` normalized words."""
+    rng = random.Random(seed)
+    return zipf_sampler(vocabulary, seed).sample(rng, n_words)
+
+
+def corrupt_words(
+    reference: List[str],
+    error_rate: float,
+    seed: int = 0,
+    vocabulary: int = DEFAULT_VOCABULARY,
+    weights: Tuple[float, float, float] = (0.6, 0.2, 0.2),
+) -> Tuple[List[str], Dict[str, int]]:
+    """
+    Hypothesis with about `error_rate` * len(reference) errors.
+
+    Every reference word independently becomes an error with probability
+    `error_rate`; the error kind is drawn with `weights` (substitution, deletion,
+    insertion). Substitutions and insertions use words of the same vocabulary.
+
+    Returns:
+        Tuple of (hypothesis words, counts of the injected S/D/I); the WER of the
+        pair is at most (S+D+I)/N, less when a cheaper alignment exists
+    """
+    return _corrupt(reference, error_rate, random.Random(seed + 1), zipf_sampler(vocabulary, seed), weights)
+
+
+def _corrupt(
+    reference: List[str],
+    error_rate: float,
+    rng: random.Random,
+    sampler: ZipfSampler,
+    weights: Tuple[float, float, float],
+) -> Tuple[List[str], Dict[str, int]]:
+    counts = {"S": 0, "D": 0, "I": 0}
+    hypothesis = []
+    for word in reference:
+        if rng.random() >= error_rate:
+            hypothesis.append(word)
+            continue
+        kind = rng.choices("SDI", weights=weights)[0]
+        counts[kind] += 1
+        if kind == "S":
+            substitute = word
+            while substitute == word:
+                substitute = sampler.sample(rng, 1)[0]
+            hypothesis.append(substitute)
+        elif kind == "I":
+            hypothesis.append(word)
+            hypothesis.extend(sampler.sample(rng, 1))
+    return hypothesis, counts
+
+
+def synthetic_diarization(
+    n_segments: int, speakers: int = 3, seed: int = 0
+) -> List[Dict[str, Any]]:
+    """
+    Ground truth diarization in the der.py JSON format: consecutive turns of 0.5-8 s
+    separated by short pauses, with occasional overlaps, speakers "SPEAKER_00"...
+    """
+    rng = random.Random(seed)
+    segments = []
+    time = 0.0
+    speaker = 0
+    for _ in range(n_segments):
+        start = time + rng.uniform(-0.5, 1.0) if segments else 0.0
+        start = max(start, 0.0)
+        end = start + rng.uniform(0.5, 8.0)
+        if rng.random() < 0.6:
+            speaker = rng.choice([s for s in range(speakers) if s != speaker] or [speaker])
+        segments.append({"start": round(start, 3), "end": round(end, 3), "speaker": f"SPEAKER_{speaker:02d}"})
+        time = end
+    return segments
+
+
+def corrupt_diarization(
+    segments: List[Dict[str, Any]], error_rate: float, jitter: float = 0.2, seed: int = 0
+) -> List[Dict[str, Any]]:
+    """
+    Test diarization: every boundary moved by up to `jitter` seconds and about
+    `error_rate` of the segments given another speaker of the ground truth.
+    """
+    rng = random.Random(seed + 1)
+    labels = sorted({segment["speaker"] for segment in segments})
+    result = []
+    for segment in segments:
+        start = max(0.0, segment["start"] + rng.uniform(-jitter, jitter))
+        end = max(start + 0.01, segment["end"] + rng.uniform(-jitter, jitter))
+        speaker = segment["speaker"]
+        if len(labels) > 1 and rng.random() < error_rate:
+            speaker = rng.choice([label for label in labels if label != speaker])
+        result.append({"start": round(start, 3), "end": round(end, 3), "speaker": speaker})
+    return result
+
+
+def synthetic_dialogue(
+    n_segments: int,
+    error_rate: float,
+    seed: int = 0,
+    speakers: List[str] = DEFAULT_SPEAKERS,
+    words_per_segment: Tuple[int, int] = (3, 25),
+) -> Tuple[List[TranscriptSegment], List[TranscriptSegment]]:
+    """
+    Ground truth and Gemini-style test transcripts for compute_der_gemini.
+
+    Test segments carry [mm:ss] timestamps and a word-level corruption of the ground
+    truth text (see corrupt_words); about `error_rate` of them get a wrong speaker.
+
+    Returns:
+        Tuple of (ground truth segments, test segments)
+    """
+    rng = random.Random(seed)
+    sampler = zipf_sampler(DEFAULT_VOCABULARY, seed)
+    ground_truth = []
+    test = []
+    time = 0.0
+    speaker = speakers[0]
+    for _ in range(n_segments):
+        if rng.random() < 0.6:
+            speaker = rng.choice([s for s in speakers if s != speaker])
+        words = sampler.sample(rng, rng.randint(*words_per_segment))
+        hypothesis, _ = _corrupt(words, error_rate, rng, sampler, (0.6, 0.2, 0.2))
+        test_speaker = speaker
+        if rng.random() < error_rate:
+            test_speaker = rng.choice([s for s in speakers if s != speaker])
+        timestamp = f"{int(time // 60):02d}:{int(time % 60):02d}"
+        ground_truth.append(TranscriptSegment(speaker=speaker, text=" ".join(words)))
+        test.append(TranscriptSegment(speaker=test_speaker, text=" ".join(hypothesis), timestamp=timestamp))
+        time += len(words) * 0.4
+    return ground_truth, test
+
+
+def write_diarization(path: str, segments: List[Dict[str, Any]]):
+    """Write a diarization in the der.py JSON format."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(segments, f)
+
+
+def write_whisperx(path: str, words: List[str], seed: int = 0, words_per_segment: int = 20):
+    """
+    Write words as a whisperx word-level JSON ({"segments": [...]}, every word with
+    start/end in seconds and a confidence score), about 0.4 s per word.
+    """
+    rng = random.Random(seed)
+    segments = []
+    time = 0.0
+    for first in range(0, len(words), words_per_segment):
+        timed = []
+        for word in words[first:first + words_per_segment]:
+            end = time + rng.uniform(0.2, 0.6)
+            timed.append({"word": word, "start": round(time, 3), "end": round(end, 3), "score": round(rng.random(), 3)})
+            time = end
+        text = " ".join(item["word"] for item in timed)
+        segments.append({"start": timed[0]["start"], "end": timed[-1]["end"], "text": text, "words": timed})
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"segments": segments}, f, ensure_ascii=False)
+
+
+def write_dialogue(path: str, segments: List[TranscriptSegment]):
+    """Write segments as "[mm:ss] Speaker: text" lines (no timestamp if missing)."""
+    with open(path, "w", encoding="utf-8") as f:
+        for segment in segments:
+            prefix = f"[{segment.timestamp}] " if segment.timestamp else ""
+            f.write(f"{prefix}{segment.speaker}: {segment.text}\n")
@@ -0,0 +1,13 @@
+"""
+Runs all the CER tests, saving to output/all_cer_results.txt
+and one structured row per run to output/all_cer_results.jsonl
+
+The systems and files are declared in experiments.toml (report "cer").
+"""
+
+import sys
+
+from run_experiments import main
+
+if __name__ == "__main__":
+    main(["--report", "cer", *sys.argv[1:]])
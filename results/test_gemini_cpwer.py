@@ -0,0 +1,14 @@
+"""
+Runs all the tests to compute the speaker-attributed WER (cpWER) for Gemini models,
+saving to output/gemini_cpwer_results.txt and one structured row per run to
+output/gemini_cpwer_results.jsonl
+
+The systems and files are declared in experiments.toml (report "gemini-cpwer").
+"""
+
+import sys
+
+from run_experiments import main
+
+if __name__ == "__main__":
+    main(["--report", "gemini-cpwer", *sys.argv[1:]])
@@ -0,0 +1,6 @@
+"""The metric scripts are flat modules in the results directory."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
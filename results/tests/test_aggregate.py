@@ -0,0 +1,44 @@
+"""Aggregation of result rows, including rows of the --max-wer screening."""
+
+import pytest
+
+import aggregate
+import compute_wer
+
+
+def _row(system, wer):
+    return {"metric": "wer", "system": system, "condition": "processed", "WER": wer}
+
+
+def test_aggregate_mean_per_system():
+    rows = [_row("A", 0.1), _row("A", 0.3), _row("B", 0.2)]
+    summary = aggregate.aggregate(rows, "system", resamples=0)
+    assert [(row["group"], row["n"], pytest.approx(row["mean"])) for row in summary] == [
+        ("A", 2, pytest.approx(0.2)),
+        ("B", 1, pytest.approx(0.2)),
+    ]
+
+
+def test_screened_row_within_cutoff_has_exact_wer():
+    row = compute_wer.wer_cutoff_row("a b c d", "a x c d", 0.5)
+    assert not row["exceeds_cutoff"]
+    assert aggregate.metric_value(row) == pytest.approx(0.25)
+
+
+def test_cutoff_rows_are_skipped_and_counted():
+    cutoff = compute_wer.wer_cutoff_row("a b c d", "w x y z", 0.25)
+    assert cutoff["exceeds_cutoff"] and cutoff["WER"] is None
+    rows = [
+        _row("A", 0.1),
+        _row("A", 0.3),
+        {**cutoff, "system": "A", "condition": "processed"},
+        {**cutoff, "system": "B", "condition": "processed"},
+    ]
+    summary = aggregate.aggregate(rows, "system", resamples=100)
+    assert [(row["group"], row["n"], row.get("rejected")) for row in summary] == [("A", 2, 1), ("B", 0, 1)]
+    assert summary[0]["mean"] == pytest.approx(0.2)
+    assert summary[1]["mean"] is None and summary[1]["ci_low"] is None
+
+    table = aggregate.format_table(summary)
+    assert "rejected" in table
+    assert "B    0         1        -" in table
@@ -0,0 +1,40 @@
+"""Turn matching of compute_der_gemini.py on ground truths without timestamps."""
+
+from compute_der_gemini import TranscriptSegment, compute_der_gt_based, to_diarization_segments
+
+TURNS = [
+    ("A", "oggi vediamo un caso di aneurisma della aorta addominale sottorenale"),
+    ("B", "il colletto e' lungo e non ci sono trombi nella parete"),
+    ("A", "bene allora scegliamo la protesi e prepariamo gli accessi femorali"),
+    ("B", "misuriamo il diametro delle iliache prima di aprire"),
+    ("A", "procediamo con il rilascio del corpo principale sotto scopia"),
+]
+
+
+def _test_segments():
+    # Every turn is split in two test segments, spoken at two seconds per word
+    segments = []
+    seconds = 0.0
+    for speaker, text in TURNS:
+        words = text.split()
+        half = len(words) // 2
+        for part in (words[:half], words[half:]):
+            segments.append(TranscriptSegment(speaker, " ".join(part), seconds=seconds))
+            seconds += 2.0 * len(part)
+    return segments
+
+
+def test_time_window_follows_untimed_ground_truth():
+    ground_truth = [TranscriptSegment(speaker, text) for speaker, text in TURNS]
+    test = _test_segments()
+    unrestricted = compute_der_gt_based(ground_truth, test, alignment="monotonic")
+    windowed = compute_der_gt_based(ground_truth, test, alignment="monotonic", time_window=5.0)
+    assert unrestricted[1] == len(TURNS)
+    assert windowed[1] == unrestricted[1]
+
+
+def test_last_exported_segment_has_a_duration():
+    segments = _test_segments()
+    assert to_diarization_segments(segments, end_time=200.0)[-1]["end"] == 200.0
+    last = to_diarization_segments(segments)[-1]
+    assert last["end"] > last["start"]
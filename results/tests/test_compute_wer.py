@@ -0,0 +1,95 @@
+"""Word and character alignment of compute_wer.py against the exact results."""
+
+import random
+
+import pytest
+
+from compute_wer import (
+    StreamingWER,
+    align_words,
+    align_words_anchored,
+    cer_row,
+    edit_distance,
+    stats_from_ops,
+    wer_stats,
+)
+from synthetic import corrupt_words, synthetic_reference
+
+
+def _feed(stream, ref, hyp, order, seed):
+    if order == "reference first":
+        stream.add(ref=ref)
+        for start in range(0, len(hyp), 25):
+            stream.add(hyp=hyp[start:start + 25])
+    elif order == "hypothesis first":
+        stream.add(hyp=hyp)
+        for start in range(0, len(ref), 25):
+            stream.add(ref=ref[start:start + 25])
+    else:
+        rng = random.Random(seed)
+        i = j = 0
+        while i < len(ref) or j < len(hyp):
+            ref_chunk, hyp_chunk = rng.randint(0, 30), rng.randint(0, 30)
+            stream.add(ref=ref[i:i + ref_chunk], hyp=hyp[j:j + hyp_chunk])
+            i += ref_chunk
+            j += hyp_chunk
+    return stream.finish()
+
+
+@pytest.mark.parametrize("order", ["reference first", "hypothesis first", "interleaved"])
+@pytest.mark.parametrize("seed", range(3))
+def test_streaming_wer_with_streams_at_different_rates(order, seed):
+    ref = synthetic_reference(600, seed=seed)
+    hyp, _ = corrupt_words(ref, 0.3, seed=seed)
+    exact = wer_stats(" ".join(ref), " ".join(hyp))
+    streamed = _feed(StreamingWER(max_buffer=100), ref, hyp, order, seed)
+    assert streamed["N"] == exact["N"]
+    assert streamed["WER"] == pytest.approx(exact["WER"], abs=0.01)
+
+
+def _sides(ops):
+    """Reference and hypothesis words covered by an alignment."""
+    return [ref for op, ref, _ in ops if op != "I"], [hyp for op, _, hyp in ops if op != "D"]
+
+
+@pytest.mark.parametrize("error_rate", [0.05, 0.2, 0.4])
+@pytest.mark.parametrize("seed", range(3))
+def test_anchored_alignment_matches_the_exact_one(error_rate, seed):
+    ref = synthetic_reference(2000, seed=seed)
+    hyp, _ = corrupt_words(ref, error_rate, seed=seed)
+    exact = stats_from_ops(align_words(ref, hyp), len(ref))
+    ops, optimal = align_words_anchored(ref, hyp)
+    assert _sides(ops) == (ref, hyp)
+    assert optimal is True
+    anchored = stats_from_ops(ops, len(ref))
+    assert anchored["S"] + anchored["D"] + anchored["I"] == exact["S"] + exact["D"] + exact["I"]
+
+
+def _plain_edit_distance(a, b):
+    """Levenshtein distance with the textbook DP, one row at a time."""
+    row = list(range(len(b) + 1))
+    for i, x in enumerate(a, 1):
+        previous, row[0] = row[0], i
+        for j, y in enumerate(b, 1):
+            previous, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, previous + (x != y))
+    return row[-1]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_bit_parallel_edit_distance_matches_the_dp(seed):
+    rng = random.Random(seed)
+    # Lengths around the 64-bit word boundaries of the bit vectors, over a small
+    # alphabet so that the strings share many characters
+    for n, m in [(0, 5), (5, 0), (1, 1), (63, 64), (64, 65), (130, 90), (200, 257)]:
+        a = "".join(rng.choice("abc ") for _ in range(n))
+        b = "".join(rng.choice("abc ") for _ in range(m))
+        assert edit_distance(a, b) == _plain_edit_distance(a, b)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_cer_matches_the_character_dp(seed):
+    ref = " ".join(synthetic_reference(150, seed=seed))
+    hyp = " ".join(corrupt_words(ref.split(), 0.2, seed=seed)[0])
+    row = cer_row(ref, hyp)
+    assert row["E"] == _plain_edit_distance(ref, hyp)
+    assert row["N"] == len(ref)
@@ -0,0 +1,57 @@
+"""Diarization error rates of der.py: speaker mapping and event sweep against the NumPy DER."""
+
+import json
+
+import pytest
+
+from der import (
+    event_der,
+    event_speaker_mapping,
+    optimal_speaker_mapping,
+    segment_der_row,
+    time_weighted_der,
+    to_segment_arrays,
+)
+from synthetic import corrupt_diarization, synthetic_diarization
+
+
+def _write_segments(path, segments):
+    path.write_text(json.dumps([{"start": s, "end": e, "speaker": speaker} for s, e, speaker in segments]))
+    return str(path)
+
+
+def test_optimal_mapping_pairs_differently_labeled_speakers(tmp_path):
+    ground_truth = _write_segments(tmp_path / "gt.json", [(0, 10, "SPEAKER_00"), (10, 20, "SPEAKER_01")])
+    test = _write_segments(tmp_path / "test.json", [(0, 9, 1), (11, 20, 0), (12, 14, 1)])
+
+    literal = segment_der_row(ground_truth, test)
+    assert literal["correct"] == 0 and "mapping" not in literal
+
+    row = segment_der_row(ground_truth, test, optimal_mapping=True)
+    assert row["mapping"] == {"1": "SPEAKER_00", "0": "SPEAKER_01"}
+    assert row["correct"] == 2
+    assert row["DER"] == pytest.approx(1 / 3)
+
+
+@pytest.mark.parametrize("collar", [0.0, 0.25])
+@pytest.mark.parametrize("seed", range(3))
+def test_event_sweep_matches_the_numpy_der(collar, seed):
+    pytest.importorskip("numpy")
+    ground_truth = synthetic_diarization(300, speakers=4, seed=seed)
+    test = corrupt_diarization(ground_truth, 0.2, seed=seed)
+    # Relabel the test speakers, so that the scores depend on the mapping
+    test = [{**segment, "speaker": segment["speaker"].replace("SPEAKER", "spk")} for segment in test]
+
+    labels = []
+    reference = to_segment_arrays(ground_truth, labels)
+    hypothesis = to_segment_arrays(test, labels)
+    mapping = optimal_speaker_mapping(reference, hypothesis)
+    assert event_speaker_mapping(ground_truth, test) == mapping
+
+    for used in (None, mapping):
+        frames = time_weighted_der(reference, hypothesis, collar, used)
+        events = event_der(ground_truth, test, collar, used)
+        # The synthetic overlaps are shorter than two collars
+        assert events["overlap"] > 0 or collar > 0
+        for key in ("total", "missed", "false_alarm", "confusion", "der"):
+            assert events[key] == pytest.approx(frames[key], abs=1e-6)
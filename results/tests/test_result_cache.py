@@ -0,0 +1,95 @@
+"""Result cache: keys change whenever any module a metric depends on changes, rows
+are reused under other paths and puts do not rescan the directory."""
+
+import shutil
+
+import pytest
+
+import assignment
+import compute_der_gemini
+import compute_wer
+import cpwer
+import result_cache
+import text_normalization
+import vocabulary
+from result_cache import ResultCache, cached_row
+
+
+def _edited_copy(module, tmp_path):
+    """Copy of a module's source with an extra line, standing in for an edit."""
+    path = tmp_path / f"{module.__name__}.py"
+    shutil.copy(module.__file__, path)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("\n# edited\n")
+    return str(path)
+
+
+@pytest.mark.parametrize("metric_module", [compute_wer, compute_der_gemini])
+@pytest.mark.parametrize("dependency", [text_normalization, vocabulary])
+def test_dependency_change_changes_key(metric_module, dependency, tmp_path, monkeypatch):
+    before = metric_module.cache_version()
+    monkeypatch.setattr(dependency, "__file__", _edited_copy(dependency, tmp_path))
+    assert metric_module.cache_version() != before
+
+
+@pytest.mark.parametrize(
+    "dependency", [assignment, compute_der_gemini, compute_wer, text_normalization, vocabulary]
+)
+def test_cpwer_dependency_change_changes_key(dependency, tmp_path, monkeypatch):
+    before = cpwer.cache_version()
+    monkeypatch.setattr(dependency, "__file__", _edited_copy(dependency, tmp_path))
+    assert cpwer.cache_version() != before
+
+
+def test_score_batch_misses_cache_after_dependency_change(tmp_path, monkeypatch):
+    ref = tmp_path / "ref.txt"
+    hyp = tmp_path / "hyp.txt"
+    ref.write_text("Professore: dieci pazienti oggi\n", encoding="utf-8")
+    hyp.write_text("[00:01] Professore: dieci pazienti\n", encoding="utf-8")
+    cache = compute_wer.ResultCache(str(tmp_path / "cache"))
+
+    compute_wer.score_batch(str(ref), [str(hyp)], workers=1, cache=cache)
+    compute_wer.score_batch(str(ref), [str(hyp)], workers=1, cache=cache)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    monkeypatch.setattr(
+        text_normalization, "__file__", _edited_copy(text_normalization, tmp_path)
+    )
+    compute_wer.score_batch(str(ref), [str(hyp)], workers=1, cache=cache)
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_cached_row_reuses_rows_under_other_paths(tmp_path):
+    first = tmp_path / "a.txt"
+    second = tmp_path / "b.txt"
+    first.write_text("same content", encoding="utf-8")
+    second.write_text("same content", encoding="utf-8")
+    cache = ResultCache(str(tmp_path / "cache"))
+    computed = []
+
+    def row_of(path):
+        def compute():
+            computed.append(path)
+            return {"test_file": path, "value": 1}
+
+        return cached_row(cache, "metric", {}, lambda: "v1", {"test_file": path}, compute)
+
+    assert row_of(str(first)) == {"test_file": str(first), "value": 1}
+    assert row_of(str(second)) == {"test_file": str(second), "value": 1}
+    assert computed == [str(first)]
+
+
+def test_puts_keep_a_running_size(tmp_path, monkeypatch):
+    scans = []
+    scandir = result_cache.os.scandir
+    monkeypatch.setattr(result_cache.os, "scandir", lambda path: scans.append(path) or scandir(path))
+
+    cache = ResultCache(str(tmp_path / "cache"))
+    for i in range(10):
+        cache.put(f"key{i}", {"value": i})
+    assert len(scans) == 1
+
+    small = ResultCache(str(tmp_path / "small"), max_bytes=100)
+    for i in range(20):
+        small.put(f"key{i}", {"value": "x" * 20})
+    assert sum(entry.stat().st_size for entry in scandir(small.directory)) <= 100
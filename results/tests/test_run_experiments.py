@@ -0,0 +1,72 @@
+"""Manifest runner: grouping of the jobs into batches and end-to-end reports."""
+
+from results_sink import read_jsonl
+from run_experiments import Job, group_jobs, load_manifest, run_reports
+
+
+def _job(metric, ground_truth, run, options=None):
+    return Job(
+        report=0,
+        system="system",
+        run=run,
+        file=f"run_{run}.txt",
+        path=f"run_{run}.txt",
+        ground_truth=ground_truth,
+        metric=metric,
+        options=options or {},
+    )
+
+
+def test_wer_jobs_are_batched_per_ground_truth_and_options():
+    jobs = [
+        _job("wer", "a.txt", 1),
+        _job("wer", "b.txt", 2),
+        _job("wer", "a.txt", 3),
+        _job("wer", "a.txt", 4, {"anchored": True}),
+    ]
+    assert group_jobs(jobs) == [[0, 2], [1], [3]]
+
+
+def test_wer_batches_are_split_over_the_workers():
+    jobs = [_job("wer", "a.txt", run) for run in range(5)]
+    assert group_jobs(jobs, workers=2) == [[0, 1, 2], [3, 4]]
+    assert group_jobs(jobs, workers=8) == [[0], [1], [2], [3], [4]]
+
+
+def test_other_metrics_run_one_job_per_task():
+    jobs = [_job("der-gemini", "gt.txt", 1), _job("der-gemini", "gt.txt", 2)]
+    assert group_jobs(jobs) == [[0], [1]]
+
+
+def test_max_wer_report_end_to_end(tmp_path):
+    (tmp_path / "ref.txt").write_text("Professore: oggi vediamo un caso di aneurisma\n", encoding="utf-8")
+    (tmp_path / "good.txt").write_text("[00:01] Professore: oggi vediamo un caso di aneurisma\n", encoding="utf-8")
+    (tmp_path / "bad.txt").write_text("[00:01] Professore: domani niente\n", encoding="utf-8")
+    manifest = tmp_path / "experiments.toml"
+    manifest.write_text(
+        f"""
+[[reports]]
+name = "screening"
+title = "Screening"
+metric = "wer"
+output = "{(tmp_path / 'screening.txt').as_posix()}"
+results = "{(tmp_path / 'screening.jsonl').as_posix()}"
+heading = "### {{file}}\\n"
+base_path = "{tmp_path.as_posix()}"
+ground_truth = "{(tmp_path / 'ref.txt').as_posix()}"
+options = {{ max_wer = 0.15 }}
+
+[[reports.systems]]
+name = "System"
+glob = "[gb]*.txt"
+""",
+        encoding="utf-8",
+    )
+
+    run_reports(load_manifest(str(manifest)), workers=1)
+
+    rows = read_jsonl(str(tmp_path / "screening.jsonl"))
+    assert [(row["file"], row["exceeds_cutoff"]) for row in rows] == [("bad.txt", True), ("good.txt", False)]
+    report = (tmp_path / "screening.txt").read_text(encoding="utf-8")
+    assert "WER oltre la soglia (exceeds cutoff)" in report
+    assert "WER = (S+D+I)/N = 0.000" in report
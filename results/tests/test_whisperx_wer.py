@@ -0,0 +1,43 @@
+"""Normalization of the whisperx words and of the reference they are scored against."""
+
+import json
+
+from whisperx_wer import load_whisperx_words, read_reference, timing_profile
+
+
+def _write_whisperx(path):
+    path.write_text(
+        json.dumps(
+            {
+                "segments": [
+                    {
+                        "start": 0.0,
+                        "end": 2.0,
+                        "text": "alle 10:30",
+                        "words": [
+                            {"word": "Alle", "start": 0.0, "end": 0.5, "score": 0.9},
+                            {"word": "10:30", "start": 0.5, "end": 2.0, "score": 0.8},
+                        ],
+                    },
+                    {"start": 2.0, "end": 3.0, "text": "ore 11:15."},
+                ]
+            }
+        ),
+        encoding="utf-8",
+    )
+    return str(path)
+
+
+def test_words_with_colons_are_kept(tmp_path):
+    words = load_whisperx_words(_write_whisperx(tmp_path / "whisperx.json"))
+    assert [word.word for word in words] == ["alle", "10", "30", "ore", "11", "15"]
+    assert [word.start for word in words[:3]] == [0.0, 0.5, 0.5]
+
+
+def test_reference_with_times_scores_like_the_words(tmp_path):
+    reference = tmp_path / "reference.txt"
+    reference.write_text("Professore: alle 10:30\n[00:02] Studente 1: ore 11:15.\n", encoding="utf-8")
+    ref_tokens = read_reference(str(reference))
+    assert ref_tokens == ["alle", "10", "30", "ore", "11", "15"]
+    words = load_whisperx_words(_write_whisperx(tmp_path / "whisperx.json"))
+    assert timing_profile(ref_tokens, words)["totals"]["WER"] == 0.0
@@ -0,0 +1,203 @@
+"""
+Text normalization shared by the WER and DER metrics
+
+A normalization is described by a NormalizationRules value. Its regular expressions
+are compiled once per rule set, and short normalized texts are memoized, so
+normalizing the same segment again (e.g. inside the Gemini matching loops) is a
+dictionary lookup. Whole documents are not memoized, so the cache does not keep
+transcripts alive.
+"""
+
+import re
+import unicodedata
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Pattern, Tuple
+
+CACHE_SIZE = 1 << 12
+# Longest text memoized by normalize: segments and lines, not whole documents
+MEMO_MAX_CHARS = 1024
+
+
+@dataclass(frozen=True)
+class NormalizationRules:
+    """
+    Rules applied in order: lowercase, timestamp stripping, speaker label stripping,
+    accent folding, removal of the characters matched by `drop_pattern`, whitespace
+    collapsing and number word mapping.
+
+    Attributes:
+        lowercase: Lowercase the text
+        strip_timestamps: Replace bracketed parts such as "[01:23]" with a space
+        strip_speaker_labels: Replace everything up to the last colon of each line
+            (e.g. "Professore:") with a space
+        fold_accents: Remove diacritics ("è" -> "e")
+        drop_pattern: Regular expression of the characters to remove, or None
+        drop_replacement: Replacement of the removed characters
+        number_words: Map Italian number words to digits ("dieci" -> "10")
+    """
+
+    lowercase: bool = True
+    strip_timestamps: bool = False
+    strip_speaker_labels: bool = False
+    fold_accents: bool = False
+    drop_pattern: Optional[str] = None
+    drop_replacement: str = " "
+    number_words: bool = False
+
+    def with_options(self, **changes) -> "NormalizationRules":
+        """Copy of the rules with some fields changed."""
+        return replace(self, **changes)
+
+
+# Rules of compute_wer: transcripts with timestamps and speaker labels, keeping only
+# letters (with Italian accents), digits and apostrophes
+WER_RULES = NormalizationRules(
+    strip_timestamps=True,
+    strip_speaker_labels=True,
+    drop_pattern=r"[^a-zàèéìòù0-9\'\s]",
+)
+
+# Rules of the Gemini DER text similarity: segment texts without labels, removing the
+# common punctuation only
+SIMILARITY_RULES = NormalizationRules(
+    drop_pattern=r'[.,;!?()"\[\]{}]',
+    drop_replacement="",
+)
+
+PRESETS: Dict[str, NormalizationRules] = {"wer": WER_RULES, "similarity": SIMILARITY_RULES}
+
+_TIMESTAMP = re.compile(r"\[.*?\]")
+_SPEAKER_LABEL = re.compile(r".*\:")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=None)
+def _compile(rules: NormalizationRules) -> List[Callable[[str], str]]:
+    """Steps of a rule set, with its patterns compiled once."""
+    steps: List[Callable[[str], str]] = []
+    if rules.lowercase:
+        steps.append(str.lower)
+    if rules.strip_timestamps:
+        steps.append(lambda text: _TIMESTAMP.sub(" ", text))
+    if rules.strip_speaker_labels:
+        steps.append(lambda text: _SPEAKER_LABEL.sub(" ", text))
+    if rules.fold_accents:
+        steps.append(fold_accents)
+    if rules.drop_pattern is not None:
+        drop: Pattern[str] = re.compile(rules.drop_pattern)
+        steps.append(lambda text: drop.sub(rules.drop_replacement, text))
+    steps.append(lambda text: _WHITESPACE.sub(" ", text).strip())
+    if rules.number_words:
+        steps.append(lambda text: " ".join(map(number_word, text.split(" "))))
+    return steps
+
+
+def normalize(text: str, rules: NormalizationRules = WER_RULES) -> str:
+    """
+    Normalize a text with a rule set; texts up to MEMO_MAX_CHARS characters are
+    memoized per (text, rules).
+
+    Args:
+        text: Text to normalize
+        rules: Rule set, e.g. WER_RULES or SIMILARITY_RULES
+
+    Returns:
+        The normalized text, words separated by single spaces
+    """
+    if len(text) <= MEMO_MAX_CHARS:
+        return _normalize_memo(text, rules)
+    return _apply(text, rules)
+
+
+def _apply(text: str, rules: NormalizationRules) -> str:
+    for step in _compile(rules):
+        text = step(text)
+    return text
+
+
+_normalize_memo = lru_cache(maxsize=CACHE_SIZE)(_apply)
+
+
+def fold_accents(text: str) -> str:
+    """Remove the diacritics of a text ("perché" -> "perche")."""
+    decomposed = unicodedata.normalize("NFD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+_UNITS = {
+    "zero": 0, "uno": 1, "un": 1, "una": 1, "due": 2, "tre": 3, "quattro": 4, "cinque": 5,
+    "sei": 6, "sette": 7, "otto": 8, "nove": 9, "dieci": 10, "undici": 11, "dodici": 12,
+    "tredici": 13, "quattordici": 14, "quindici": 15, "sedici": 16, "diciassette": 17,
+    "diciotto": 18, "diciannove": 19,
+}
+_TENS = {
+    "venti": 20, "trenta": 30, "quaranta": 40, "cinquanta": 50, "sessanta": 60,
+    "settanta": 70, "ottanta": 80, "novanta": 90,
+}
+# Tens with and without the final vowel ("vent" + "uno"), longest first
+_TENS_PIECES: List[Tuple[str, int]] = sorted(
+    [*_TENS.items(), *((tens[:-1], value) for tens, value in _TENS.items())],
+    key=lambda piece: -len(piece[0]),
+)
+# Articles, only read as numbers inside a compound ("ventun")
+_ARTICLES = {"un", "una"}
+
+
+def _below_hundred(word: str) -> Optional[int]:
+    """Value of "ventotto", "quarantaquattro", "dodici"...; None if not a number."""
+    if word in _UNITS:
+        return _UNITS[word]
+    for piece, value in _TENS_PIECES:
+        if word.startswith(piece):
+            rest = word[len(piece):]
+            if not rest:
+                return value
+            unit = _UNITS.get(rest)
+            if unit is not None and 0 < unit < 10:
+                return value + unit
+    return None
+
+
+def _below_thousand(word: str) -> Optional[int]:
+    if not word:
+        return 0
+    position = word.find("cento")
+    if position < 0:
+        return _below_hundred(word)
+    head, tail = word[:position], word[position + len("cento"):]
+    hundreds = 1 if not head else _UNITS.get(head)
+    rest = _below_thousand(tail)
+    if rest is None and tail.startswith("tt"):
+        rest = _below_thousand("o" + tail)  # elision: "centottanta", "centotto"
+    if hundreds is None or not 0 < hundreds < 10 or rest is None:
+        return None
+    return hundreds * 100 + rest
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def number_word(word: str) -> str:
+    """
+    Map an Italian number word up to 999999 to its digits ("dieci" -> "10",
+    "duemilaventi" -> "2020"); other words are returned unchanged.
+
+    Accents are ignored ("ventitré"). The articles "un" and "una" are left alone,
+    but other number words are also common words ("sei"), which is why the mapping
+    is opt-in.
+    """
+    plain = fold_accents(word)
+    if plain in _ARTICLES:
+        return word
+    if plain.startswith("mille"):
+        thousands, rest = 1, _below_thousand(plain[len("mille"):])
+    elif "mila" in plain:
+        head, tail = plain.split("mila", 1)
+        thousands, rest = _below_thousand(head), _below_thousand(tail)
+        if thousands is not None and thousands < 2:
+            thousands = None
+    else:
+        value = _below_thousand(plain) if plain else None
+        return str(value) if value is not None else word
+    if thousands is None or rest is None:
+        return word
+    return str(thousands * 1000 + rest)
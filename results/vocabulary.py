@@ -0,0 +1,80 @@
+"""
+Token interning: maps normalized words to compact integer ids
+
+Transcripts encoded with a shared Vocabulary are stored as array('i') (4 bytes per
+word) and compared as integers, so the aligners and similarity functions never
+hash or compare strings in their inner loops.
+"""
+
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+UNKNOWN = -1
+
+
+class Vocabulary:
+    """
+    Bidirectional word <-> id mapping; ids are assigned in order of first appearance.
+    """
+
+    def __init__(self, words: Iterable[str] = ()):
+        self.ids: Dict[str, int] = {}
+        self.words: List[str] = []
+        for word in words:
+            self.add(word)
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def __contains__(self, word: str) -> bool:
+        return word in self.ids
+
+    def add(self, word: str) -> int:
+        """Return the id of `word`, assigning a new one if needed."""
+        word_id = self.ids.get(word)
+        if word_id is None:
+            word_id = self.ids[word] = len(self.words)
+            self.words.append(word)
+        return word_id
+
+    def encode(self, tokens: Iterable[str], add: bool = True) -> array:
+        """
+        Encode words as an array('i') of ids.
+
+        Args:
+            tokens: Words to encode
+            add: Assign ids to new words; if False they are encoded as UNKNOWN (-1),
+                which never equals a known id
+
+        Returns:
+            The ids
+        """
+        if add:
+            return array("i", map(self.add, tokens))
+        get = self.ids.get
+        return array("i", (get(token, UNKNOWN) for token in tokens))
+
+    def encode_text(self, text: str, add: bool = True) -> array:
+        """Encode a normalized text (words separated by spaces)."""
+        return self.encode(text.split(), add)
+
+    def decode(self, ids: Iterable[int]) -> List[str]:
+        """Words of a sequence of known ids."""
+        words = self.words
+        return [words[word_id] for word_id in ids]
+
+    def word(self, word_id: Optional[int]) -> Optional[str]:
+        """Word of an id, None for None."""
+        return None if word_id is None else self.words[word_id]
+
+
+def as_numpy(ids: Sequence[int]) -> "np.ndarray":
+    """View an array('i') as an int32 NumPy array without copying (copies other sequences)."""
+    if isinstance(ids, array) and ids.itemsize == 4:
+        return np.frombuffer(ids, dtype=np.int32) if len(ids) else np.zeros(0, np.int32)
+    return np.asarray(ids, dtype=np.int32)
@@ -0,0 +1,353 @@
+"""
+Timing-aware WER for whisperx word-level JSON outputs
+
+The whisperx segments are read with a streaming JSON parser, one segment at a time,
+and only the normalized words with their start/end/score are kept. The words are
+aligned with the reference by compute_wer, then every error is attributed to the
+time and confidence score of its hypothesis word, giving a WER per time bucket
+(default: per minute) and error rates per score range.
+"""
+
+import argparse
+import json
+import re
+import sys
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Sequence, TextIO
+
+from compute_wer import align_words, align_words_anchored, normalize_text
+from text_normalization import WER_RULES
+
+READ_SIZE = 1 << 16
+DEFAULT_BUCKET = 60.0
+DEFAULT_SCORE_EDGES = (0.25, 0.5, 0.75)
+# WER rules for whisperx words and segment texts, which carry no speaker labels:
+# stripping everything up to a colon would drop times such as "10:30"
+WORD_RULES = WER_RULES.with_options(strip_speaker_labels=False)
+# Leading "[timestamp] Speaker:" of a reference line; the label colon is followed by
+# a space, unlike the colon of a time
+_LINE_LABEL = re.compile(r"^\s*(?:\[[^\]]*\]\s*)?[^:\n]*:(?=\s|$)", re.MULTILINE)
+
+_decoder = json.JSONDecoder()
+
+
+class _JsonStream:
+    """Buffered reader that decodes JSON values from a text file one at a time."""
+
+    def __init__(self, f: TextIO, read_size: int = READ_SIZE):
+        self.f = f
+        self.read_size = read_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        """Append the next chunk of the file, dropping the consumed part of the buffer."""
+        if self.eof:
+            return False
+        chunk = self.f.read(self.read_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Return the next non-whitespace character without consuming it ("" at EOF)."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise ValueError(f"Expected '{char}' at offset {self.pos} of the JSON buffer")
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Decode the next JSON value, reading more of the file until it is complete."""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(self.buffer) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def items(self) -> Iterator[Any]:
+        """Decode the elements of the array starting at the current position."""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            char = self.peek()
+            self.pos += 1
+            if char == "]":
+                return
+            if char != ",":
+                raise ValueError(f"Expected ',' or ']' in JSON array, got {char!r}")
+
+
+def iter_json_array(f: TextIO, key: str = "segments") -> Iterator[Any]:
+    """
+    Stream the elements of a JSON array without loading the whole document.
+
+    Args:
+        f: Text file containing either an array or an object with the array under `key`
+        key: Key of the array in a top-level object
+
+    Yields:
+        The array elements, decoded one at a time
+    """
+    stream = _JsonStream(f)
+    if stream.peek() == "[":
+        yield from stream.items()
+        return
+
+    stream.expect("{")
+    while stream.peek() != "}":
+        name = stream.value()
+        stream.expect(":")
+        if name == key:
+            yield from stream.items()
+            return
+        stream.value()  # skip the value of another key
+        if stream.peek() == ",":
+            stream.pos += 1
+    raise ValueError(f"No '{key}' array in the JSON document")
+
+
+@dataclass
+class TimedWord:
+    """A normalized hypothesis word with its whisperx timing and confidence."""
+
+    word: str
+    start: Optional[float]
+    end: Optional[float]
+    score: Optional[float]
+
+
+def _seconds(value: Any) -> Optional[float]:
+    """Timing as a float; the Whisper API JSON stores them as strings."""
+    return float(value) if value is not None else None
+
+
+def load_whisperx_words(path: str) -> List[TimedWord]:
+    """
+    Stream the segments of a whisperx JSON file into normalized timed words.
+
+    Words are normalized like compute_wer.normalize_text, without the speaker label
+    stripping (see WORD_RULES); a whisperx word that
+    normalizes to several tokens gives each of them its timing. Words without a
+    timing (whisperx leaves some numbers unaligned) get the segment start. Segments
+    without words are split into words sharing the segment timing and no score.
+    """
+    words = []
+    with open(path, encoding="utf-8") as f:
+        for segment in iter_json_array(f, "segments"):
+            segment_start = _seconds(segment.get("start"))
+            if "words" not in segment:
+                # Segment-level output (e.g. Whisper API): every word gets the segment timing
+                segment_end = _seconds(segment.get("end"))
+                for token in normalize_text(segment.get("text", ""), WORD_RULES).split():
+                    words.append(TimedWord(token, segment_start, segment_end, None))
+                continue
+            for item in segment["words"]:
+                start = _seconds(item.get("start", segment_start))
+                end = _seconds(item.get("end"))
+                for token in normalize_text(item["word"], WORD_RULES).split():
+                    words.append(TimedWord(token, start, end, item.get("score")))
+    return words
+
+
+def read_reference(path: str) -> List[str]:
+    """
+    Read a reference transcript as normalized words, with the same rules as the
+    whisperx words (WORD_RULES) once the leading timestamp and speaker label of
+    every line are removed, so that a time such as "10:30" is kept on both sides.
+    """
+    with open(path, encoding="utf-8") as f:
+        return normalize_text(_LINE_LABEL.sub(" ", f.read()), WORD_RULES).split()
+
+
+def _bucket_of(index: int, times: Sequence[Optional[float]], bucket: float) -> int:
+    """Time bucket of the hypothesis word `index`, using the closest timed word before it."""
+    while index >= 0 and times[index] is None:
+        index -= 1
+    return int(times[index] // bucket) if index >= 0 else 0
+
+
+def timing_profile(
+    ref_tokens: List[str],
+    words: List[TimedWord],
+    bucket: float = DEFAULT_BUCKET,
+    score_edges: Sequence[float] = DEFAULT_SCORE_EDGES,
+    anchored: bool = False,
+) -> Dict[str, Any]:
+    """
+    Align the reference with the timed hypothesis words and profile the errors.
+
+    Substitutions, insertions and matches take the time and score of their
+    hypothesis word; deletions take the time of the previous hypothesis word and
+    have no score.
+
+    Args:
+        ref_tokens: Normalized reference words
+        words: Timed hypothesis words, see load_whisperx_words
+        bucket: Bucket length in seconds
+        score_edges: Inner edges of the score ranges, e.g. (0.5,) for [0, 0.5) and [0.5, 1]
+        anchored: Use the anchor-based aligner (see compute_wer.align_words_anchored)
+
+    Returns:
+        Dict with "totals" (S/D/I/N/WER), "buckets" (one dict per non-empty bucket with
+        start/end seconds, S/D/I/N and WER) and "scores" (one dict per score range
+        with low/high, words, correct, S, I and error_rate = (S+I)/words)
+    """
+    hyp_tokens = [word.word for word in words]
+    if anchored:
+        ops, _ = align_words_anchored(ref_tokens, hyp_tokens)
+    else:
+        ops = align_words(ref_tokens, hyp_tokens)
+    times = [word.start for word in words]
+
+    edges = [0.0, *score_edges, 1.0]
+    scores = [
+        {"low": low, "high": high, "words": 0, "correct": 0, "S": 0, "I": 0}
+        for low, high in zip(edges, edges[1:])
+    ]
+    buckets: Dict[int, Dict[str, int]] = {}
+    hyp_index = -1
+    for op, _, _ in ops:
+        if op != "D":
+            hyp_index += 1
+        counts = buckets.setdefault(
+            _bucket_of(hyp_index, times, bucket), {"S": 0, "D": 0, "I": 0, "N": 0}
+        )
+        if op != "I":
+            counts["N"] += 1
+        if op != "=":
+            counts[op] += 1
+        if op == "D":
+            continue
+
+        score = words[hyp_index].score
+        if score is None:
+            continue
+        # Ranges are [low, high), the last one includes 1.0
+        stratum = scores[min(sum(score >= edge for edge in score_edges), len(scores) - 1)]
+        stratum["words"] += 1
+        if op == "=":
+            stratum["correct"] += 1
+        else:
+            stratum[op] += 1
+
+    profile = []
+    for index in sorted(buckets):
+        counts = buckets[index]
+        errors = counts["S"] + counts["D"] + counts["I"]
+        profile.append(
+            {
+                "start": index * bucket,
+                "end": (index + 1) * bucket,
+                **counts,
+                "WER": errors / counts["N"] if counts["N"] > 0 else None,
+            }
+        )
+    for stratum in scores:
+        stratum["error_rate"] = (
+            (stratum["S"] + stratum["I"]) / stratum["words"] if stratum["words"] > 0 else None
+        )
+
+    totals = {key: sum(counts[key] for counts in buckets.values()) for key in ("S", "D", "I")}
+    totals["N"] = len(ref_tokens)
+    totals["WER"] = (
+        (totals["S"] + totals["D"] + totals["I"]) / totals["N"] if totals["N"] > 0 else float("inf")
+    )
+    return {"totals": totals, "buckets": profile, "scores": scores}
+
+
+def _clock(seconds: float) -> str:
+    return f"{int(seconds // 60):02d}:{int(seconds % 60):02d}"
+
+
+def format_profile(profile: Dict[str, Any]) -> str:
+    """Format a timing profile as text tables."""
+    totals = profile["totals"]
+    lines = ["=" * 50, "TIMING-AWARE WER", "=" * 50]
+    lines.append(
+        f"S: {totals['S']}  D: {totals['D']}  I: {totals['I']}  N: {totals['N']}  "
+        f"WER: {totals['WER']:.3f}"
+    )
+    lines.append("")
+    lines.append("WER per time bucket:")
+    lines.append(f"  {'time':<13}  {'N':>4}  {'S':>4}  {'D':>4}  {'I':>4}  {'WER':>7}")
+    for row in profile["buckets"]:
+        wer = f"{row['WER']:.3f}" if row["WER"] is not None else "N/A"
+        span = f"{_clock(row['start'])}-{_clock(row['end'])}"
+        lines.append(
+            f"  {span:<13}  {row['N']:>4}  {row['S']:>4}  {row['D']:>4}  {row['I']:>4}  {wer:>7}"
+        )
+    lines.append("")
+    lines.append("Error rate per confidence score ((S+I) / hypothesis words):")
+    lines.append(f"  {'score':<13}  {'words':>5}  {'S':>4}  {'I':>4}  {'rate':>7}")
+    for row in profile["scores"]:
+        rate = f"{row['error_rate']:.3f}" if row["error_rate"] is not None else "N/A"
+        span = f"{row['low']:.2f}-{row['high']:.2f}"
+        lines.append(f"  {span:<13}  {row['words']:>5}  {row['S']:>4}  {row['I']:>4}  {rate:>7}")
+    lines.append("=" * 50)
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="WER per time bucket and per confidence score from a whisperx word-level JSON"
+    )
+    parser.add_argument("reference", help="Reference transcript (text)")
+    parser.add_argument("hypothesis", help="whisperx JSON output with per-word start/end/score")
+    parser.add_argument(
+        "--bucket",
+        type=float,
+        default=DEFAULT_BUCKET,
+        help=f"Time bucket length in seconds (default: {DEFAULT_BUCKET:g})",
+    )
+    parser.add_argument(
+        "--score-edges",
+        default=",".join(str(edge) for edge in DEFAULT_SCORE_EDGES),
+        help="Comma-separated inner edges of the score ranges (default: 0.25,0.5,0.75)",
+    )
+    parser.add_argument(
+        "--anchored", action="store_true", help="Use the anchor-based aligner for long files"
+    )
+    parser.add_argument("--json", metavar="PATH", help="Also write the profile as JSON")
+    args = parser.parse_args()
+
+    try:
+        edges = sorted(float(edge) for edge in args.score_edges.split(",") if edge.strip())
+        words = load_whisperx_words(args.hypothesis)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    profile = timing_profile(
+        read_reference(args.reference), words, args.bucket, edges, args.anchored
+    )
+    print(format_profile(profile), end="")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(profile, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()